@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import datetime
+import subprocess
+import contextlib
+from typing import Dict, List, Any, Optional
+
+import synthetic_data
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Бенчмарк скриптов generate_cab_names.py и generate_bundle_deps.py на синтетических данных.
+# Каждая стадия запускается в отдельном процессе, чтобы пиковый RSS относился только к ней.
+
+TARGETS = ["find_cab_files", "process_folder", "generate_statistics", "save_results_to_json", "save_to_json"]
+DATASET_MARKER = "dataset.json"
+
+def peak_rss_kb() -> Optional[int]:
+    """
+    Пиковый RSS текущего процесса и его дочерних процессов в КБ (None, если недоступно).
+    """
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # На macOS ru_maxrss в байтах, на Linux - в КБ
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def prepare_dataset(workdir: str, scale: int, options: Dict[str, Any]) -> str:
+    """
+    Генерирует (или переиспользует) набор данных заданного масштаба:
+    tree/ - дерево ассетов для generate_cab_names, dumps/ - дампы для generate_bundle_deps,
+    results.json и cab_files.json - входные данные для стадий статистики и записи JSON.
+    """
+    dataset = os.path.join(workdir, f"scale_{scale}")
+    marker = os.path.join(dataset, DATASET_MARKER)
+    if os.path.exists(marker):
+        with open(marker, 'r', encoding='utf-8') as f:
+            if json.load(f) == options:
+                return dataset
+        shutil.rmtree(dataset)
+
+    from generate_bundle_deps import process_folder
+
+    print(f"Генерация данных: {scale} каталогов и дампов в {dataset}")
+    started = time.perf_counter()
+    cab_files = synthetic_data.generate_asset_tree(
+        os.path.join(dataset, "tree"), directories=scale, depth=options["depth"], fanout=options["fanout"],
+        cabs_per_directory=options["cabs_per_directory"], seed=options["seed"]
+    )
+    synthetic_data.generate_dumps(
+        os.path.join(dataset, "dumps"), count=scale, dependencies_per_dump=options["dependencies"],
+        filler_bytes=options["filler_bytes"], shared_cabs=max(100, scale // 5), seed=options["seed"]
+    )
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        results = process_folder(os.path.join(dataset, "dumps"), jobs=1)
+    with open(os.path.join(dataset, "results.json"), 'w', encoding='utf-8') as f:
+        json.dump(results, f)
+    with open(os.path.join(dataset, "cab_files.json"), 'w', encoding='utf-8') as f:
+        json.dump(cab_files, f)
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(options, f)
+    print(f"✓ Данные сгенерированы за {time.perf_counter() - started:.1f} с")
+    return dataset
+
+def run_target(target: str, dataset: str, jobs: int, workers: Optional[int]) -> Dict[str, Any]:
+    """
+    Выполняет одну стадию (вызывается в дочернем процессе) и возвращает ее замеры.
+    Подготовка входных данных в замер времени не входит; вывод скриптов подавляется.
+    """
+    from generate_cab_names import find_cab_files_with_patterns, save_to_json
+    from generate_bundle_deps import process_folder, generate_statistics, save_results_to_json
+
+    output_dir = tempfile.mkdtemp(prefix="rcb_bench_")
+    items = 0
+    try:
+        if target in ("generate_statistics", "save_results_to_json"):
+            with open(os.path.join(dataset, "results.json"), 'r', encoding='utf-8') as f:
+                results = json.load(f)
+        elif target == "save_to_json":
+            with open(os.path.join(dataset, "cab_files.json"), 'r', encoding='utf-8') as f:
+                cab_files = json.load(f)
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            if target == "find_cab_files":
+                found, stats = find_cab_files_with_patterns(os.path.join(dataset, "tree"), workers=workers)
+                items = stats["directories_scanned"]
+            elif target == "process_folder":
+                items = len(process_folder(os.path.join(dataset, "dumps"), jobs=jobs))
+            elif target == "generate_statistics":
+                generate_statistics(results)
+                items = len(results)
+            elif target == "save_results_to_json":
+                save_results_to_json(results, os.path.join(output_dir, "dependencies_analysis.json"))
+                items = len(results)
+            elif target == "save_to_json":
+                save_to_json(cab_files, os.path.join(output_dir, "cab_files.json"))
+                items = len(cab_files)
+            else:
+                raise ValueError(f"Неизвестная стадия: {target}")
+            wall = time.perf_counter() - started
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        "wall_seconds": wall,
+        "items": items,
+        "items_per_second": items / wall if wall > 0 else None,
+        "peak_rss_kb": peak_rss_kb()
+    }
+
+def measure(target: str, scale: int, dataset: str, jobs: int, workers: Optional[int], repeat: int) -> Dict[str, Any]:
+    """
+    Запускает стадию repeat раз в отдельных процессах; берется лучший результат по времени.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--run-target", target, "--dataset", dataset,
+               "--jobs", str(jobs)]
+    if workers:
+        command += ["--workers", str(workers)]
+
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(command, capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        if completed.returncode != 0:
+            raise RuntimeError(f"Стадия {target} завершилась с ошибкой:\n{completed.stderr}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    best = min(runs, key=lambda run: run["wall_seconds"])
+    rss = [run["peak_rss_kb"] for run in runs if run["peak_rss_kb"] is not None]
+    return {
+        "target": target,
+        "scale": scale,
+        "wall_seconds": round(best["wall_seconds"], 6),
+        "items": best["items"],
+        "items_per_second": round(best["items_per_second"], 1) if best["items_per_second"] else None,
+        "peak_rss_kb": max(rss) if rss else None,
+        "runs": [round(run["wall_seconds"], 6) for run in runs]
+    }
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+                          threshold: float) -> List[Dict[str, Any]]:
+    """
+    Сравнивает замеры с сохраненным базовым прогоном по паре (стадия, масштаб).
+    Регрессия - время больше базового более чем на threshold (доля).
+    """
+    previous = {(entry["target"], entry["scale"]): entry for entry in baseline.get("results", [])}
+    comparison = []
+    for entry in results:
+        base = previous.get((entry["target"], entry["scale"]))
+        if base is None or not base.get("wall_seconds"):
+            continue
+        ratio = entry["wall_seconds"] / base["wall_seconds"]
+        comparison.append({
+            "target": entry["target"],
+            "scale": entry["scale"],
+            "baseline_seconds": base["wall_seconds"],
+            "wall_seconds": entry["wall_seconds"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold
+        })
+    return comparison
+
+def print_results(results: List[Dict[str, Any]], comparison: List[Dict[str, Any]]):
+    """
+    Табличный вывод замеров и сравнения с базовым прогоном.
+    """
+    ratios = {(entry["target"], entry["scale"]): entry for entry in comparison}
+    print("\n" + "=" * 86)
+    print(f"{'Стадия':22} | {'Масштаб':>8} | {'Время, с':>9} | {'Объектов/с':>11} | {'Пик RSS, МБ':>11} | {'К базе':>8}")
+    print("-" * 86)
+    for entry in results:
+        rss = f"{entry['peak_rss_kb'] / 1024:.1f}" if entry["peak_rss_kb"] is not None else "-"
+        rate = f"{entry['items_per_second']:.0f}" if entry["items_per_second"] else "-"
+        base = ratios.get((entry["target"], entry["scale"]))
+        ratio = f"{base['ratio']:.2f}x" if base else "-"
+        if base and base["regression"]:
+            ratio += " ✗"
+        print(f"{entry['target']:22} | {entry['scale']:8} | {entry['wall_seconds']:9.3f} | {rate:>11} | {rss:>11} | {ratio:>8}")
+    print("=" * 86)
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Бенчмарк generate_cab_names.py и generate_bundle_deps.py на синтетических данных'
+    )
+    parser.add_argument('-s', '--scales', default='1000,10000',
+                        help='Масштабы через запятую: число каталогов и дампов (по умолчанию 1000,10000; например 1000,10000,100000)')
+    parser.add_argument('-t', '--targets', default=','.join(TARGETS),
+                        help=f'Стадии через запятую (по умолчанию все: {",".join(TARGETS)})')
+    parser.add_argument('-w', '--workdir', default=os.path.join(tempfile.gettempdir(), 'rcb_benchmark'),
+                        help='Каталог для синтетических данных (переиспользуется между запусками)')
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='Файл для результатов в JSON')
+    parser.add_argument('-b', '--baseline', default=None, help='Результаты предыдущего прогона для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Допустимое замедление относительно базы (доля, по умолчанию 0.2)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Повторов каждой стадии (берется лучший)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Процессов для process_folder (по умолчанию 1)')
+    parser.add_argument('--workers', type=int, default=None, help='Потоков для find_cab_files (по умолчанию авто)')
+    parser.add_argument('--depth', type=int, default=3, help='Глубина синтетического дерева ассетов')
+    parser.add_argument('--fanout', type=int, default=10, help='Ветвление синтетического дерева ассетов')
+    parser.add_argument('--cabs-per-directory', type=int, default=1, help='Файлов cab* в каталоге бандла')
+    parser.add_argument('--dependencies', type=int, default=4, help='Зависимостей в каждом дампе')
+    parser.add_argument('--filler-bytes', type=int, default=4096, help='Объем данных-заполнителя в каждом дампе')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+    parser.add_argument('--clean', action='store_true', help='Удалить синтетические данные после прогона')
+    parser.add_argument('--run-target', help=argparse.SUPPRESS)
+    parser.add_argument('--dataset', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run_target:
+        # Дочерний процесс: одна стадия, результат - строка JSON
+        print(json.dumps(run_target(args.run_target, args.dataset, args.jobs, args.workers)))
+        return 0
+
+    scales = [int(value) for value in args.scales.split(',') if value.strip()]
+    targets = [value.strip() for value in args.targets.split(',') if value.strip()]
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"неизвестные стадии: {', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"✗ Ошибка при чтении базового прогона {args.baseline}: {e}")
+            return 2
+
+    options = {
+        "depth": args.depth,
+        "fanout": args.fanout,
+        "cabs_per_directory": args.cabs_per_directory,
+        "dependencies": args.dependencies,
+        "filler_bytes": args.filler_bytes,
+        "seed": args.seed
+    }
+
+    results = []
+    try:
+        for scale in scales:
+            dataset = prepare_dataset(args.workdir, scale, options)
+            for target in targets:
+                print(f"  {target} ({scale})...")
+                results.append(measure(target, scale, dataset, args.jobs, args.workers, args.repeat))
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 2
+    finally:
+        if args.clean:
+            shutil.rmtree(args.workdir, ignore_errors=True)
+
+    comparison = compare_with_baseline(results, baseline, args.threshold) if baseline else []
+    print_results(results, comparison)
+
+    report = {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": dict(options, jobs=args.jobs, workers=args.workers, repeat=args.repeat),
+        "results": results,
+        "comparison": comparison
+    }
+    try:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✓ Результаты сохранены в: {args.output}")
+    except Exception as e:
+        print(f"✗ Ошибка при сохранении результатов: {e}")
+        return 2
+
+    regressions = [entry for entry in comparison if entry["regression"]]
+    if regressions:
+        print(f"✗ Замедление больше {args.threshold:.0%} относительно базы: {len(regressions)} стадий")
+        return 1
+    if baseline:
+        print("✓ Регрессий относительно базы не обнаружено")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from typing import Dict, List, Any, Optional
+
+# Компактный бинарный индекс для cab_files.json и dependencies_analysis.json.
+# Все числа little-endian, секции выровнены по 8 байт.
+#
+#   заголовок   HEADER_FORMAT (см. ниже)
+#   cab_keys    n_cabs * 16 байт    отсортированные 128-битные хэши CAB (cab-<32 hex>)
+#   cab_paths   n_cabs * uint32     номер строки пути бандла-владельца или NO_STRING
+#   str_offsets (n_strings+1) * uint32  смещения строк в str_data
+#   str_data    UTF-8               пути бандлов, отсортированные по байтам
+#   flags       n_strings * uint8   1 - бандл есть в dependencies_analysis.json
+#   dep_offsets (n_strings+1) * uint32  CSR-смещения зависимостей по номеру строки
+#   dep_targets n_edges * uint32    номера CAB в cab_keys (порядок как в JSON)
+
+MAGIC = b"RCBIDX\x00\x01"
+FORMAT_VERSION = 1
+NO_STRING = 0xFFFFFFFF
+HEADER_FORMAT = "<8sIIIII" + "Q" * 7
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+CAB_PREFIX = "cab-"
+CAB_KEY_SIZE = 16
+
+def cab_to_key(cab: str) -> bytes:
+    """
+    Преобразует имя вида cab-<32 hex> в 16-байтовый ключ.
+    """
+    if len(cab) != 36 or not cab.startswith(CAB_PREFIX) or cab != cab.lower():
+        raise ValueError(f"Имя CAB не в формате cab-<32 hex>: {cab}")
+    return bytes.fromhex(cab[4:])
+
+def key_to_cab(key: bytes) -> str:
+    """
+    Преобразует 16-байтовый ключ обратно в имя cab-<32 hex>.
+    """
+    return CAB_PREFIX + key.hex()
+
+def _uint32_array(values) -> array:
+    result = array('I', values)
+    if sys.byteorder != 'little':
+        result.byteswap()
+    return result
+
+def _align(f, position: int) -> int:
+    padding = (-position) % 8
+    if padding:
+        f.write(b"\x00" * padding)
+    return position + padding
+
+def write_index(output_file: str, cab_files: Optional[Dict[str, str]] = None,
+                dependencies: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Записывает бинарный индекс. cab_files - словарь {cab: путь_бандла},
+    dependencies - раздел "dependencies" из dependencies_analysis.json.
+    Можно передать только один из них. Имена CAB не в формате cab-<32 hex>
+    (generate_cab_names.py принимает любые файлы cab*) в индекс не попадают:
+    возвращается отсортированный список пропущенных имен.
+    """
+    cab_files = cab_files or {}
+    dependencies = dependencies or {}
+
+    cab_set = set(cab_files)
+    for data in dependencies.values():
+        cab_set.update(data.get("dependencies", []))
+    cab_keys = []
+    skipped = []
+    for cab in cab_set:
+        try:
+            cab_keys.append(cab_to_key(cab))
+        except ValueError:
+            skipped.append(cab)
+    cab_keys.sort()
+    cab_numbers = {key_to_cab(key): number for number, key in enumerate(cab_keys)}
+
+    strings = sorted(set(cab_files.values()) | set(dependencies), key=lambda s: s.encode('utf-8'))
+    string_numbers = {string: number for number, string in enumerate(strings)}
+
+    cab_paths = [NO_STRING] * len(cab_keys)
+    for cab, path in cab_files.items():
+        if cab in cab_numbers:
+            cab_paths[cab_numbers[cab]] = string_numbers[path]
+
+    str_offsets = [0]
+    encoded = []
+    for string in strings:
+        data = string.encode('utf-8')
+        encoded.append(data)
+        str_offsets.append(str_offsets[-1] + len(data))
+
+    flags = bytearray(len(strings))
+    dep_offsets = [0]
+    dep_targets = []
+    for string in strings:
+        data = dependencies.get(string)
+        if data is not None:
+            flags[string_numbers[string]] = 1
+            dep_targets.extend(cab_numbers[cab] for cab in data.get("dependencies", []) if cab in cab_numbers)
+        dep_offsets.append(len(dep_targets))
+
+    temp_file = output_file + ".tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(b"\x00" * HEADER_SIZE)
+        position = HEADER_SIZE
+        sections = []
+        for payload in (
+            b"".join(cab_keys),
+            _uint32_array(cab_paths).tobytes(),
+            _uint32_array(str_offsets).tobytes(),
+            b"".join(encoded),
+            bytes(flags),
+            _uint32_array(dep_offsets).tobytes(),
+            _uint32_array(dep_targets).tobytes(),
+        ):
+            position = _align(f, position)
+            sections.append(position)
+            f.write(payload)
+            position += len(payload)
+
+        f.seek(0)
+        f.write(struct.pack(
+            HEADER_FORMAT, MAGIC, FORMAT_VERSION,
+            len(cab_keys), len(strings), len(dependencies), len(dep_targets),
+            *sections
+        ))
+    os.replace(temp_file, output_file)
+    return sorted(skipped)
+
+def export_index(output_file: str, cab_files: Optional[Dict[str, str]] = None,
+                 dependencies: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Обертка над write_index для скриптов-генераторов: выводит результат и не выбрасывает исключений.
+    """
+    try:
+        skipped = write_index(output_file, cab_files, dependencies)
+        for cab in skipped[:10]:
+            print(f"⚠ Имя CAB не в формате cab-<32 hex>, пропущено: {cab}")
+        if len(skipped) > 10:
+            print(f"⚠ ... и еще {len(skipped) - 10}")
+        summary = f" (пропущено имен CAB: {len(skipped)})" if skipped else ""
+        print(f"✓ Бинарный индекс сохранен в: {output_file}{summary}")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка при сохранении бинарного индекса: {e}")
+        return False
+
+class BinaryIndex:
+    """
+    Чтение бинарного индекса через mmap без разбора всего файла.
+    Поиск CAB и путей бандлов - двоичный поиск, O(log n).
+    """
+
+    def __init__(self, index_file: str):
+        self._file = open(index_file, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Пустой файл нельзя отобразить в память
+            self._file.close()
+            raise ValueError(f"Файл {index_file} не является бинарным индексом")
+        self._view = memoryview(self._map)
+
+        header = struct.unpack_from(HEADER_FORMAT, self._map, 0)
+        if header[0] != MAGIC or header[1] != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Файл {index_file} не является бинарным индексом версии {FORMAT_VERSION}")
+
+        (self.cab_count, self.string_count, self.bundle_count, self.edge_count) = header[2:6]
+        (cab_keys, cab_paths, str_offsets, str_data, flags, dep_offsets, dep_targets) = header[6:13]
+
+        self._cab_keys = self._view[cab_keys:cab_keys + self.cab_count * CAB_KEY_SIZE]
+        self._cab_paths = self._uint32_view(cab_paths, self.cab_count)
+        self._str_offsets = self._uint32_view(str_offsets, self.string_count + 1)
+        self._str_data = str_data
+        self._flags = self._view[flags:flags + self.string_count]
+        self._dep_offsets = self._uint32_view(dep_offsets, self.string_count + 1)
+        self._dep_targets = self._uint32_view(dep_targets, self.edge_count)
+
+    def _uint32_view(self, offset: int, count: int):
+        view = self._view[offset:offset + count * 4]
+        if sys.byteorder == 'little':
+            return view.cast('I')
+        values = array('I', view.tobytes())
+        values.byteswap()
+        return values
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Освобождает отображение файла.
+        """
+        for name in ('_cab_keys', '_cab_paths', '_str_offsets', '_flags', '_dep_offsets', '_dep_targets', '_view'):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        self._map.close()
+        self._file.close()
+
+    def cab_key(self, number: int) -> bytes:
+        start = number * CAB_KEY_SIZE
+        return bytes(self._cab_keys[start:start + CAB_KEY_SIZE])
+
+    def string(self, number: int) -> str:
+        start = self._str_data + self._str_offsets[number]
+        end = self._str_data + self._str_offsets[number + 1]
+        return str(self._map[start:end], 'utf-8')
+
+    def find_cab(self, cab: str) -> Optional[int]:
+        """
+        Номер CAB в таблице или None.
+        """
+        try:
+            key = cab_to_key(cab)
+        except ValueError:
+            return None
+        low, high = 0, self.cab_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.cab_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.cab_count and self.cab_key(low) == key:
+            return low
+        return None
+
+    def find_string(self, path: str) -> Optional[int]:
+        """
+        Номер строки (пути бандла) или None.
+        """
+        target = path.encode('utf-8')
+        low, high = 0, self.string_count
+        while low < high:
+            middle = (low + high) // 2
+            start = self._str_data + self._str_offsets[middle]
+            end = self._str_data + self._str_offsets[middle + 1]
+            if self._map[start:end] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.string_count and self.string(low) == path:
+            return low
+        return None
+
+    def cab_path(self, cab: str) -> Optional[str]:
+        """
+        Путь бандла, которому принадлежит CAB, или None.
+        """
+        number = self.find_cab(cab)
+        if number is None or self._cab_paths[number] == NO_STRING:
+            return None
+        return self.string(self._cab_paths[number])
+
+    def dependencies(self, bundle: str) -> Optional[List[str]]:
+        """
+        Прямые зависимости бандла (имена CAB) или None, если бандла нет в анализе.
+        """
+        number = self.find_string(bundle)
+        if number is None or not self._flags[number]:
+            return None
+        start, end = self._dep_offsets[number], self._dep_offsets[number + 1]
+        return [key_to_cab(self.cab_key(target)) for target in self._dep_targets[start:end]]
+
+def main():
+    """
+    Сборка индекса из JSON и поиск по нему.
+    """
+    import argparse
+    from bundle_graph import load_json
+
+    parser = argparse.ArgumentParser(
+        description='Компактный бинарный индекс для cab_files.json и dependencies_analysis.json'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Собрать индекс из JSON файлов')
+    build_parser.add_argument('-c', '--cab-files', help='Путь к cab_files.json')
+    build_parser.add_argument('-d', '--dependencies', help='Путь к dependencies_analysis.json')
+    build_parser.add_argument('-o', '--output', default='dependencies.rcbidx', help='Выходной файл индекса')
+
+    lookup_parser = subparsers.add_parser('lookup', help='Найти CAB или бандл в индексе')
+    lookup_parser.add_argument('index', help='Файл индекса')
+    lookup_parser.add_argument('names', nargs='+', help='Имена cab-... или пути бандлов')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if not args.cab_files and not args.dependencies:
+            parser.error('нужно указать --cab-files и/или --dependencies')
+        cab_files = load_json(args.cab_files) if args.cab_files else None
+        dependencies = load_json(args.dependencies).get("dependencies", {}) if args.dependencies else None
+        export_index(args.output, cab_files, dependencies)
+        return
+
+    with BinaryIndex(args.index) as index:
+        for name in args.names:
+            if name.startswith(CAB_PREFIX):
+                print(f"{name}: {index.cab_path(name)}")
+            else:
+                print(f"{name}: {index.dependencies(name)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+import sys
+import json
+from array import array
+from collections import deque
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+def invert_csr(offsets: array, targets: array, target_count: int) -> Tuple[array, array]:
+    """
+    Обращает CSR-граф подсчетом (O(V + E)). Списки обратных ребер упорядочены по номеру источника.
+    """
+    counts = array('I', [0]) * (target_count + 1)
+    for target in targets:
+        counts[target + 1] += 1
+    for node in range(target_count):
+        counts[node + 1] += counts[node]
+
+    reverse_offsets = array('I', counts)
+    reverse_targets = array('I', [0]) * len(targets)
+    for source in range(len(offsets) - 1):
+        for position in range(offsets[source], offsets[source + 1]):
+            target = targets[position]
+            reverse_targets[counts[target]] = source
+            counts[target] += 1
+    return reverse_offsets, reverse_targets
+
+def load_json(file_path: str) -> Any:
+    """
+    Загружает JSON файл (файлы, созданные PowerShell, могут содержать BOM).
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+class BundleGraph:
+    """
+    Индексированный граф зависимостей бандлов.
+    Пути бандлов и имена CAB интернированы и пронумерованы, ребра хранятся
+    в CSR-виде (массивы смещений и целей) в array('I').
+    - bundle -> cab: исходные зависимости из dependencies_analysis.json
+    - cab -> bundle: владелец CAB по cab_files.json (-1, если неизвестен)
+    - bundle -> bundle: разрешенные зависимости без повторов и без петель
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.cab_names: List[str] = []
+        self.cab_index: Dict[str, int] = {}
+        self.cab_owner = array('i')
+        self.cab_offsets = array('I', [0])
+        self.cab_targets = array('I')
+        self.offsets = array('I', [0])
+        self.targets = array('I')
+        # 1 для бандлов, у которых есть запись в dependencies_analysis.json
+        self.analysed = bytearray()
+        # Обратные индексы строятся один раз по требованию (build_reverse)
+        self.reverse_offsets: Optional[array] = None
+        self.reverse_targets: Optional[array] = None
+        self.cab_reverse_offsets: Optional[array] = None
+        self.cab_reverse_targets: Optional[array] = None
+        self.owned_offsets: Optional[array] = None
+        self.owned_targets: Optional[array] = None
+        self._marks = array('I')
+        self._stamp = 0
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _bundle_id(self, name: str) -> int:
+        node = self.index.get(name)
+        if node is None:
+            node = len(self.names)
+            name = sys.intern(name)
+            self.names.append(name)
+            self.index[name] = node
+            self.analysed.append(0)
+        return node
+
+    def _cab_id(self, cab: str) -> int:
+        node = self.cab_index.get(cab)
+        if node is None:
+            node = len(self.cab_names)
+            cab = sys.intern(cab)
+            self.cab_names.append(cab)
+            self.cab_index[cab] = node
+            self.cab_owner.append(-1)
+        return node
+
+    def bundle_id(self, name: str) -> Optional[int]:
+        """
+        Возвращает номер бандла по пути или None.
+        """
+        return self.index.get(name)
+
+    def cab_dependencies(self, node: int) -> array:
+        """
+        Номера CAB, от которых напрямую зависит бандл.
+        """
+        return self.cab_targets[self.cab_offsets[node]:self.cab_offsets[node + 1]]
+
+    def dependencies(self, node: int) -> array:
+        """
+        Номера бандлов, от которых напрямую зависит бандл.
+        """
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def unresolved_cabs(self, node: int) -> List[str]:
+        """
+        CAB из прямых зависимостей бандла, для которых неизвестен владелец.
+        """
+        return [self.cab_names[cab] for cab in self.cab_dependencies(node) if self.cab_owner[cab] < 0]
+
+    def _next_stamp(self) -> int:
+        self._stamp += 1
+        if self._stamp == 0xFFFFFFFF:
+            self._marks = array('I', [0]) * len(self.names)
+            self._stamp = 1
+        return self._stamp
+
+    def _traverse(self, offsets: array, targets: array, start: Iterable[int],
+                  exclude: Iterable[int] = (), include_start: bool = False) -> List[int]:
+        """
+        Обход в ширину по CSR-массивам с меткой посещения в общем массиве.
+        """
+        stamp = self._next_stamp()
+        marks = self._marks
+        result = []
+        queue = deque()
+        for node in exclude:
+            marks[node] = stamp
+        for node in start:
+            if marks[node] != stamp:
+                marks[node] = stamp
+                queue.append(node)
+                if include_start:
+                    result.append(node)
+        while queue:
+            current = queue.popleft()
+            for dep in targets[offsets[current]:offsets[current + 1]]:
+                if marks[dep] != stamp:
+                    marks[dep] = stamp
+                    result.append(dep)
+                    queue.append(dep)
+        return result
+
+    def closure(self, node: int) -> List[int]:
+        """
+        Транзитивное замыкание зависимостей бандла (без него самого) в порядке обхода в ширину.
+        Время работы пропорционально размеру замыкания.
+        """
+        return self._traverse(self.offsets, self.targets, (node,))
+
+    def load_order(self, node: int) -> List[int]:
+        """
+        Бандл и его замыкание в порядке загрузки: каждый бандл идет после своих
+        зависимостей (обратный обход в глубину), сам бандл - последним.
+        Внутри циклов порядок произвольный.
+        """
+        stamp = self._next_stamp()
+        marks = self._marks
+        offsets = self.offsets
+        targets = self.targets
+
+        order = []
+        marks[node] = stamp
+        work = [(node, offsets[node])]
+        while work:
+            current, position = work[-1]
+            if position < offsets[current + 1]:
+                work[-1] = (current, position + 1)
+                dep = targets[position]
+                if marks[dep] != stamp:
+                    marks[dep] = stamp
+                    work.append((dep, offsets[dep]))
+            else:
+                work.pop()
+                order.append(current)
+        return order
+
+    def strongly_connected_components(self) -> Tuple[array, List[List[int]]]:
+        """
+        Компоненты сильной связности (итеративный алгоритм Тарьяна, O(V + E)).
+        Возвращает (номер компоненты для каждого бандла, списки членов компонент).
+        Компоненты перечислены в обратном топологическом порядке: компонента
+        идет раньше всех компонент, которые от нее зависят.
+        """
+        count = len(self.names)
+        offsets = self.offsets
+        targets = self.targets
+        index = array('i', [-1]) * count
+        low = array('i', [0]) * count
+        on_stack = bytearray(count)
+        component = array('i', [-1]) * count
+        components = []
+        stack = []
+        counter = 0
+
+        for root in range(count):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+
+            while work:
+                node, position = work[-1]
+                if position < offsets[node + 1]:
+                    work[-1] = (node, position + 1)
+                    dep = targets[position]
+                    if index[dep] == -1:
+                        index[dep] = low[dep] = counter
+                        counter += 1
+                        stack.append(dep)
+                        on_stack[dep] = 1
+                        work.append((dep, offsets[dep]))
+                    elif on_stack[dep] and index[dep] < low[node]:
+                        low[node] = index[dep]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component[member] = len(components)
+                        members.append(member)
+                        if member == node:
+                            break
+                    components.append(members)
+
+        return component, components
+
+    def build_reverse(self):
+        """
+        Строит обратные индексы: bundle -> зависящие бандлы, cab -> зависящие бандлы,
+        bundle -> собственные CAB. Выполняется один раз, O(V + E).
+        """
+        if self.reverse_offsets is not None:
+            return
+        self.reverse_offsets, self.reverse_targets = invert_csr(self.offsets, self.targets, len(self.names))
+        self.cab_reverse_offsets, self.cab_reverse_targets = invert_csr(
+            self.cab_offsets, self.cab_targets, len(self.cab_names)
+        )
+
+        owner_offsets = array('I', [0])
+        owner_targets = array('I')
+        for owner in self.cab_owner:
+            if owner >= 0:
+                owner_targets.append(owner)
+            owner_offsets.append(len(owner_targets))
+        self.owned_offsets, self.owned_targets = invert_csr(owner_offsets, owner_targets, len(self.names))
+
+    def owned_cabs(self, node: int) -> array:
+        """
+        Номера CAB, принадлежащих бандлу.
+        """
+        self.build_reverse()
+        return self.owned_targets[self.owned_offsets[node]:self.owned_offsets[node + 1]]
+
+    def dependents(self, node: int) -> array:
+        """
+        Номера бандлов, которые напрямую зависят от бандла.
+        """
+        self.build_reverse()
+        return self.reverse_targets[self.reverse_offsets[node]:self.reverse_offsets[node + 1]]
+
+    def cab_dependents(self, cab: int) -> List[int]:
+        """
+        Номера бандлов, в зависимостях которых напрямую указан CAB (без повторов).
+        """
+        self.build_reverse()
+        return list(dict.fromkeys(
+            self.cab_reverse_targets[self.cab_reverse_offsets[cab]:self.cab_reverse_offsets[cab + 1]]
+        ))
+
+    def reverse_closure(self, nodes: Iterable[int], exclude: Iterable[int] = ()) -> List[int]:
+        """
+        Бандлы, транзитивно зависящие от любого из nodes (сами nodes входят в результат,
+        кроме исключенных).
+        """
+        self.build_reverse()
+        return self._traverse(self.reverse_offsets, self.reverse_targets, nodes, exclude, include_start=True)
+
+    def closure_names(self, name: str) -> Optional[List[str]]:
+        """
+        Транзитивное замыкание зависимостей бандла по пути или None, если бандл неизвестен.
+        """
+        node = self.index.get(name)
+        if node is None:
+            return None
+        return [self.names[dep] for dep in self.closure(node)]
+
+def build_graph(dependencies: Dict[str, Any], cab_files: Dict[str, str]) -> BundleGraph:
+    """
+    Строит граф из раздела "dependencies" файла dependencies_analysis.json
+    и словаря {cab: путь_бандла} из cab_files.json.
+    """
+    graph = BundleGraph()
+
+    for cab, bundle in cab_files.items():
+        graph.cab_owner[graph._cab_id(cab)] = graph._bundle_id(bundle)
+
+    analysed = {}
+    for bundle, data in dependencies.items():
+        node = graph._bundle_id(bundle)
+        graph.analysed[node] = 1
+        analysed[node] = [graph._cab_id(cab) for cab in data.get("dependencies", [])]
+
+    for node in range(len(graph.names)):
+        cabs = analysed.get(node, ())
+        seen = {node}
+        for cab in cabs:
+            graph.cab_targets.append(cab)
+            owner = graph.cab_owner[cab]
+            if owner >= 0 and owner not in seen:
+                seen.add(owner)
+                graph.targets.append(owner)
+        graph.cab_offsets.append(len(graph.cab_targets))
+        graph.offsets.append(len(graph.targets))
+
+    graph._marks = array('I', [0]) * len(graph.names)
+    return graph
+
+def load_graph(dependencies_file: str = "dependencies_analysis.json",
+               cab_files_file: str = "cab_files.json") -> BundleGraph:
+    """
+    Загружает dependencies_analysis.json и cab_files.json и строит граф.
+    """
+    analysis = load_json(dependencies_file)
+    cab_files = load_json(cab_files_file)
+    return build_graph(analysis.get("dependencies", {}), cab_files)
+
+def closure_unresolved_cabs(graph: BundleGraph, node: int, closure: Optional[Iterable[int]] = None) -> List[str]:
+    """
+    CAB без известного владельца в бандле и во всем его замыкании.
+    """
+    if closure is None:
+        closure = graph.closure(node)
+    unresolved = []
+    seen = set()
+    for member in [node, *closure]:
+        for cab in graph.unresolved_cabs(member):
+            if cab not in seen:
+                seen.add(cab)
+                unresolved.append(cab)
+    return unresolved
@@ -0,0 +1,325 @@
+import re
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set
+
+from bundle_graph import BundleGraph, load_graph, load_json, closure_unresolved_cabs
+from generate_assets_paths import collect_prefab_paths
+
+# Перекрестная проверка данных мода до запуска сервера: traderAssort.json, itemsConfig.json,
+# itemPresets.json и newItemDetails.json ссылаются друг на друга (и на базу игры) по 24-символьным
+# ID. Все файлы индексируются за один проход, затем каждая ссылка проверяется поиском в индексах.
+#
+# ID, которых нет среди новых предметов, считаются предметами базовой игры. Без --items-db
+# (templates/items.json сервера SPT) их существование проверить нельзя - они попадают
+# в отчет как external_references; с --items-db неизвестный ID - ошибка unknown_item.
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[2] / "ReleaseContentBackport" / "data"
+ID_RE = re.compile(r'^[0-9a-f]{24}$')
+
+# Торговцы базовой игры (traderAssort.json -> traderId)
+BASE_TRADERS = {
+    "54cb50c76803fa8b248b4571": "Prapor",
+    "54cb57776803fa99248b456e": "Therapist",
+    "579dc571d53a0658a154fbec": "Fence",
+    "58330581ace78e27b8b10cee": "Skier",
+    "5935c25fb3acc3127c3d8cd9": "Peacekeeper",
+    "5a7c2eca46aef81a7ca2145d": "Mechanic",
+    "5ac3b934156ae10c4430e83c": "Ragman",
+    "5c0647fdd443bc2504c2d371": "Jaeger",
+    "638f541a29ffd1183d187f57": "Lightkeeper",
+    "656f0f98d80a697f855d34b1": "BTR Driver",
+    "6617beeaa9cfa777ca915b7c": "Ref"
+}
+
+def load_items_db(path: str) -> Dict[str, Set[str]]:
+    """
+    Предметы базовой игры: {ID: имена слотов}. Принимает templates/items.json сервера
+    ({ID: шаблон}), список шаблонов с _id или просто список ID.
+    """
+    data = load_json(path)
+    if isinstance(data, dict):
+        templates = data.items()
+    else:
+        templates = ((entry["_id"], entry) if isinstance(entry, dict) else (entry, {}) for entry in data)
+    return {
+        item_id: {slot.get("_name") for slot in ((template.get("_props") or {}).get("Slots") or [])}
+        for item_id, template in templates
+    }
+
+class ItemDataChecker:
+    """
+    Индексы данных мода и проверка ссылок. Проблемы копятся в self.issues.
+    """
+
+    def __init__(self, items_db: Optional[Dict[str, Set[str]]] = None):
+        self.items_db = items_db
+        self.new_items: Dict[str, Dict[str, Any]] = {}
+        self.issues: List[Dict[str, Any]] = []
+        self.external: Dict[str, List[str]] = {}
+
+    def issue(self, severity: str, code: str, file: str, item_id: str, **details):
+        self.issues.append(dict({"severity": severity, "code": code, "file": file, "id": item_id}, **details))
+
+    def slots_of(self, item_id: str) -> Optional[Set[str]]:
+        if item_id in self.new_items:
+            props = self.new_items[item_id].get("_props") or {}
+            return {slot.get("_name") for slot in (props.get("Slots") or [])}
+        if self.items_db is not None and item_id in self.items_db:
+            return self.items_db[item_id]
+        return None
+
+    def check_ref(self, file: str, owner: str, where: str, item_id: Any) -> bool:
+        """
+        Проверяет ссылку на предмет: формат ID, затем новые предметы, затем база игры.
+        """
+        if not isinstance(item_id, str) or not ID_RE.match(item_id):
+            self.issue("error", "invalid_id", file, owner, where=where, value=item_id)
+            return False
+        if item_id in self.new_items:
+            return True
+        if self.items_db is None:
+            self.external.setdefault(item_id, []).append(f"{file}: {owner} {where}")
+            return True
+        if item_id not in self.items_db:
+            self.issue("error", "unknown_item", file, owner, where=where, value=item_id)
+            return False
+        return True
+
+    def index_new_items(self, item_details: List[Dict[str, Any]], file: str = "newItemDetails.json"):
+        for entry in item_details:
+            item = entry.get("newItem") or {}
+            item_id = item.get("_id")
+            if not isinstance(item_id, str) or not ID_RE.match(item_id):
+                self.issue("error", "invalid_id", file, str(item_id), where="_id")
+                continue
+            if item_id in self.new_items:
+                self.issue("error", "duplicate_item_id", file, item_id, name=item.get("_name"))
+                continue
+            self.new_items[item_id] = item
+
+    def check_new_items(self, item_details: List[Dict[str, Any]], file: str = "newItemDetails.json"):
+        for entry in item_details:
+            item = entry.get("newItem") or {}
+            item_id = item.get("_id")
+            if self.new_items.get(item_id) is not item:
+                # Неверный ID или повтор - уже отмечены в index_new_items
+                continue
+            props = item.get("_props") or {}
+            self.check_ref(file, item_id, "_parent", item.get("_parent"))
+            if not entry.get("locales"):
+                self.issue("warning", "missing_locales", file, item_id, name=item.get("_name"))
+            for slot in props.get("Slots") or []:
+                name = slot.get("_name")
+                if slot.get("_parent") != item_id:
+                    self.issue("warning", "slot_parent_mismatch", file, item_id, where=f"Slots.{name}",
+                               value=slot.get("_parent"))
+                for slot_filter in (slot.get("_props") or {}).get("filters") or []:
+                    for ref in slot_filter.get("Filter") or []:
+                        self.check_ref(file, item_id, f"Slots.{name}", ref)
+            for ref in props.get("ConflictingItems") or []:
+                self.check_ref(file, item_id, "ConflictingItems", ref)
+
+    def check_prefabs(self, item_details: List[Dict[str, Any]], graph: Optional[BundleGraph],
+                      file: str = "newItemDetails.json"):
+        """
+        Пути префабов: заполнены, ведут на бандл и (если есть граф) бандл известен
+        dependencies_analysis.json, а все CAB его замыкания разрешаются через cab_files.json.
+        """
+        paths, report = collect_prefab_paths(item_details)
+        for item in report["missing_prefab"]:
+            self.issue("error", "missing_prefab", file, item["id"], name=item["name"])
+        for item in report["empty_prefab"]:
+            self.issue("error", "empty_prefab", file, item["id"], name=item["name"])
+        for item in report["not_bundle"]:
+            self.issue("error", "prefab_not_bundle", file, item["id"], where=f"{item['field']}.path", value=item["path"])
+        if graph is None:
+            return
+
+        owners: Dict[str, List[str]] = {}
+        for entry in item_details:
+            item = entry.get("newItem") or {}
+            prefab = ((item.get("_props") or {}).get("Prefab") or {}).get("path")
+            if prefab:
+                owners.setdefault(prefab, []).append(item.get("_id"))
+        for path in paths:
+            item_id = (owners.get(path) or ["?"])[0]
+            node = graph.bundle_id(path)
+            if node is None or not graph.analysed[node]:
+                self.issue("error", "prefab_unresolved", file, item_id, value=path)
+                continue
+            unresolved = closure_unresolved_cabs(graph, node)
+            if unresolved:
+                self.issue("warning", "prefab_unresolved_cabs", file, item_id, value=path, cabs=unresolved)
+
+    def check_items_config(self, items_config: List[Dict[str, Any]], file: str = "itemsConfig.json"):
+        seen: Set[str] = set()
+        for config in items_config:
+            item_id = config.get("id")
+            if not self.check_ref(file, str(item_id), "id", item_id):
+                continue
+            if item_id in seen:
+                self.issue("warning", "duplicate_config", file, item_id, name=config.get("name"))
+            seen.add(item_id)
+            if config.get("is_new", True) and item_id not in self.new_items:
+                self.issue("error", "not_new_item", file, item_id, name=config.get("name"))
+
+            slots = self.slots_of(item_id)
+            for slot_name, refs in (config.get("compatibleItems") or {}).items():
+                if slots is not None and slot_name not in slots:
+                    # Сервер молча пропускает несуществующий слот
+                    self.issue("warning", "unknown_slot", file, item_id, where=f"compatibleItems.{slot_name}")
+                for ref in refs or []:
+                    self.check_ref(file, item_id, f"compatibleItems.{slot_name}", ref)
+            for ref in config.get("conflictingItems") or []:
+                self.check_ref(file, item_id, "conflictingItems", ref)
+
+    def check_trader_assort(self, trader_assort: List[Dict[str, Any]], file: str = "traderAssort.json"):
+        assort_ids: Set[str] = set()
+        for offer in trader_assort:
+            item = offer.get("item") or {}
+            offer_id = str(item.get("_id"))
+            if not ID_RE.match(offer_id):
+                self.issue("error", "invalid_id", file, offer_id, where="item._id")
+            elif offer_id in assort_ids:
+                # LoyalLevelItems и BarterScheme индексируются по item._id - второе предложение перезапишет первое
+                self.issue("error", "duplicate_assort_id", file, offer_id)
+            assort_ids.add(offer_id)
+
+            trader_id = offer.get("traderId")
+            if trader_id not in BASE_TRADERS:
+                self.issue("error", "unknown_trader", file, offer_id, value=trader_id)
+            level = offer.get("loyaltyLevel")
+            if not isinstance(level, int) or not 1 <= level <= 4:
+                self.issue("error", "invalid_loyalty_level", file, offer_id, value=level)
+
+            self.check_ref(file, offer_id, "item._tpl", item.get("_tpl"))
+            if not offer.get("barterScheme"):
+                self.issue("error", "empty_barter_scheme", file, offer_id)
+            for barter in offer.get("barterScheme") or []:
+                self.check_ref(file, offer_id, "barterScheme._tpl", barter.get("_tpl"))
+
+            parents = {offer_id}
+            for sub_item in offer.get("subItems") or []:
+                parents.add(sub_item.get("_id"))
+            for sub_item in offer.get("subItems") or []:
+                self.check_ref(file, offer_id, f"subItems.{sub_item.get('_id')}._tpl", sub_item.get("_tpl"))
+                if sub_item.get("parentId") not in parents:
+                    self.issue("error", "dangling_parent", file, offer_id, where=f"subItems.{sub_item.get('_id')}",
+                               value=sub_item.get("parentId"))
+
+    def check_presets(self, presets: Dict[str, Any], file: str = "itemPresets.json"):
+        for preset_id, preset in presets.items():
+            if preset.get("_id") != preset_id:
+                self.issue("error", "preset_id_mismatch", file, preset_id, value=preset.get("_id"))
+            items = preset.get("_items") or []
+            item_ids = {item.get("_id") for item in items}
+            if len(item_ids) != len(items):
+                self.issue("error", "duplicate_preset_item", file, preset_id)
+            if preset.get("_parent") not in item_ids:
+                self.issue("error", "dangling_parent", file, preset_id, where="_parent", value=preset.get("_parent"))
+            for item in items:
+                self.check_ref(file, preset_id, f"_items.{item.get('_id')}._tpl", item.get("_tpl"))
+                parent_id = item.get("parentId")
+                if item.get("_id") != preset.get("_parent") and parent_id not in item_ids:
+                    self.issue("error", "dangling_parent", file, preset_id, where=f"_items.{item.get('_id')}",
+                               value=parent_id)
+
+    def report(self, files: Dict[str, str]) -> Dict[str, Any]:
+        summary = {"errors": 0, "warnings": 0, "by_code": {}, "new_items": len(self.new_items),
+                   "external_references": len(self.external)}
+        for item in self.issues:
+            summary["errors" if item["severity"] == "error" else "warnings"] += 1
+            summary["by_code"][item["code"]] = summary["by_code"].get(item["code"], 0) + 1
+        return {"files": files, "summary": summary, "issues": self.issues, "external_references": self.external}
+
+def check_item_data(data_dir: str, graph: Optional[BundleGraph] = None,
+                    items_db: Optional[Dict[str, Set[str]]] = None) -> Dict[str, Any]:
+    """
+    Загружает четыре файла данных мода из data_dir и проверяет все ссылки между ними.
+    """
+    files = {name: str(Path(data_dir) / f"{name}.json")
+             for name in ("newItemDetails", "itemsConfig", "itemPresets", "traderAssort")}
+    item_details = load_json(files["newItemDetails"])
+
+    checker = ItemDataChecker(items_db)
+    checker.index_new_items(item_details)
+    checker.check_new_items(item_details)
+    checker.check_prefabs(item_details, graph)
+    checker.check_items_config(load_json(files["itemsConfig"]))
+    checker.check_presets(load_json(files["itemPresets"]))
+    checker.check_trader_assort(load_json(files["traderAssort"]))
+    return checker.report(files)
+
+def print_issues(report: Dict[str, Any], limit: int = 30):
+    """
+    Человекочитаемый вывод (не более limit проблем).
+    """
+    issues = sorted(report["issues"], key=lambda item: item["severity"] != "error")
+    for item in issues[:limit]:
+        prefix = "✗" if item["severity"] == "error" else "⚠"
+        details = ", ".join(f"{key}={value}" for key, value in item.items()
+                            if key not in ("severity", "code", "file", "id"))
+        print(f"{prefix} {item['file']}: {item['code']}: {item['id']}" + (f" ({details})" if details else ""))
+    if len(issues) > limit:
+        print(f"... и еще {len(issues) - limit}")
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Перекрестная проверка ID в traderAssort.json, itemsConfig.json, itemPresets.json '
+                    'и newItemDetails.json (код возврата 1 при ошибках)'
+    )
+    parser.add_argument('data', nargs='?', default=str(DEFAULT_DATA_DIR), help='Каталог data мода')
+    parser.add_argument('-d', '--dependencies', default='dependencies_analysis.json', help='Файл анализа зависимостей')
+    parser.add_argument('-c', '--cab-files', default='cab_files.json', help='Соответствие CAB -> путь бандла')
+    parser.add_argument('--no-prefabs', action='store_true', help='Не проверять разрешение путей префабов через граф')
+    parser.add_argument('--items-db', default=None,
+                        help='templates/items.json сервера SPT для проверки ID предметов базовой игры')
+    parser.add_argument('-o', '--output', default=None, help='Сохранить отчет в JSON файл')
+    parser.add_argument('--json', action='store_true', help='Вывести отчет в формате JSON в stdout')
+    parser.add_argument('--strict', action='store_true', help='Считать предупреждения ошибками')
+    parser.add_argument('-n', '--limit', type=int, default=30, help='Сколько проблем выводить в консоль')
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        graph = None if args.no_prefabs else load_graph(args.dependencies, args.cab_files)
+        items_db = load_items_db(args.items_db) if args.items_db else None
+        report = check_item_data(args.data, graph, items_db)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении входных файлов: {e}", file=sys.stderr)
+        return 2
+    summary = report["summary"]
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_issues(report, args.limit)
+        if report["external_references"]:
+            print(f"⚠ ID вне новых предметов (не проверены без --items-db): {summary['external_references']}")
+        mark = "✗" if summary["errors"] else ("⚠" if summary["warnings"] else "✓")
+        print(f"{mark} Новых предметов: {summary['new_items']}, ошибок: {summary['errors']}, "
+              f"предупреждений: {summary['warnings']} ({summary['seconds'] * 1000:.0f} мс)")
+
+    if args.output:
+        try:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении отчета: {e}", file=sys.stderr)
+            return 2
+
+    failed = summary["errors"] or (args.strict and summary["warnings"])
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
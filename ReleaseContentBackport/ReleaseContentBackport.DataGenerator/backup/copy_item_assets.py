@@ -0,0 +1,252 @@
+import os
+import sys
+import shutil
+from typing import Dict, List, Any, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+from bundle_graph import load_json, load_graph
+from dump_cache import file_digest
+from validate_bundles import load_base_game
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Замена CopyItemAssets.ps1: копирует пути из assets_paths.json в целевой каталог
+# с сохранением структуры, пропуская уже скопированные файлы.
+
+# ioctl FICLONE (Linux): копирование через reflink на btrfs/xfs
+FICLONE = 0x40049409
+COPY_CHUNK = 64 * 1024 * 1024
+MODES = ("auto", "copy", "reflink", "hardlink")
+
+def collect_paths(asset_paths: List[str], with_dependencies: bool = False,
+                  dependencies_file: str = "dependencies_analysis.json",
+                  cab_files_file: str = "cab_files.json", source_root: str = ".",
+                  base_game: Optional[Set[str]] = None) -> Tuple[List[str], int, List[str]]:
+    """
+    Возвращает список путей для копирования без повторов (в исходном порядке),
+    количество добавленных транзитивных зависимостей и исключенные зависимости.
+    Добавляются только файлы .bundle, которые есть в source_root и нет в base_game:
+    в замыкание входят и бандлы базовой игры, и служебные имена ("shaders", "cubemaps"),
+    которые копировать в пакет мода нельзя.
+    """
+    paths = list(dict.fromkeys(asset_paths))
+    if not with_dependencies:
+        return paths, 0, []
+
+    graph = load_graph(dependencies_file, cab_files_file)
+    selected = dict.fromkeys(paths)
+    excluded = {}
+    for path in paths:
+        for dependency in graph.closure_names(path) or ():
+            if dependency in selected or dependency in excluded:
+                continue
+            if (not dependency.endswith(".bundle")
+                    or (base_game is not None and dependency in base_game)
+                    or not os.path.isfile(os.path.join(source_root, dependency))):
+                excluded[dependency] = None
+                continue
+            selected[dependency] = None
+    return list(selected), len(selected) - len(paths), list(excluded)
+
+def is_up_to_date(source_stat: os.stat_result, source: str, target: str, use_hash: bool) -> bool:
+    """
+    Файл уже скопирован, если совпадают размер и mtime. При use_hash и совпадающем
+    размере, но другом mtime сравнивается содержимое; при совпадении mtime обновляется.
+    """
+    try:
+        target_stat = os.stat(target)
+    except OSError:
+        return False
+    if target_stat.st_size != source_stat.st_size:
+        return False
+    if target_stat.st_mtime_ns == source_stat.st_mtime_ns:
+        return True
+    if use_hash and file_digest(source) == file_digest(target):
+        os.utime(target, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        return True
+    return False
+
+def _reflink(source: str, target: str) -> bool:
+    if fcntl is None:
+        return False
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            return False
+
+def _copy_file_range(source: str, target: str, size: int) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        copied = 0
+        try:
+            while copied < size:
+                count = os.copy_file_range(src.fileno(), dst.fileno(), min(COPY_CHUNK, size - copied))
+                if count == 0:
+                    break
+                copied += count
+        except OSError:
+            if copied:
+                raise
+            return False
+    return copied == size
+
+def copy_file(source: str, target: str, source_stat: os.stat_result, mode: str = "auto") -> str:
+    """
+    Копирует файл через временный файл рядом с целевым и os.replace.
+    Возвращает использованный способ: hardlink, reflink, copy_file_range или copy.
+    В режиме reflink неудачное клонирование - ошибка OSError, без перехода к копированию.
+    """
+    temp_target = target + ".tmp"
+    method = None
+    try:
+        if mode == "hardlink":
+            try:
+                if os.path.lexists(temp_target):
+                    os.unlink(temp_target)
+                os.link(source, temp_target)
+                method = "hardlink"
+            except OSError:
+                # Другой том или файловая система без жестких ссылок
+                method = None
+        if method is None and mode in ("auto", "reflink") and _reflink(source, temp_target):
+            method = "reflink"
+        if method is None and mode == "reflink":
+            # Явно запрошенный reflink не подменяется обычным копированием
+            raise OSError(f"reflink не поддерживается для {target}")
+        if method is None and mode == "auto" and _copy_file_range(source, temp_target, source_stat.st_size):
+            method = "copy_file_range"
+        if method is None:
+            shutil.copyfile(source, temp_target)
+            method = "copy"
+        if method != "hardlink":
+            # Сохраняем mtime источника, чтобы следующий запуск пропустил файл
+            os.utime(temp_target, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        os.replace(temp_target, target)
+    except BaseException:
+        if os.path.lexists(temp_target):
+            os.unlink(temp_target)
+        raise
+    return method
+
+def copy_one(path: str, source_root: str, target_root: str, mode: str, use_hash: bool) -> Dict[str, Any]:
+    """
+    Копирует один путь; результат - словарь со статусом copied, skipped, missing или error.
+    """
+    source = os.path.join(source_root, path)
+    target = os.path.join(target_root, path)
+    try:
+        source_stat = os.stat(source)
+    except OSError:
+        return {"path": path, "status": "missing"}
+
+    try:
+        if is_up_to_date(source_stat, source, target, use_hash):
+            return {"path": path, "status": "skipped", "bytes": source_stat.st_size}
+        method = copy_file(source, target, source_stat, mode)
+        return {"path": path, "status": "copied", "method": method, "bytes": source_stat.st_size}
+    except OSError as e:
+        return {"path": path, "status": "error", "error": str(e)}
+
+def copy_assets(paths: List[str], source_root: str = ".", target_root: str = "output",
+                mode: str = "auto", use_hash: bool = False, workers: Optional[int] = None,
+                quiet: bool = False) -> Dict[str, Any]:
+    """
+    Копирует пути в пуле потоков. Целевые каталоги создаются заранее, каждый один раз.
+    """
+    directories = {os.path.dirname(os.path.join(target_root, path)) for path in paths}
+    directories.add(target_root)
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    stats = {"copied": 0, "skipped": 0, "missing": 0, "error": 0, "bytes_copied": 0, "methods": {}}
+    problems = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(lambda path: copy_one(path, source_root, target_root, mode, use_hash), paths):
+            status = result["status"]
+            stats[status] += 1
+            if status == "copied":
+                stats["bytes_copied"] += result["bytes"]
+                stats["methods"][result["method"]] = stats["methods"].get(result["method"], 0) + 1
+                if not quiet:
+                    print(f"✓ Скопировано: {result['path']}")
+            elif status == "missing":
+                problems.append(result)
+                print(f"⚠ Файл не найден: {os.path.join(source_root, result['path'])}")
+            elif status == "error":
+                problems.append(result)
+                print(f"✗ Ошибка при копировании {result['path']}: {result['error']}")
+    stats["problems"] = problems
+    return stats
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Копирование бандлов из assets_paths.json с сохранением структуры каталогов'
+    )
+    parser.add_argument('-a', '--assets', default='assets_paths.json', help='Список путей бандлов (по умолчанию assets_paths.json)')
+    parser.add_argument('-s', '--source', default='.', help='Исходный каталог (по умолчанию текущий)')
+    parser.add_argument('-t', '--target', default='output', help='Целевой каталог (по умолчанию output)')
+    parser.add_argument(
+        '-m', '--mode',
+        choices=MODES,
+        default='auto',
+        help='Способ копирования: auto - reflink или copy_file_range, если поддерживаются, иначе обычное копирование; '
+             'reflink - только reflink (ошибка, если файловая система его не поддерживает); '
+             'hardlink - жесткие ссылки (изменение копии меняет исходный файл)'
+    )
+    parser.add_argument('--hash', action='store_true', help='При совпадении размера и другом mtime сравнивать содержимое')
+    parser.add_argument('-r', '--with-dependencies', action='store_true',
+                        help='Добавить транзитивные зависимости бандлов из dependencies_analysis.json')
+    parser.add_argument('-d', '--dependencies', default='dependencies_analysis.json', help='Файл анализа зависимостей')
+    parser.add_argument('-c', '--cab-files', default='cab_files.json', help='Соответствие CAB -> путь бандла')
+    parser.add_argument('-b', '--base-game', default=None,
+                        help='Список бандлов базовой игры (JSON-массив или по пути на строку), не добавляемых с -r')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Количество потоков копирования')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Не выводить строки по скопированным файлам')
+
+    args = parser.parse_args()
+
+    try:
+        asset_paths = load_json(args.assets)
+        base_game = load_base_game(args.base_game) if args.base_game else None
+        paths, added, excluded = collect_paths(asset_paths, args.with_dependencies, args.dependencies,
+                                               args.cab_files, args.source, base_game)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении входных файлов: {e}")
+        return 1
+
+    print(f"Загружено путей из JSON: {len(asset_paths)}")
+    if args.with_dependencies:
+        print(f"Добавлено транзитивных зависимостей: {added}")
+        if excluded:
+            reason = "не .bundle, нет в исходном каталоге или бандлы базовой игры"
+            print(f"Исключено зависимостей ({reason}): {len(excluded)}")
+        if base_game is None:
+            print("⚠ Без --base-game добавляются все найденные в исходном каталоге бандлы, включая бандлы игры")
+
+    stats = copy_assets(paths, args.source, args.target, args.mode, args.hash, args.workers, args.quiet)
+
+    print("\n=== Статистика ===")
+    print(f"Скопировано: {stats['copied']} файлов ({stats['bytes_copied'] / (1024 * 1024):.1f} МБ)")
+    if stats["methods"]:
+        print("Способы копирования: " + ", ".join(f"{name} - {count}" for name, count in sorted(stats["methods"].items())))
+    print(f"Пропущено (без изменений): {stats['skipped']} файлов")
+    print(f"Не найдено: {stats['missing']} файлов")
+    print(f"Ошибок: {stats['error']} файлов")
+    print(f"Всего обработано: {len(paths)} путей")
+
+    return 1 if stats["missing"] or stats["error"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import os
+import sys
+import mmap
+import json
+import hashlib
+from typing import Dict, List, Any, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from bundle_graph import BundleGraph, load_graph, load_json
+from load_planner import format_size
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Отчет о дубликатах: побайтно одинаковые файлы бандлов и бандлы с одинаковыми
+# наборами зависимостей. Файлы сначала группируются по размеру, затем по хэшу
+# первых HEAD_SIZE байт, и только оставшиеся кандидаты хэшируются целиком.
+
+HEAD_SIZE = 64 * 1024
+CHUNK_SIZE = 8 * 1024 * 1024
+
+def hash_algorithm() -> str:
+    return "xxh3_128" if xxhash is not None else "blake2b-128"
+
+def _new_hasher():
+    # xxhash (если установлен) заметно быстрее; blake2b - из стандартной библиотеки
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+def hash_file(path: str, limit: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Optional[str]:
+    """
+    Хэш содержимого файла (или первых limit байт) через mmap, частями по chunk_size.
+    Возвращает None, если файл не удалось прочитать.
+    """
+    hasher = _new_hasher()
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return hasher.hexdigest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                end = size if limit is None else min(size, limit)
+                with memoryview(mapped) as view:
+                    for start in range(0, end, chunk_size):
+                        hasher.update(view[start:min(end, start + chunk_size)])
+    except (OSError, ValueError):
+        return None
+    return hasher.hexdigest()
+
+def find_bundle_files(root: str, pattern_suffix: str = ".bundle") -> Dict[str, int]:
+    """
+    Все файлы с суффиксом pattern_suffix под root: {относительный путь через '/': размер}.
+    Пустой суффикс - все файлы.
+    """
+    files = {}
+    for directory, subdirs, names in os.walk(root):
+        subdirs.sort()
+        for name in sorted(names):
+            if pattern_suffix and not name.endswith(pattern_suffix):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                files[os.path.relpath(path, root).replace(os.sep, '/')] = os.stat(path).st_size
+            except OSError:
+                continue
+    return files
+
+def _refine(groups: List[List[str]], root: str, hasher: Callable[[str], Optional[str]],
+            executor: ThreadPoolExecutor) -> List[Dict[str, Any]]:
+    # Разбивает группы кандидатов по хэшу; остаются только группы из 2+ файлов
+    candidates = [path for group in groups for path in group]
+    digests = executor.map(lambda path: hasher(os.path.join(root, path)), candidates)
+    refined = []
+    for group, group_digests in zip(groups, _split(list(digests), [len(group) for group in groups])):
+        by_digest: Dict[str, List[str]] = {}
+        for path, digest in zip(group, group_digests):
+            if digest is not None:
+                by_digest.setdefault(digest, []).append(path)
+        refined.extend({"hash": digest, "files": paths} for digest, paths in by_digest.items() if len(paths) > 1)
+    return refined
+
+def _split(values: List[Any], sizes: List[int]) -> List[List[Any]]:
+    parts = []
+    start = 0
+    for size in sizes:
+        parts.append(values[start:start + size])
+        start += size
+    return parts
+
+def find_duplicate_files(root: str, files: Dict[str, int], workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Группы побайтно одинаковых файлов: размер -> хэш начала файла -> полный хэш.
+    """
+    by_size: Dict[int, List[str]] = {}
+    for path, size in files.items():
+        if size > 0:
+            by_size.setdefault(size, []).append(path)
+    size_groups = [paths for paths in by_size.values() if len(paths) > 1]
+
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        head_groups = _refine(size_groups, root, lambda path: hash_file(path, HEAD_SIZE), executor)
+        # Файлы не длиннее HEAD_SIZE уже полностью сравнены по хэшу начала
+        full_candidates = [group["files"] for group in head_groups if files[group["files"][0]] > HEAD_SIZE]
+        full_groups = [group for group in head_groups if files[group["files"][0]] <= HEAD_SIZE]
+        full_groups.extend(_refine(full_candidates, root, hash_file, executor))
+
+    groups = []
+    for group in full_groups:
+        size = files[group["files"][0]]
+        groups.append({
+            "hash": group["hash"],
+            "size": size,
+            "files": sorted(group["files"]),
+            "wasted_bytes": size * (len(group["files"]) - 1)
+        })
+    groups.sort(key=lambda group: (-group["wasted_bytes"], group["files"][0]))
+
+    return {
+        "algorithm": hash_algorithm(),
+        "files_scanned": len(files),
+        "bytes_scanned": sum(files.values()),
+        "files_hashed": sum(len(paths) for paths in size_groups),
+        "duplicate_groups": groups,
+        "duplicate_files": sum(len(group["files"]) - 1 for group in groups),
+        "wasted_bytes": sum(group["wasted_bytes"] for group in groups)
+    }
+
+def find_identical_dependency_sets(graph: BundleGraph, bundles: List[str]) -> Dict[str, Any]:
+    """
+    Бандлы с одинаковыми наборами прямых зависимостей и одинаковыми транзитивными замыканиями
+    (одинаковые списки dependencyKeys в bundles.json).
+    """
+    direct: Dict[frozenset, List[str]] = {}
+    closures: Dict[frozenset, List[str]] = {}
+    unknown = []
+    for path in bundles:
+        node = graph.bundle_id(path)
+        if node is None or not graph.analysed[node]:
+            unknown.append(path)
+            continue
+        direct.setdefault(frozenset(graph.dependencies(node)), []).append(path)
+        closures.setdefault(frozenset(graph.closure(node)), []).append(path)
+
+    def groups(index: Dict[frozenset, List[str]]) -> List[Dict[str, Any]]:
+        result = [
+            {"dependencies": len(members), "bundles": sorted(paths),
+             "dependency_keys": sorted(graph.names[member] for member in members)}
+            for members, paths in index.items() if len(paths) > 1 and members
+        ]
+        result.sort(key=lambda group: (-len(group["bundles"]), -group["dependencies"], group["bundles"][0]))
+        return result
+
+    return {
+        "bundles": len(bundles),
+        "unknown_bundles": unknown,
+        "distinct_direct_sets": len(direct),
+        "distinct_closures": len(closures),
+        "identical_direct_dependencies": groups(direct),
+        "identical_closures": groups(closures)
+    }
+
+def print_report(report: Dict[str, Any], top: int = 10):
+    """
+    Краткий вывод отчета.
+    """
+    files = report.get("files")
+    if files:
+        print("\n" + "=" * 70)
+        print(f"ОДИНАКОВЫЕ ФАЙЛЫ ({files['algorithm']}):")
+        print("=" * 70)
+        print(f"Просмотрено файлов: {files['files_scanned']} ({format_size(files['bytes_scanned'])}), "
+              f"хэшировано: {files['files_hashed']}")
+        print(f"Групп дубликатов: {len(files['duplicate_groups'])}, лишних копий: {files['duplicate_files']}, "
+              f"впустую: {format_size(files['wasted_bytes'])}")
+        for group in files["duplicate_groups"][:top]:
+            print(f"  {format_size(group['wasted_bytes']):>10} | {len(group['files'])} x {format_size(group['size'])}")
+            for path in group["files"]:
+                print(f"{'':13}| {path}")
+
+    dependencies = report.get("dependency_sets")
+    if dependencies:
+        print("\n" + "=" * 70)
+        print("ОДИНАКОВЫЕ НАБОРЫ ЗАВИСИМОСТЕЙ:")
+        print("=" * 70)
+        print(f"Бандлов: {dependencies['bundles']}, различных наборов прямых зависимостей: "
+              f"{dependencies['distinct_direct_sets']}, различных списков dependencyKeys: {dependencies['distinct_closures']}")
+        for group in dependencies["identical_closures"][:top]:
+            print(f"  {len(group['bundles'])} бандлов с одинаковыми {group['dependencies']} dependencyKeys:")
+            for path in group["bundles"][:5]:
+                print(f"    {path}")
+            if len(group["bundles"]) > 5:
+                print(f"    ... и еще {len(group['bundles']) - 5}")
+        if dependencies["unknown_bundles"]:
+            print(f"⚠ Бандлов нет в графе зависимостей: {len(dependencies['unknown_bundles'])}")
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Поиск одинаковых файлов бандлов и бандлов с одинаковыми наборами зависимостей'
+    )
+    parser.add_argument('folder', nargs='?', default=None,
+                        help='Каталог с файлами бандлов (если не указан, проверяются только наборы зависимостей)')
+    parser.add_argument('--suffix', default='.bundle', help="Суффикс проверяемых файлов (по умолчанию .bundle, '' - все файлы)")
+    parser.add_argument('-a', '--assets', default='assets_paths.json',
+                        help='Бандлы для сравнения наборов зависимостей (по умолчанию assets_paths.json)')
+    parser.add_argument('--all-bundles', action='store_true', help='Сравнивать наборы зависимостей всех бандлов графа')
+    parser.add_argument('-d', '--dependencies', default='dependencies_analysis.json', help='Файл анализа зависимостей')
+    parser.add_argument('-c', '--cab-files', default='cab_files.json', help='Соответствие CAB -> путь бандла')
+    parser.add_argument('--no-dependencies', action='store_true', help='Не сравнивать наборы зависимостей')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Количество потоков хэширования')
+    parser.add_argument('-n', '--top', type=int, default=10, help='Сколько групп выводить в консоль')
+    parser.add_argument('-o', '--output', default='dedup_report.json', help='Файл отчета (по умолчанию dedup_report.json)')
+
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {}
+    if args.folder:
+        if not os.path.isdir(args.folder):
+            print(f"✗ Каталог {args.folder} не существует")
+            return 2
+        files = find_bundle_files(args.folder, args.suffix)
+        print(f"Найдено файлов: {len(files)} в {args.folder}")
+        report["files"] = find_duplicate_files(args.folder, files, args.workers)
+
+    if not args.no_dependencies:
+        try:
+            graph = load_graph(args.dependencies, args.cab_files)
+            bundles = [graph.names[node] for node in range(len(graph)) if graph.analysed[node]] \
+                if args.all_bundles else list(dict.fromkeys(load_json(args.assets)))
+        except (OSError, ValueError) as e:
+            print(f"✗ Ошибка при чтении входных файлов: {e}")
+            return 2
+        report["dependency_sets"] = find_identical_dependency_sets(graph, bundles)
+
+    if not report:
+        parser.error('нужно указать каталог с бандлами или не отключать сравнение зависимостей')
+
+    print_report(report, args.top)
+
+    try:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Отчет сохранен в: {args.output}")
+    except Exception as e:
+        print(f"✗ Ошибка при сохранении отчета: {e}")
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import sys
+import json
+import time
+from typing import Dict, List, Any, Optional
+
+from bundle_graph import BundleGraph, load_graph, load_json
+from load_planner import plan_bundles, format_size
+from graph_metrics import transitive_metrics
+
+def resolve_rdeps(graph: BundleGraph, target: str, transitive: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Находит бандлы, зависящие от CAB (cab-...) или от бандла (путь).
+    Для бандла учитываются все принадлежащие ему CAB.
+    Возвращает None, если цель не найдена в графе.
+    """
+    if target.startswith("cab-"):
+        cab = graph.cab_index.get(target)
+        if cab is None:
+            return None
+        owner = graph.cab_owner[cab]
+        direct = graph.cab_dependents(cab)
+        exclude = (owner,) if owner >= 0 else ()
+        result = {
+            "target": target,
+            "kind": "cab",
+            "owner": graph.names[owner] if owner >= 0 else None,
+        }
+    else:
+        node = graph.bundle_id(target)
+        if node is None:
+            return None
+        direct = list(graph.dependents(node))
+        exclude = (node,)
+        result = {
+            "target": target,
+            "kind": "bundle",
+            "cabs": [graph.cab_names[cab] for cab in graph.owned_cabs(node)],
+        }
+
+    dependents = graph.reverse_closure(direct, exclude) if transitive else [
+        dependent for dependent in direct if dependent not in exclude
+    ]
+    result["transitive"] = transitive
+    result["dependents"] = sorted(graph.names[dependent] for dependent in dependents)
+    return result
+
+def command_rdeps(graph: BundleGraph, args) -> int:
+    """
+    Подкоманда rdeps: обратные зависимости для одной или нескольких целей.
+    """
+    graph.build_reverse()
+
+    results = []
+    missing = 0
+    for target in args.targets:
+        started = time.perf_counter()
+        result = resolve_rdeps(graph, target, args.transitive)
+        elapsed = time.perf_counter() - started
+
+        if result is None:
+            missing += 1
+            print(f"✗ Не найдено в графе: {target}", file=sys.stderr)
+            continue
+        results.append(result)
+
+        if not args.json:
+            kind = "транзитивно " if args.transitive else ""
+            print(f"\n{target}: {kind}зависят {len(result['dependents'])} бандлов ({elapsed * 1000:.2f} мс)")
+            if result["kind"] == "cab":
+                print(f"  Владелец: {result['owner'] or '(неизвестен)'}")
+            for dependent in result["dependents"]:
+                print(f"  {dependent}")
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    return 1 if missing else 0
+
+def command_plan(graph: BundleGraph, args) -> int:
+    """
+    Подкоманда plan: порядок загрузки и объем транзитивной загрузки для assets_paths.json.
+    """
+    try:
+        asset_paths = load_json(args.assets)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении {args.assets}: {e}", file=sys.stderr)
+        return 2
+
+    report = plan_bundles(graph, asset_paths, args.assets_root)
+    plans = report["plans"]
+
+    if report["cycles"]:
+        print(f"\n⚠ Найдено циклов зависимостей: {len(report['cycles'])}")
+        for members in report["cycles"]:
+            print(f"  {' -> '.join(members)}")
+
+    heaviest = sorted(plans, key=lambda plan: plan["payload_bytes"], reverse=True)[:args.top]
+    print(f"\nТоп-{len(heaviest)} бандлов по объему транзитивной загрузки:")
+    print("=" * 70)
+    for plan in heaviest:
+        print(f"{format_size(plan['payload_bytes']):>10} | {plan['bundles']:4} бандлов | {plan['key']}")
+        if args.show_order:
+            for member in plan["load_order"]:
+                print(f"{'':10} |   {member}")
+    print("=" * 70)
+
+    unknown = sum(1 for plan in plans if not plan["known"])
+    missing = {member for plan in plans for member in plan["missing_files"]}
+    virtual = {member for plan in plans for member in plan["virtual"]}
+    total = sum(plan["payload_bytes"] for plan in plans)
+    print(f"Записей: {len(plans)}, суммарно (с повторами): {format_size(total)}")
+    if unknown:
+        print(f"⚠ Бандлов нет в графе зависимостей: {unknown}")
+    if missing:
+        print(f"⚠ Файлов бандлов не найдено в {report['assets_root']}: {len(missing)}")
+    if virtual:
+        print(f"Узлов без файла бандла (shaders, cubemaps и т.п., не проверяются): {len(virtual)}")
+
+    if args.output:
+        try:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"✓ План сохранен в: {args.output}")
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении плана: {e}", file=sys.stderr)
+            return 2
+
+    return 0
+
+def command_metrics(graph: BundleGraph, args) -> int:
+    """
+    Подкоманда metrics: транзитивные fan-in/fan-out, циклы и CAB-хабы всего графа.
+    """
+    report = transitive_metrics(graph, args.top)
+    metadata = report["metadata"]
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"\nКомпонент сильной связности: {metadata['components']}, "
+              f"циклов: {metadata['cyclic_components']} (наибольший - {metadata['largest_component']} бандлов), "
+              f"посчитано за {metadata['seconds'] * 1000:.0f} мс")
+
+        print(f"\nТоп-{args.top} CAB по числу транзитивно зависящих бандлов:")
+        print("=" * 70)
+        for hub in report["hub_cabs"]:
+            print(f"{hub['transitive_dependents']:6} | {hub['direct_dependents']:6} напрямую | "
+                  f"{hub['cab']} ({hub['owner'] or 'владелец неизвестен'})")
+
+        print(f"\nТоп-{args.top} бандлов по транзитивному fan-in:")
+        print("=" * 70)
+        for item in report["top_fan_in"]:
+            print(f"{item['fan_in']:6} | {item['direct_in']:6} напрямую | {item['bundle']}")
+
+        print(f"\nТоп-{args.top} бандлов по транзитивному fan-out:")
+        print("=" * 70)
+        for item in report["top_fan_out"]:
+            print(f"{item['fan_out']:6} | {item['direct_out']:6} напрямую | {item['bundle']}")
+
+    if args.output:
+        try:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            if not args.json:
+                print(f"✓ Метрики сохранены в: {args.output}")
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении метрик: {e}", file=sys.stderr)
+            return 2
+
+    return 0
+
+def build_parser():
+    """
+    Создает парсер аргументов командной строки с подкомандами.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='deps',
+        description='Запросы к графу зависимостей бандлов'
+    )
+    parser.add_argument(
+        '-d', '--dependencies',
+        default='dependencies_analysis.json',
+        help='Файл анализа зависимостей (по умолчанию dependencies_analysis.json)'
+    )
+    parser.add_argument(
+        '-c', '--cab-files',
+        default='cab_files.json',
+        help='Соответствие CAB -> путь бандла (по умолчанию cab_files.json)'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rdeps_parser = subparsers.add_parser('rdeps', help='Какие бандлы зависят от CAB или бандла')
+    rdeps_parser.add_argument('targets', nargs='+', help='Имена cab-... или пути бандлов')
+    rdeps_parser.add_argument('-t', '--transitive', action='store_true', help='Учитывать транзитивные зависимости')
+    rdeps_parser.add_argument('--json', action='store_true', help='Вывод в формате JSON')
+    rdeps_parser.set_defaults(handler=command_rdeps)
+
+    plan_parser = subparsers.add_parser('plan', help='Порядок загрузки и объем транзитивной загрузки бандлов')
+    plan_parser.add_argument('-a', '--assets', default='assets_paths.json', help='Список путей бандлов')
+    plan_parser.add_argument('-r', '--assets-root', default='.', help='Каталог, относительно которого лежат файлы бандлов')
+    plan_parser.add_argument('-n', '--top', type=int, default=20, help='Сколько самых тяжелых записей вывести')
+    plan_parser.add_argument('--show-order', action='store_true', help='Выводить порядок загрузки')
+    plan_parser.add_argument('-o', '--output', default=None, help='Сохранить полный план в JSON файл')
+    plan_parser.set_defaults(handler=command_plan)
+
+    metrics_parser = subparsers.add_parser('metrics', help='Транзитивные fan-in/fan-out, циклы и CAB-хабы всего графа')
+    metrics_parser.add_argument('-n', '--top', type=int, default=20, help='Сколько записей в каждом топе')
+    metrics_parser.add_argument('--json', action='store_true', help='Вывод в формате JSON')
+    metrics_parser.add_argument('-o', '--output', default=None, help='Сохранить метрики всех бандлов в JSON файл')
+    metrics_parser.set_defaults(handler=command_metrics)
+
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Основная функция скрипта.
+    """
+    args = build_parser().parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        graph = load_graph(args.dependencies, args.cab_files)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении входных файлов: {e}", file=sys.stderr)
+        return 2
+    if not getattr(args, 'json', False):
+        print(f"Граф загружен за {(time.perf_counter() - started) * 1000:.0f} мс: "
+              f"{len(graph)} бандлов, {len(graph.cab_names)} CAB, {len(graph.targets)} связей")
+
+    return args.handler(graph, args)
+
+if __name__ == "__main__":
+    sys.exit(main())
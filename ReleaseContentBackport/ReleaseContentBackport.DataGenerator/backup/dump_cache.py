@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
+
+# Версия формата файла кэша. При изменении формата или логики разбора дампов
+# версию нужно увеличить, чтобы старый кэш был отброшен.
+CACHE_VERSION = 2
+
+def default_cache_path(output_file: str) -> str:
+    """
+    Возвращает путь к файлу кэша рядом с выходным JSON
+    (dependencies_analysis.json -> dependencies_analysis.cache.json).
+    """
+    output_path = Path(output_file)
+    return str(output_path.with_name(output_path.stem + ".cache.json"))
+
+def file_digest(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Вычисляет хэш содержимого файла (blake2b, 128 бит).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DumpCache:
+    """
+    Кэш результатов разбора дампов, сохраняемый между запусками.
+    Для каждого файла хранит размер, mtime, необязательный хэш содержимого
+    и результат разбора: {путь_относительно_папки: [size, mtime_ns, hash, result]}.
+    """
+
+    def __init__(self, cache_file: str, folder: str, use_hash: bool = False):
+        self.cache_file = cache_file
+        self.folder = os.path.abspath(folder)
+        self.use_hash = use_hash
+        self.entries: Dict[str, list] = {}
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.dirty = False
+
+    def load(self) -> bool:
+        """
+        Загружает кэш с диска. Возвращает False, если кэш отсутствует или непригоден.
+        """
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"⚠ Кэш {self.cache_file} не прочитан и будет пересоздан: {e}")
+            return False
+
+        if data.get("version") != CACHE_VERSION or data.get("folder") != self.folder:
+            print(f"⚠ Кэш {self.cache_file} создан для другой папки или версии и будет пересоздан")
+            self.dirty = True
+            return False
+
+        self.entries = data.get("files", {})
+        return True
+
+    def key(self, file_path: Path) -> str:
+        """
+        Ключ записи - путь файла относительно папки с прямыми слешами.
+        """
+        return os.path.relpath(file_path, self.folder).replace('\\', '/')
+
+    def lookup(self, file_path: Path, stat: os.stat_result) -> Optional[list]:
+        """
+        Возвращает закэшированный результат [asset_bundle_name, dependencies]
+        ([] для файла, который не удалось разобрать; {"members": [...]} для архива)
+        или None при промахе.
+        """
+        name = self.key(file_path)
+        self.seen.add(name)
+        entry = self.entries.get(name)
+
+        if entry is not None and entry[0] == stat.st_size:
+            if entry[1] == stat.st_mtime_ns:
+                self.hits += 1
+                return entry[3]
+
+            # Изменилось только время модификации - сверяем содержимое по хэшу
+            if self.use_hash and entry[2] is not None and file_digest(file_path) == entry[2]:
+                entry[1] = stat.st_mtime_ns
+                self.dirty = True
+                self.hits += 1
+                return entry[3]
+
+        self.misses += 1
+        return None
+
+    def store(self, file_path: Path, stat: os.stat_result, file_result: Union[Dict[str, Any], List, None]):
+        """
+        Сохраняет результат process_file для файла. Для архива дампов (список результатов)
+        сохраняется {"members": [[имя дампа, имя бандла, зависимости] или [] при ошибке]}.
+        """
+        digest = file_digest(file_path) if self.use_hash else None
+        if isinstance(file_result, list):
+            value = {"members": [
+                [member["file_name"], member.get("asset_bundle_name"), member.get("dependencies", [])] if member else []
+                for member in file_result
+            ]}
+        elif file_result is None:
+            value = []
+        else:
+            value = [file_result.get("asset_bundle_name"), file_result.get("dependencies", [])]
+        self.entries[self.key(file_path)] = [stat.st_size, stat.st_mtime_ns, digest, value]
+        self.dirty = True
+
+    def evict_missing(self):
+        """
+        Удаляет записи для файлов, которых больше нет в папке.
+        """
+        missing = [name for name in self.entries if name not in self.seen]
+        for name in missing:
+            del self.entries[name]
+        self.evicted = len(missing)
+        if missing:
+            self.dirty = True
+
+    def save(self) -> bool:
+        """
+        Атомарно сохраняет кэш на диск (временный файл + переименование).
+        """
+        if not self.dirty:
+            return True
+
+        temp_file = self.cache_file + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {"version": CACHE_VERSION, "folder": self.folder, "files": self.entries},
+                    f, ensure_ascii=False, separators=(',', ':')
+                )
+            os.replace(temp_file, self.cache_file)
+            self.dirty = False
+            return True
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении кэша: {e}")
+            return False
+
+    def print_report(self):
+        """
+        Выводит статистику использования кэша.
+        """
+        print(f"Кэш: попаданий {self.hits}, промахов {self.misses}, удалено записей {self.evicted}")
@@ -0,0 +1,114 @@
+import io
+import gzip
+import lzma
+import bz2
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import List, Optional, BinaryIO, Iterator, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Чтение сжатых дампов и архивов дампов без распаковки на диск:
+#   x.bundle.txt.gz / .xz / .bz2 / .zst  - один дамп, распаковывается потоково
+#   *.tar, *.tar.gz, *.tgz, *.tar.xz, *.tar.bz2, *.tar.zst, *.zip - архив дампов
+# Поддержка .zst требует пакета zstandard (pip install zstandard).
+
+COMPRESSION_SUFFIXES = ('.gz', '.xz', '.bz2', '.zst')
+ARCHIVE_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.xz', '.txz', '.tar.bz2', '.tar.zst', '.zip')
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+def compression_suffix(name: str) -> Optional[str]:
+    """
+    Суффикс сжатия отдельного дампа (.gz, .xz, .bz2, .zst) или None.
+    """
+    lower = name.lower()
+    for suffix in COMPRESSION_SUFFIXES:
+        if lower.endswith(suffix):
+            return suffix
+    return None
+
+def strip_compression(name: str) -> str:
+    """
+    Имя дампа без суффикса сжатия: x.bundle.txt.gz -> x.bundle.txt.
+    """
+    suffix = compression_suffix(name)
+    return name[:-len(suffix)] if suffix else name
+
+def _zstd_reader(raw: BinaryIO) -> BinaryIO:
+    if zstandard is None:
+        raise RuntimeError("для чтения .zst нужен пакет zstandard (pip install zstandard)")
+    # BufferedReader добавляет readline, которого нет у потока распаковки zstandard
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+
+def open_dump(file_path: Path) -> BinaryIO:
+    """
+    Открывает дамп на чтение в бинарном режиме; сжатые дампы распаковываются потоково.
+    """
+    suffix = compression_suffix(file_path.name)
+    if suffix == '.gz':
+        return gzip.open(file_path, 'rb')
+    if suffix == '.xz':
+        return lzma.open(file_path, 'rb')
+    if suffix == '.bz2':
+        return bz2.open(file_path, 'rb')
+    if suffix == '.zst':
+        return _zstd_reader(open(file_path, 'rb'))
+    return open(file_path, 'rb')
+
+def _iter_archive_members(file_path: Path, member_suffix: str) -> Iterator[Tuple[str, int, BinaryIO]]:
+    name = file_path.name.lower()
+    if name.endswith('.zip'):
+        with zipfile.ZipFile(file_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(member_suffix):
+                    with archive.open(info) as stream:
+                        yield info.filename, info.file_size, stream
+        return
+
+    # tarfile сам распознает gz/xz/bz2; zstd распаковывается отдельным потоком
+    source = _zstd_reader(open(file_path, 'rb')) if name.endswith('.tar.zst') else open(file_path, 'rb')
+    with source, tarfile.open(fileobj=source, mode='r|*') as tar:
+        for member in tar:
+            if member.isfile() and member.name.endswith(member_suffix):
+                yield member.name, member.size, tar.extractfile(member)
+
+def iter_archive(file_path: Path, file_extension: str = ".bundle.txt") -> Iterator[Tuple[str, int, BinaryIO]]:
+    """
+    Перебирает дампы в архиве в порядке хранения: (имя внутри архива, размер, поток).
+    Поток действителен только до перехода к следующему дампу. Tar читается
+    последовательно (режим потока), без произвольного доступа к файлу.
+    Дампы отбираются по file_extension; для .bundle.txt при отсутствии таких дампов
+    в архиве берутся *.txt - то же правило, что в discover_dump_files для папки
+    (для этого архив читается второй раз).
+    """
+    found = False
+    for member in _iter_archive_members(file_path, file_extension):
+        found = True
+        yield member
+    if not found and file_extension == ".bundle.txt":
+        yield from _iter_archive_members(file_path, ".txt")
+
+def discover_dump_files(folder: Path, file_extension: str) -> List[Path]:
+    """
+    Файлы дампов в папке: обычные, сжатые по отдельности и архивы, по имени.
+    Для .bundle.txt при отсутствии таких файлов ищутся *.txt (как и раньше).
+    Порядок не зависит от файловой системы, поэтому суффиксы дублирующихся ключей
+    одинаковы на всех машинах (и при слиянии шардов).
+    """
+    def with_compressed(extension: str) -> List[Path]:
+        files = list(folder.glob(f"*{extension}"))
+        for suffix in COMPRESSION_SUFFIXES:
+            files.extend(folder.glob(f"*{extension}{suffix}"))
+        return files
+
+    files = with_compressed(file_extension)
+    if not files and file_extension == ".bundle.txt":
+        files = with_compressed(".txt")
+    archives = [path for path in folder.iterdir() if is_archive(path.name)]
+    return sorted(files + archives, key=lambda path: path.name)
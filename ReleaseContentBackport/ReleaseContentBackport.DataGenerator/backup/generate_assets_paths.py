@@ -0,0 +1,162 @@
+import sys
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+from bundle_graph import load_graph, load_json
+from generate_bundles_json import generate_manifest, save_bundles_json, print_report
+
+# Генерация assets_paths.json и bundles.json из путей префабов в newItemDetails.json:
+# добавление предмета - одна правка данных мода, без ручного поиска путей бандлов.
+
+DEFAULT_ITEM_DETAILS = Path(__file__).resolve().parents[2] / "ReleaseContentBackport" / "data" / "newItemDetails.json"
+PREFAB_FIELDS = ("Prefab", "UsePrefab")
+
+def collect_prefab_paths(item_details: List[Dict[str, Any]]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Индексирует пути префабов (Prefab.path, UsePrefab.path) всех предметов.
+    Возвращает пути бандлов без повторов в порядке предметов и отчет о проблемах:
+    предметы без Prefab.path, пути не к бандлам и пути, общие для нескольких предметов.
+    """
+    paths: Dict[str, List[str]] = {}
+    report = {
+        "items_total": len(item_details),
+        "missing_prefab": [],
+        "empty_prefab": [],
+        "not_bundle": [],
+        "shared_paths": {}
+    }
+
+    for entry in item_details:
+        item = entry.get("newItem") or {}
+        item_id = item.get("_id", "?")
+        item_name = item.get("_name", "")
+        props = item.get("_props") or {}
+
+        for field in PREFAB_FIELDS:
+            prefab = props.get(field)
+            if not isinstance(prefab, dict) or "path" not in prefab:
+                if field == "Prefab":
+                    report["missing_prefab"].append({"id": item_id, "name": item_name})
+                continue
+
+            path = (prefab.get("path") or "").strip()
+            if not path:
+                # Пустой UsePrefab - обычное дело, пустой Prefab - ошибка данных
+                if field == "Prefab":
+                    report["empty_prefab"].append({"id": item_id, "name": item_name})
+                continue
+            if not path.endswith(".bundle"):
+                report["not_bundle"].append({"id": item_id, "name": item_name, "field": field, "path": path})
+                continue
+
+            paths.setdefault(path, []).append(item_id)
+
+    report["shared_paths"] = {path: ids for path, ids in paths.items() if len(set(ids)) > 1}
+    return list(paths), report
+
+def save_assets_paths(paths: List[str], output_file: str = "assets_paths.json") -> bool:
+    """
+    Сохраняет список путей в формате assets_paths.json (UTF-8 с BOM, отступ 4 пробела, как у ConvertTo-Json).
+    """
+    try:
+        with open(output_file, 'w', encoding='utf-8-sig', newline='\n') as f:
+            json.dump(paths, f, indent=4, ensure_ascii=False)
+        print(f"✓ Список путей сохранен в: {output_file} ({len(paths)} бандлов)")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка при сохранении {output_file}: {e}")
+        return False
+
+def print_prefab_report(report: Dict[str, Any]) -> int:
+    """
+    Выводит проблемы путей префабов. Возвращает количество ошибок.
+    """
+    errors = len(report["missing_prefab"]) + len(report["empty_prefab"]) + len(report["not_bundle"])
+    for item in report["missing_prefab"]:
+        print(f"✗ Нет поля Prefab.path: {item['id']} ({item['name']})")
+    for item in report["empty_prefab"]:
+        print(f"✗ Пустой Prefab.path: {item['id']} ({item['name']})")
+    for item in report["not_bundle"]:
+        print(f"✗ {item['field']}.path не указывает на бандл: {item['id']} ({item['name']}): {item['path']}")
+    for path, ids in report["shared_paths"].items():
+        print(f"⚠ Один бандл у нескольких предметов: {path}: {', '.join(ids)}")
+    return errors
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Генерация assets_paths.json и bundles.json из путей префабов newItemDetails.json'
+    )
+    parser.add_argument('-i', '--item-details', default=str(DEFAULT_ITEM_DETAILS),
+                        help='Файл newItemDetails.json (по умолчанию из data мода)')
+    parser.add_argument('-d', '--dependencies', default='dependencies_analysis.json',
+                        help='Файл анализа зависимостей (по умолчанию dependencies_analysis.json)')
+    parser.add_argument('-c', '--cab-files', default='cab_files.json',
+                        help='Соответствие CAB -> путь бандла (по умолчанию cab_files.json)')
+    parser.add_argument('-a', '--assets-output', default='assets_paths.json',
+                        help='Выходной список путей бандлов (по умолчанию assets_paths.json)')
+    parser.add_argument('-o', '--output', default='bundles.json', help='Выходной bundles.json (по умолчанию bundles.json)')
+    parser.add_argument('-r', '--report', default=None, help='Сохранить отчет о проблемах в JSON файл')
+    parser.add_argument('--check', action='store_true',
+                        help='Только сравнить с существующим assets_paths.json, ничего не записывая (код 1 при расхождении)')
+
+    args = parser.parse_args()
+
+    try:
+        item_details = load_json(args.item_details)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении {args.item_details}: {e}")
+        return 2
+
+    paths, report = collect_prefab_paths(item_details)
+    print(f"Предметов в {args.item_details}: {report['items_total']}, бандлов префабов: {len(paths)}")
+    errors = print_prefab_report(report)
+
+    if args.check:
+        try:
+            existing = load_json(args.assets_output)
+        except (OSError, ValueError) as e:
+            print(f"✗ Ошибка при чтении {args.assets_output}: {e}")
+            return 2
+        existing_set, derived_set = set(existing), set(paths)
+        missing = [path for path in paths if path not in existing_set]
+        extra = [path for path in existing if path not in derived_set]
+        for path in missing:
+            print(f"  + {path}")
+        for path in extra:
+            print(f"  - {path}")
+        if missing or extra:
+            print(f"✗ {args.assets_output} расходится с префабами: не хватает {len(missing)}, лишних {len(extra)}")
+            return 1
+        print(f"✓ {args.assets_output} совпадает с путями префабов")
+        return 1 if errors else 0
+
+    try:
+        graph = load_graph(args.dependencies, args.cab_files)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении входных файлов: {e}")
+        return 2
+
+    manifest, manifest_report = generate_manifest(graph, paths)
+    print_report(manifest_report)
+    report.update(manifest_report)
+
+    saved = save_assets_paths(paths, args.assets_output) and save_bundles_json(manifest, args.output)
+
+    if args.report:
+        try:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"✓ Отчет сохранен в: {args.report}")
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении отчета: {e}")
+
+    return 1 if errors or not saved else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,108 +1,305 @@
 import os
 import re
+import sys
 import json
+import time
+import heapq
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, BinaryIO, Tuple, Iterable, Union, Callable
+from array import array
+from collections import Counter
+from itertools import chain, islice
+from functools import partial
 import datetime
+from concurrent.futures import ProcessPoolExecutor
+from dump_cache import DumpCache, default_cache_path
+from binary_index import export_index
+from unityfs_reader import read_bundle_file
+from instrumentation import Metrics, ProgressBar, run_profiled
+from ndjson_output import NdjsonWriter, iter_ndjson, write_analysis_json
+from dump_sources import open_dump, iter_archive, is_archive, strip_compression, discover_dump_files
+from sharding import ShardWriter, KIND_DEPENDENCIES, parse_shard, in_shard, default_shard_output
 
-def extract_asset_bundle_name(content: str) -> Optional[str]:
+# Максимальная длина читаемого фрагмента строки. Более длинные строки (например,
+# шестнадцатеричные дампы массивов) читаются частями, поэтому память ограничена.
+MAX_LINE_CHUNK = 64 * 1024
+
+ASSET_BUNDLE_NAME_RE = re.compile(rb'string m_AssetBundleName = "([^"]+)"')
+ASSET_BUNDLE_NAME_ALT_RE = re.compile(rb'm_AssetBundleName\s*=\s*"([^"]+)"')
+DEPENDENCY_DATA_RE = re.compile(rb'string data = "([^"]+)"')
+DEPENDENCY_CAB_RE = re.compile(rb'cab-[a-f0-9]+')
+
+def _line_indent(line: bytes) -> int:
     """
-    Извлекает значение m_AssetBundleName из содержимого файла.
+    Возвращает количество ведущих пробельных символов строки дампа.
     """
-    try:
-        # Ищем строку вида: string m_AssetBundleName = "значение"
-        pattern = r'string m_AssetBundleName = "([^"]+)"'
-        match = re.search(pattern, content)
+    return len(line) - len(line.lstrip(b' \t'))
+
+def scan_dump_stream(stream: BinaryIO) -> Tuple[Optional[str], List[str]]:
+    """
+    Однопроходное потоковое извлечение m_AssetBundleName и m_Dependencies из дампа.
+    Читает поток построчно (в бинарном режиме) и останавливается, как только найдено
+    имя бандла и закончился вектор m_Dependencies.
+    Зависимости - строки "string data = "cab-..."" только внутри вектора m_Dependencies
+    (до первой строки с отступом не больше, чем у "vector m_Dependencies"), а если таких
+    нет - любые вхождения cab-<hex> в этом же диапазоне. Ссылки на cab- после конца
+    вектора (в других объектах дампа) намеренно не учитываются. Если строка vector
+    не имеет отступа, конец вектора не определить, и поиск идет до конца файла.
+    Возвращает (asset_bundle_name, dependencies). Значения декодируются как UTF-8,
+    при некорректной кодировке выбрасывается UnicodeDecodeError.
+    """
+    name = None
+    name_alt = None
+    # Состояние секции m_Dependencies: None - еще не найдена, иначе отступ строки vector
+    deps_indent = None
+    deps_done = False
+    data_cabs = []
+    raw_cabs = []
+    line_start = True
+    
+    while True:
+        chunk = stream.readline(MAX_LINE_CHUNK)
+        if not chunk:
+            break
         
-        if match:
-            return match.group(1)
+        is_line_start = line_start
+        line_start = chunk.endswith(b'\n')
         
-        # Альтернативный вариант поиска
-        pattern_alt = r'm_AssetBundleName\s*=\s*"([^"]+)"'
-        match_alt = re.search(pattern_alt, content)
+        if deps_indent is not None and not deps_done:
+            # Вектор заканчивается на первой непустой строке с отступом не больше,
+            # чем у строки "vector m_Dependencies" (продолжения длинных строк не считаются)
+            if is_line_start and deps_indent > 0 and chunk.strip() and _line_indent(chunk) <= deps_indent:
+                deps_done = True
+            else:
+                if b'data' in chunk:
+                    data_cabs.extend(m for m in DEPENDENCY_DATA_RE.findall(chunk) if m.startswith(b'cab-'))
+                if b'cab-' in chunk:
+                    raw_cabs.extend(DEPENDENCY_CAB_RE.findall(chunk))
         
-        if match_alt:
-            return match_alt.group(1)
-            
-    except Exception as e:
-        print(f"Ошибка при извлечении m_AssetBundleName: {e}")
+        if name is None and b'm_AssetBundleName' in chunk:
+            match = ASSET_BUNDLE_NAME_RE.search(chunk)
+            if match:
+                name = match.group(1)
+            elif name_alt is None:
+                match_alt = ASSET_BUNDLE_NAME_ALT_RE.search(chunk)
+                if match_alt:
+                    name_alt = match_alt.group(1)
+        
+        if deps_indent is None:
+            position = chunk.find(b'vector m_Dependencies')
+            if position != -1:
+                deps_indent = _line_indent(chunk) if is_line_start else 0
+                tail = chunk[position:]
+                data_cabs.extend(m for m in DEPENDENCY_DATA_RE.findall(tail) if m.startswith(b'cab-'))
+                raw_cabs.extend(DEPENDENCY_CAB_RE.findall(tail))
+        
+        if name is not None and deps_done:
+            break
     
-    return None
+    if name is None:
+        name = name_alt
+    dependencies = data_cabs if data_cabs else raw_cabs
+    
+    return (
+        name.decode('utf-8') if name is not None else None,
+        [dep.decode('utf-8') for dep in dependencies]
+    )
 
-def extract_dependencies_from_content(content: str) -> List[str]:
+def fallback_bundle_name(file_path: Path) -> str:
     """
-    Извлекает список зависимостей из содержимого файла.
-    Ищет секцию m_Dependencies и возвращает все cab-строки.
+    Имя бандла по имени файла (без .txt и .bundle), если m_AssetBundleName не найдено.
+    """
+    file_stem = file_path.stem
+    if file_stem.endswith('.bundle'):
+        file_stem = file_stem[:-7]  # Удаляем .bundle
+    print(f"⚠ Для файла {file_path.name} не найдено m_AssetBundleName, используется имя файла: {file_stem}")
+    return file_stem
+
+def process_bundle_file(file_path: Path) -> Dict[str, Any]:
+    """
+    Обрабатывает файл .bundle напрямую (формат UnityFS), без текстового дампа.
     """
-    dependencies = []
-    
     try:
-        # Находим секцию m_Dependencies
-        deps_start = content.find('vector m_Dependencies')
-        if deps_start == -1:
-            return dependencies
-        
-        # Ищем все строки с cab- зависимостями
-        # Ищем строки вида: string data = "cab-..."
-        cab_pattern = r'string data = "([^"]+)"'
-        cab_matches = re.findall(cab_pattern, content[deps_start:])
-        
-        for cab in cab_matches:
-            if cab.startswith('cab-'):
-                dependencies.append(cab)
-        
-        # Альтернативный метод: ищем строки с cab- напрямую
-        if not dependencies:
-            cab_pattern = r'cab-[a-f0-9]+'
-            dependencies = re.findall(cab_pattern, content[deps_start:])
-            
+        bundle = read_bundle_file(file_path)
     except Exception as e:
-        print(f"Ошибка при извлечении зависимостей из содержимого: {e}")
+        print(f"✗ Ошибка чтения бандла {file_path.name}: {e}")
+        return None
     
-    return dependencies
+    return {
+        "dependencies": bundle["dependencies"],
+        "file_name": file_path.name,
+        "asset_bundle_name": bundle["asset_bundle_name"] or fallback_bundle_name(file_path)
+    }
 
-def process_file(file_path: Path) -> Dict[str, Any]:
+def process_file(file_path: Path, file_extension: str = ".bundle.txt") -> Union[Dict[str, Any], List[Optional[Dict[str, Any]]], None]:
     """
     Обрабатывает один файл и возвращает информацию о зависимостях.
+    Файлы .bundle читаются напрямую, архивы дампов - через process_archive
+    (результат - список по дампам архива с расширением file_extension), остальные - как текстовые дампы.
+    В parse_seconds записывается время чтения и разбора файла.
+    """
+    if is_archive(file_path.name):
+        return process_archive(file_path, file_extension)
+    started = time.perf_counter()
+    if file_path.suffix == '.bundle':
+        result = process_bundle_file(file_path)
+    else:
+        result = process_dump_file(file_path)
+    if result is not None:
+        result["parse_seconds"] = time.perf_counter() - started
+    return result
+
+def process_dump_stream(stream: BinaryIO, file_name: str) -> Dict[str, Any]:
+    """
+    Разбирает текстовый дамп из открытого бинарного потока.
+    file_name - имя дампа (без суффикса сжатия) для запасного имени бандла.
     """
-    result = {
-        "dependencies": [],
-        "file_name": file_path.name
+    # Читаем поток один раз и только до конца нужных секций
+    asset_bundle_name, dependencies = scan_dump_stream(stream)
+    
+    return {
+        "dependencies": dependencies,
+        "file_name": file_name,
+        # Если не нашли m_AssetBundleName, используем имя файла без расширения как запасной вариант
+        "asset_bundle_name": asset_bundle_name or fallback_bundle_name(Path(file_name))
     }
-    
+
+def process_dump_file(file_path: Path) -> Dict[str, Any]:
+    """
+    Обрабатывает текстовый дамп AssetBundle (сжатые дампы распаковываются потоково).
+    """
     try:
-        # Читаем файл
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        # Извлекаем имя бандла
-        asset_bundle_name = extract_asset_bundle_name(content)
-        if asset_bundle_name:
-            result["asset_bundle_name"] = asset_bundle_name
-        else:
-            # Если не нашли m_AssetBundleName, используем имя файла без расширения как запасной вариант
-            file_stem = file_path.stem
-            if file_stem.endswith('.bundle'):
-                file_stem = file_stem[:-7]  # Удаляем .bundle
-            result["asset_bundle_name"] = file_stem
-            print(f"⚠ Для файла {file_path.name} не найдено m_AssetBundleName, используется имя файла: {file_stem}")
-        
-        # Извлекаем зависимости
-        dependencies = extract_dependencies_from_content(content)
-        result["dependencies"] = dependencies
-        
+        with open_dump(file_path) as file:
+            return process_dump_stream(file, strip_compression(file_path.name))
     except UnicodeDecodeError:
         print(f"✗ Ошибка кодировки: {file_path.name}")
         return None
     except Exception as e:
         print(f"✗ Ошибка обработки {file_path.name}: {e}")
         return None
+
+def process_archive(file_path: Path, file_extension: str = ".bundle.txt") -> List[Optional[Dict[str, Any]]]:
+    """
+    Обрабатывает все дампы архива (.tar, .tar.gz, .zip, ...) за один последовательный
+    проход без распаковки на диск. Возвращает результаты в порядке хранения в архиве;
+    None - дамп (или остаток архива), который не удалось прочитать.
+    """
+    results = []
+    member_name = None
+    try:
+        for member_name, size, stream in iter_archive(file_path, file_extension):
+            started = time.perf_counter()
+            display_name = f"{file_path.name}/{member_name}"
+            try:
+                result = process_dump_stream(stream, Path(member_name).name)
+            except UnicodeDecodeError:
+                print(f"✗ Ошибка кодировки: {display_name}")
+                results.append(None)
+                continue
+            result["file_name"] = display_name
+            result["size"] = size
+            result["parse_seconds"] = time.perf_counter() - started
+            results.append(result)
+    except Exception as e:
+        position = f" после {member_name}" if member_name else ""
+        print(f"✗ Ошибка чтения архива {file_path.name}{position}: {e}")
+        results.append(None)
+    return results
+
+def default_jobs() -> int:
+    """
+    Возвращает количество рабочих процессов по умолчанию (число ядер CPU).
+    """
+    jobs = os.cpu_count() or 1
+    # ProcessPoolExecutor в Windows не поддерживает больше 61 процесса
+    if os.name == 'nt':
+        jobs = min(jobs, 61)
+    return jobs
+
+def iter_file_results(files: List[Path], jobs: int = 1, file_extension: str = ".bundle.txt"):
+    """
+    Возвращает результаты process_file в том же порядке, что и список файлов.
+    При jobs > 1 файлы распределяются по пулу процессов.
+    """
+    if jobs <= 1 or len(files) <= 1:
+        for file_path in files:
+            yield process_file(file_path, file_extension)
+        return
     
-    return result
+    # Крупные пачки уменьшают накладные расходы на передачу данных между процессами,
+    # но слишком крупные ухудшают балансировку нагрузки
+    chunksize = max(1, len(files) // (jobs * 16))
+    with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as executor:
+        # executor.map сохраняет порядок входных данных, поэтому слияние
+        # результатов (и суффиксы дубликатов) не зависит от распределения по процессам
+        yield from executor.map(partial(process_file, file_extension=file_extension), files, chunksize=chunksize)
+
+def cached_file_result(file_path: Path, entry: Union[Dict[str, Any], List]):
+    """
+    Восстанавливает результат process_file из записи кэша.
+    """
+    if isinstance(entry, dict):
+        # Архив: [имя дампа, имя бандла, зависимости] по каждому дампу, [] - ошибка
+        return [
+            {"file_name": member[0], "asset_bundle_name": member[1], "dependencies": member[2]} if member else None
+            for member in entry["members"]
+        ]
+    if entry:
+        return {"asset_bundle_name": entry[0], "dependencies": entry[1], "file_name": file_path.name}
+    return None
+
+def iter_cached_file_results(files: List[Path], jobs: int, cache: DumpCache, file_extension: str = ".bundle.txt"):
+    """
+    Как iter_file_results, но берет результаты неизмененных файлов из кэша,
+    разбирает только новые и измененные файлы и обновляет кэш.
+    Результаты выдаются по одному в порядке файлов, не накапливаясь в памяти.
+    """
+    # Все файлы проверяются до разбора: evict_missing учитывает только просмотренные
+    lookups = []
+    for file_path in files:
+        stat = file_path.stat()
+        lookups.append((file_path, stat, cache.lookup(file_path, stat)))
+    cache.evict_missing()
+    
+    parsed = iter_file_results([file_path for file_path, _, entry in lookups if entry is None], jobs, file_extension)
+    for file_path, stat, entry in lookups:
+        if entry is None:
+            file_result = next(parsed)
+            cache.store(file_path, stat, file_result)
+            yield file_result
+        else:
+            yield cached_file_result(file_path, entry)
+
+def unique_bundle_key(asset_bundle_key: str, seen_keys: set) -> str:
+    """
+    Возвращает ключ без повторов: к уже встречавшемуся ключу добавляется суффикс _1, _2, ...
+    Итоговый ключ добавляется в seen_keys.
+    """
+    if asset_bundle_key in seen_keys:
+        counter = 1
+        while f"{asset_bundle_key}_{counter}" in seen_keys:
+            counter += 1
+        asset_bundle_key = f"{asset_bundle_key}_{counter}"
+    seen_keys.add(asset_bundle_key)
+    return asset_bundle_key
 
-def process_folder(folder_path: str, file_extension: str = ".bundle.txt") -> Dict[str, Any]:
+def process_folder(folder_path: str, file_extension: str = ".bundle.txt", jobs: Optional[int] = None,
+                   cache: Optional[DumpCache] = None, metrics: Optional[Metrics] = None,
+                   log_files: bool = True, progress: bool = False,
+                   sink: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                   shard: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
     """
     Обрабатывает все файлы с указанным расширением в папке.
+    jobs - количество рабочих процессов (по умолчанию число ядер CPU, 1 - последовательная обработка).
+    cache - кэш результатов разбора; повторно разбираются только новые и измененные файлы.
+    metrics - накопитель замеров по стадиям (discover, read_parse, merge) и по файлам.
+    log_files - выводить строки по каждому файлу (предупреждения и ошибки выводятся всегда).
+    progress - показывать прогресс-бар в stderr.
+    sink - если задан, каждая запись сразу передается в sink(ключ, значение) и не накапливается
+    в памяти (возвращается пустой словарь); в памяти остаются только ключи для поиска дубликатов.
+    shard - (i, N): обрабатывать только файлы своего шарда (по хэшу относительного пути).
+    Ключи шарду не уникализируются (это делает слияние шардов), а в значение, передаваемое
+    в sink, добавляется "order" - позиция записи в общем порядке файлов.
     """
     folder = Path(folder_path)
     if not folder.exists():
@@ -113,69 +310,121 @@ def process_folder(folder_path: str, file_extension: str = ".bundle.txt") -> Dic
         print(f"{folder_path} не является папкой!")
         return {}
     
+    if jobs is None:
+        jobs = default_jobs()
+    
+    discover_started = time.perf_counter()
     # Получаем список файлов
-    if file_extension == ".bundle.txt":
-        # Ищем файлы с двойным расширением .bundle.txt
-        files = list(folder.glob("*.bundle.txt"))
-        # Также ищем файлы с простым .txt расширением, если не найдены .bundle.txt
-        if not files:
-            files = list(folder.glob("*.txt"))
+    if file_extension == ".bundle":
+        # Сами бандлы лежат в дереве каталогов (assets/content/...) - ищем рекурсивно
+        files = sorted(folder.rglob("*.bundle"), key=lambda path: path.relative_to(folder).parts)
     else:
-        files = list(folder.glob(f"*{file_extension}"))
+        # Дампы *.bundle.txt (или *.txt, если таких нет), сжатые дампы (.gz, .xz, .bz2, .zst)
+        # и архивы дампов (.tar*, .zip)
+        files = discover_dump_files(folder, file_extension)
     
     if not files:
         print(f"Файлы с расширением {file_extension} не найдены в папке {folder_path}")
         return {}
     
     print(f"\nНайдено файлов: {len(files)}")
+    if jobs > 1:
+        print(f"Рабочих процессов: {jobs}")
     print("=" * 60)
     
+    files = [file_path for file_path in files if file_path.is_file()]
+    if shard is not None:
+        total = len(files)
+        files = [file_path for file_path in files if in_shard(file_path.relative_to(folder).as_posix(), shard)]
+        print(f"Шард {shard[0]}/{shard[1]}: файлов {len(files)} из {total}")
+    if metrics is not None:
+        metrics.add_stage("discover", time.perf_counter() - discover_started)
+        metrics.count("files", len(files))
+    
+    read_started = time.perf_counter()
+    if cache is None:
+        file_results = iter_file_results(files, jobs, file_extension)
+    else:
+        file_results = iter_cached_file_results(files, jobs, cache, file_extension)
+    
     results = {}
+    seen_keys = set()
     successful = 0
     failed = 0
     missing_asset_names = 0
-    
-    # Обрабатываем каждый файл
-    for file_path in files:
-        if file_path.is_file():
-            print(f"Обработка: {file_path.name}")
+    merge_seconds = 0.0
+    progress_bar = ProgressBar(len(files), "Обработка", enabled=progress)
+    
+    def iter_entries():
+        # Архив дает список результатов по своим дампам - разворачиваем его на месте архива
+        for file_path, file_result in zip(files, file_results):
+            if isinstance(file_result, list):
+                for member_index, member_result in enumerate(file_result):
+                    name = member_result["file_name"] if member_result is not None else f"{file_path.name}: архив"
+                    yield file_path, member_index, name, member_result
+            else:
+                yield file_path, 0, file_path.name, file_result
+            progress_bar.update()
+    
+    # Обрабатываем каждый файл (слияние всегда идет в исходном порядке файлов)
+    for file_path, member_index, file_name, file_result in iter_entries():
+        merge_started = time.perf_counter()
+        if log_files:
+            print(f"Обработка: {file_name}")
+        
+        if file_result is not None:
+            if metrics is not None:
+                size = file_result["size"] if "size" in file_result else file_path.stat().st_size
+                metrics.record_file(file_name, file_result.get("parse_seconds"), size)
+            
+            # Используем asset_bundle_name в качестве ключа
+            asset_bundle_key = file_result.get("asset_bundle_name")
             
-            file_result = process_file(file_path)
+            if not asset_bundle_key:
+                # Если вдруг asset_bundle_name отсутствует, используем имя файла
+                asset_bundle_key = Path(file_name).stem
+                missing_asset_names += 1
             
-            if file_result is not None:
-                # Используем asset_bundle_name в качестве ключа
-                asset_bundle_key = file_result.get("asset_bundle_name")
-                
-                if not asset_bundle_key:
-                    # Если вдруг asset_bundle_name отсутствует, используем имя файла
-                    asset_bundle_key = file_path.stem
-                    missing_asset_names += 1
-                
+            # Сохраняем результат с ключом asset_bundle_name
+            # Удаляем asset_bundle_name из значения, так как оно уже является ключом
+            result_value = {
+                "dependencies": file_result.get("dependencies", [])
+            }
+            
+            if shard is None:
                 # Проверяем на дубликаты ключей
-                if asset_bundle_key in results:
+                if asset_bundle_key in seen_keys:
                     print(f"⚠ Внимание: дублирующийся ключ {asset_bundle_key}")
-                    # Добавляем суффикс для уникальности
-                    counter = 1
-                    while f"{asset_bundle_key}_{counter}" in results:
-                        counter += 1
-                    asset_bundle_key = f"{asset_bundle_key}_{counter}"
-                
-                # Сохраняем результат с ключом asset_bundle_name
-                # Удаляем asset_bundle_name из значения, так как оно уже является ключом
-                result_value = {
-                    "dependencies": file_result.get("dependencies", [])
-                }
+                # Добавляем суффикс для уникальности
+                asset_bundle_key = unique_bundle_key(asset_bundle_key, seen_keys)
+            else:
+                result_value["order"] = [list(file_path.relative_to(folder).parts), member_index]
+            if sink is None:
                 results[asset_bundle_key] = result_value
-                successful += 1
-                
+            else:
+                sink(asset_bundle_key, result_value)
+            successful += 1
+            
+            if log_files:
                 deps_count = len(result_value.get("dependencies", []))
                 if deps_count > 0:
                     print(f"✓ {asset_bundle_key}: найдено {deps_count} зависимостей")
                 else:
                     print(f"✓ {asset_bundle_key}: зависимости не найдены")
-            else:
-                failed += 1
-                print(f"✗ {file_path.name}: ошибка обработки")
+        else:
+            failed += 1
+            print(f"✗ {file_name}: ошибка обработки")
+        
+        merge_seconds += time.perf_counter() - merge_started
+    
+    progress_bar.close()
+    if metrics is not None:
+        # Чтение и разбор идут в пуле процессов параллельно со слиянием:
+        # read_parse - время ожидания результатов, merge - собственное время слияния
+        metrics.add_stage("read_parse", time.perf_counter() - read_started - merge_seconds)
+        metrics.add_stage("merge", merge_seconds)
+        metrics.count("successful", successful)
+        metrics.count("failed", failed)
     
     print("\n" + "=" * 60)
     print("РЕЗУЛЬТАТЫ ОБРАБОТКИ:")
@@ -184,12 +433,29 @@ def process_folder(folder_path: str, file_extension: str = ".bundle.txt") -> Dic
     print(f"С ошибками: {failed}")
     if missing_asset_names > 0:
         print(f"Файлов без m_AssetBundleName: {missing_asset_names}")
+    if cache is not None:
+        cache.print_report()
     
     return results
 
-def save_results_to_json(results: Dict[str, Any], output_file: str = "dependencies_analysis.json"):
+def analysis_metadata(total_files: int, total_dependencies: int, files_with_dependencies: int) -> Dict[str, Any]:
+    """
+    Раздел metadata файла dependencies_analysis.json.
+    """
+    return {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "total_files": total_files,
+        "total_dependencies": total_dependencies,
+        "files_with_dependencies": files_with_dependencies,
+        "files_without_dependencies": total_files - files_with_dependencies,
+        "key_source": "m_AssetBundleName field (fallback: filename)"
+    }
+
+def save_results_to_json(results: Dict[str, Any], output_file: str = "dependencies_analysis.json",
+                         binary_output: Optional[str] = None):
     """
     Сохраняет результаты анализа в JSON файл.
+    binary_output - путь для дополнительного компактного бинарного индекса (см. binary_index.py).
     """
     if not results:
         print("Нет данных для сохранения")
@@ -203,14 +469,7 @@ def save_results_to_json(results: Dict[str, Any], output_file: str = "dependenci
         
         # Добавляем метаданные в JSON
         enhanced_results = {
-            "metadata": {
-                "generated_at": datetime.datetime.now().isoformat(),
-                "total_files": len(results),
-                "total_dependencies": total_dependencies,
-                "files_with_dependencies": files_with_dependencies,
-                "files_without_dependencies": files_without_dependencies,
-                "key_source": "m_AssetBundleName field (fallback: filename)"
-            },
+            "metadata": analysis_metadata(len(results), total_dependencies, files_with_dependencies),
             "dependencies": results
         }
         
@@ -224,18 +483,57 @@ def save_results_to_json(results: Dict[str, Any], output_file: str = "dependenci
         print(f"  Всего зависимостей: {total_dependencies}")
         print(f"  Ключи JSON: значения m_AssetBundleName из файлов")
         
+        if binary_output:
+            export_index(binary_output, dependencies=results)
+        
         return True
     except Exception as e:
         print(f"✗ Ошибка при сохранении JSON: {e}")
         return False
 
-def print_sample_json(results: Dict[str, Any], sample_size: int = 3):
+def iter_ndjson_entries(ndjson_file: str) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    """
+    Записи (ключ, значение) из NDJSON без строки metadata.
+    """
+    return ((key, value) for key, value in iter_ndjson(ndjson_file) if key is not None)
+
+def save_ndjson_results_to_json(ndjson_file: str, metadata: Dict[str, Any],
+                                output_file: str = "dependencies_analysis.json",
+                                binary_output: Optional[str] = None) -> bool:
+    """
+    Собирает dependencies_analysis.json из NDJSON потоковой записью (результат совпадает
+    с save_results_to_json). Для бинарного индекса записи загружаются в память.
+    """
+    try:
+        write_analysis_json(iter_ndjson_entries(ndjson_file), metadata, output_file)
+        
+        print(f"\n✓ Результаты сохранены в: {output_file}")
+        print(f"  Всего файлов: {metadata['total_files']}")
+        print(f"  Файлов с зависимостями: {metadata['files_with_dependencies']}")
+        print(f"  Файлов без зависимостей: {metadata['files_without_dependencies']}")
+        print(f"  Всего зависимостей: {metadata['total_dependencies']}")
+        print(f"  Ключи JSON: значения m_AssetBundleName из файлов")
+        
+        if binary_output:
+            export_index(binary_output, dependencies=dict(iter_ndjson_entries(ndjson_file)))
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка при сохранении JSON: {e}")
+        return False
+
+def print_sample_json(results: Dict[str, Any], sample_size: int = 3, metadata: Optional[Dict[str, Any]] = None):
     """
     Выводит пример структуры JSON.
+    metadata - итоги полного результата, если results содержит только часть записей.
     """
     if not results:
         return
     
+    total_files = metadata["total_files"] if metadata else len(results)
+    total_dependencies = (metadata["total_dependencies"] if metadata
+                          else sum(len(v["dependencies"]) for v in results.values()))
+    
     print("\n" + "=" * 60)
     print("ПРИМЕР СТРУКТУРЫ JSON:")
     print("=" * 60)
@@ -245,8 +543,8 @@ def print_sample_json(results: Dict[str, Any], sample_size: int = 3):
     sample_output = {
         "metadata": {
             "generated_at": datetime.datetime.now().isoformat(),
-            "total_files": len(results),
-            "total_dependencies": sum(len(v["dependencies"]) for v in results.values()),
+            "total_files": total_files,
+            "total_dependencies": total_dependencies,
             "key_source": "m_AssetBundleName field (fallback: filename)"
         },
         "dependencies": dict(sample_items)
@@ -254,42 +552,100 @@ def print_sample_json(results: Dict[str, Any], sample_size: int = 3):
     
     print(json.dumps(sample_output, indent=2, ensure_ascii=False))
     
-    if len(results) > sample_size:
-        print(f"\n... и еще {len(results) - sample_size} файлов")
+    if total_files > sample_size:
+        print(f"\n... и еще {total_files - sample_size} файлов")
 
-def generate_statistics(results: Dict[str, Any]) -> Dict[str, Any]:
+class BundleRecord:
+    """
+    Запись бандла в компактном графе: ключ и номера CAB зависимостей.
+    """
+    __slots__ = ("key", "deps")
+
+    def __init__(self, key: str, deps: array):
+        self.key = key
+        self.deps = deps
+
+class CompactDependencyGraph:
+    """
+    Компактное представление результатов анализа для статистики.
+    Имена CAB интернированы и пронумерованы, зависимости бандла хранятся
+    в array('I'), поэтому одинаковые строки не дублируются ни внутри
+    одного анализа, ни между несколькими анализами в одном процессе.
+    """
+    __slots__ = ("cab_names", "cab_ids", "records")
+
+    def __init__(self):
+        self.cab_names: List[str] = []
+        self.cab_ids: Dict[str, int] = {}
+        self.records: List[BundleRecord] = []
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, key: str, dependencies: Iterable[str]):
+        """
+        Добавляет бандл и его зависимости.
+        """
+        cab_ids = self.cab_ids
+        deps = array('I')
+        for cab in dependencies:
+            cab_id = cab_ids.get(cab)
+            if cab_id is None:
+                cab_id = len(self.cab_names)
+                cab = sys.intern(cab)
+                self.cab_names.append(cab)
+                cab_ids[cab] = cab_id
+            deps.append(cab_id)
+        self.records.append(BundleRecord(sys.intern(key), deps))
+
+    @classmethod
+    def from_results(cls, results: Dict[str, Any]) -> "CompactDependencyGraph":
+        """
+        Строит компактный граф из результата process_folder.
+        """
+        return cls.from_entries(results.items())
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> "CompactDependencyGraph":
+        """
+        Строит компактный граф из потока пар (ключ, значение), например из NDJSON.
+        """
+        graph = cls()
+        for file_key, file_data in entries:
+            graph.add(file_key, file_data.get("dependencies", []))
+        return graph
+
+    def dependency_frequency(self) -> Counter:
+        """
+        Частота использования каждого CAB (по номерам, в порядке первого появления).
+        """
+        return Counter(chain.from_iterable(record.deps for record in self.records))
+
+def generate_statistics(results: Union[Dict[str, Any], CompactDependencyGraph]) -> Dict[str, Any]:
     """
     Генерирует статистику по зависимостям.
+    Принимает результат process_folder или уже построенный CompactDependencyGraph.
     """
     if not results:
         return {}
     
-    all_dependencies = []
-    for file_key, file_data in results.items():
-        all_dependencies.extend(file_data.get("dependencies", []))
-    
-    # Находим уникальные зависимости
-    unique_deps = list(set(all_dependencies))
+    graph = results if isinstance(results, CompactDependencyGraph) else CompactDependencyGraph.from_results(results)
     
-    # Считаем частоту использования каждой зависимости
-    dep_frequency = {}
-    for dep in all_dependencies:
-        dep_frequency[dep] = dep_frequency.get(dep, 0) + 1
-    
-    # Сортируем по частоте использования
-    most_common_deps = sorted(dep_frequency.items(), key=lambda x: x[1], reverse=True)
+    # Считаем частоту использования каждой зависимости и берем топ-10
+    # (heapq.nlargest сохраняет порядок первого появления при равной частоте)
+    dep_frequency = graph.dependency_frequency()
+    most_common_deps = heapq.nlargest(10, dep_frequency.items(), key=lambda x: x[1])
     
     statistics = {
-        "total_unique_dependencies": len(unique_deps),
-        "most_common_dependencies": most_common_deps[:10],  # Топ-10
+        "total_unique_dependencies": len(dep_frequency),
+        "most_common_dependencies": [(graph.cab_names[cab_id], count) for cab_id, count in most_common_deps],  # Топ-10
         "files_by_dependency_count": {},
-        "files_with_asset_bundle_keys": list(results.keys())[:20]  # Пример первых 20 ключей
+        "files_with_asset_bundle_keys": [record.key for record in graph.records[:20]]  # Пример первых 20 ключей
     }
     
     # Группируем файлы по количеству зависимостей
-    for file_key, file_data in results.items():
-        dep_count = len(file_data.get("dependencies", []))
-        statistics["files_by_dependency_count"][file_key] = dep_count
+    for record in graph.records:
+        statistics["files_by_dependency_count"][record.key] = len(record.deps)
     
     return statistics
 
@@ -323,7 +679,7 @@ def main():
     parser.add_argument(
         '-e', '--extension',
         default='.bundle.txt',
-        help='Расширение файлов для анализа (по умолчанию .bundle.txt)'
+        help='Расширение файлов для анализа (по умолчанию .bundle.txt; .bundle - читать бандлы UnityFS напрямую)'
     )
     parser.add_argument(
         '-o', '--output',
@@ -340,8 +696,118 @@ def main():
         action='store_true',
         help='Подробный вывод'
     )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=default_jobs(),
+        help='Количество рабочих процессов (по умолчанию число ядер CPU, 1 - без пула процессов)'
+    )
+    parser.add_argument(
+        '-i', '--incremental',
+        action='store_true',
+        help='Использовать кэш результатов и повторно разбирать только новые и измененные файлы'
+    )
+    parser.add_argument(
+        '--cache-file',
+        default=None,
+        help='Путь к файлу кэша (по умолчанию <output>.cache.json рядом с выходным файлом)'
+    )
+    parser.add_argument(
+        '--hash',
+        action='store_true',
+        help='Хранить хэш содержимого в кэше и сверять его при изменении только mtime'
+    )
+    parser.add_argument(
+        '--binary-index',
+        default=None,
+        help='Дополнительно сохранить компактный бинарный индекс в указанный файл'
+    )
+    parser.add_argument(
+        '--ndjson',
+        default=None,
+        help='Потоковый режим: записывать результаты в указанный NDJSON файл по мере обработки '
+             '(одна строка на бандл), затем собрать из него выходной JSON без хранения всех результатов в памяти'
+    )
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Не выводить строки по каждому файлу (предупреждения и ошибки выводятся)'
+    )
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help='Показывать прогресс-бар в stderr (вместо строк по каждому файлу)'
+    )
+    parser.add_argument(
+        '--metrics-out',
+        default=None,
+        help='Сохранить замеры по стадиям и по файлам в JSON файл'
+    )
+    parser.add_argument(
+        '--top',
+        type=int,
+        default=10,
+        help='Сколько самых медленных и самых крупных файлов включать в метрики (по умолчанию 10)'
+    )
+    parser.add_argument(
+        '--shard',
+        default=None,
+        help='Обработать только часть i/N дампов (по хэшу пути) и записать частичный результат '
+             '(по умолчанию <output>.shard-i-of-N.ndjson); части собираются командой sharding.py merge'
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='generate_bundle_deps.pstats',
+        default=None,
+        help='Профилировать запуск через cProfile и сохранить статистику pstats (по умолчанию generate_bundle_deps.pstats)'
+    )
     
     args = parser.parse_args()
+    if args.shard:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        # Частичный результат (и кэш рядом с ним) у каждого шарда свой
+        if not args.output.endswith(".ndjson"):
+            args.output = default_shard_output(args.output, args.shard)
+    run_profiled(run, args.profile, args)
+
+def run_shard(args, cache: Optional[DumpCache], metrics: Optional[Metrics]):
+    """
+    Обрабатывает свою часть дампов и записывает частичный результат шарда.
+    """
+    output_file = args.output
+    totals = {"total_files": 0, "total_dependencies": 0, "files_with_dependencies": 0}
+    
+    with ShardWriter(output_file, KIND_DEPENDENCIES, args.shard) as writer:
+        def sink(key: str, value: Dict[str, Any]):
+            dependencies = value["dependencies"]
+            writer.write({"order": value["order"], "bundle": key, "dependencies": dependencies})
+            totals["total_files"] += 1
+            totals["total_dependencies"] += len(dependencies)
+            if dependencies:
+                totals["files_with_dependencies"] += 1
+        
+        process_folder(args.folder, args.extension, args.jobs, cache, metrics,
+                       log_files=not (args.quiet or args.progress), progress=args.progress,
+                       sink=sink, shard=args.shard)
+        writer.close(**totals)
+    
+    if cache is not None:
+        cache.save()
+    print(f"✓ Частичный результат шарда {args.shard[0]}/{args.shard[1]} сохранен в: {output_file} "
+          f"({totals['total_files']} записей)")
+    if metrics is not None:
+        metrics.print_summary()
+        metrics.save(args.metrics_out)
+
+def run(args):
+    """
+    Выполняет анализ с разобранными аргументами командной строки.
+    """
+    metrics = Metrics(args.top) if args.metrics_out else None
     
     # Обрабатываем папку
     print(f"Анализ файлов в папке: {args.folder}")
@@ -349,22 +815,65 @@ def main():
     print("Ключи в JSON будут созданы на основе поля m_AssetBundleName из файлов")
     print("=" * 60)
     
-    results = process_folder(args.folder, args.extension)
+    cache = None
+    if args.incremental:
+        cache = DumpCache(args.cache_file or default_cache_path(args.output), args.folder, args.hash)
+        cache.load()
     
-    if not results:
+    if args.shard:
+        run_shard(args, cache, metrics)
+        return
+    
+    log_files = not (args.quiet or args.progress)
+    if args.ndjson:
+        # Потоковый режим: записи уходят в NDJSON сразу после разбора каждого файла
+        with NdjsonWriter(args.ndjson) as writer:
+            process_folder(args.folder, args.extension, args.jobs, cache, metrics,
+                           log_files=log_files, progress=args.progress, sink=writer.write)
+            metadata = analysis_metadata(writer.total_files, writer.total_dependencies, writer.files_with_dependencies)
+            writer.close(metadata)
+        results = None
+        has_results = metadata["total_files"] > 0
+        if has_results:
+            print(f"✓ Потоковые результаты сохранены в: {args.ndjson}")
+    else:
+        results = process_folder(args.folder, args.extension, args.jobs, cache, metrics,
+                                 log_files=log_files, progress=args.progress)
+        has_results = bool(results)
+    
+    if cache is not None:
+        cache.save()
+    
+    if not has_results:
         print("Нет данных для сохранения.")
         return
     
     # Сохраняем результаты в JSON
-    json_saved = save_results_to_json(results, args.output)
+    serialize_started = time.perf_counter()
+    if results is None:
+        json_saved = save_ndjson_results_to_json(args.ndjson, metadata, args.output, args.binary_index)
+    else:
+        json_saved = save_results_to_json(results, args.output, args.binary_index)
+    if metrics is not None:
+        metrics.add_stage("serialize", time.perf_counter() - serialize_started)
     
     # Показываем пример структуры
     if args.verbose:
-        print_sample_json(results)
+        if results is None:
+            print_sample_json(dict(islice(iter_ndjson_entries(args.ndjson), 3)), metadata=metadata)
+        else:
+            print_sample_json(results)
     
     # Генерируем и сохраняем статистику
     if args.statistics and json_saved:
-        statistics = generate_statistics(results)
+        statistics_started = time.perf_counter()
+        if results is None:
+            # Статистика по компактному графу, собранному из NDJSON, без словаря результатов
+            statistics = generate_statistics(CompactDependencyGraph.from_entries(iter_ndjson_entries(args.ndjson)))
+        else:
+            statistics = generate_statistics(results)
+        if metrics is not None:
+            metrics.add_stage("statistics", time.perf_counter() - statistics_started)
         if statistics:
             save_statistics_to_file(statistics, "dependencies_statistics.json")
             
@@ -378,15 +887,19 @@ def main():
                 print(f"  {i}. {dep}: {count} файлов")
             
             # Файлы с наибольшим количеством зависимостей
-            files_by_deps = sorted(
+            files_by_deps = heapq.nlargest(
+                5,
                 statistics['files_by_dependency_count'].items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:5]
+                key=lambda x: x[1]
+            )
             
             print(f"\nТоп-5 файлов с наибольшим количеством зависимостей:")
             for i, (file_key, count) in enumerate(files_by_deps, 1):
                 print(f"  {i}. {file_key}: {count} зависимостей")
+    
+    if metrics is not None:
+        metrics.print_summary()
+        metrics.save(args.metrics_out)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
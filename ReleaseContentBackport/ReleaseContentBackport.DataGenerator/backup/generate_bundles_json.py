@@ -0,0 +1,120 @@
+import json
+from typing import Dict, List, Any, Tuple
+
+from bundle_graph import BundleGraph, load_graph, load_json, closure_unresolved_cabs
+
+# Зависимости, которые GenerateBundlesJson.ps1 прописывал всем бандлам.
+# Используются только для бандлов, которых нет в графе зависимостей.
+DEFAULT_DEPENDENCY_KEYS = [
+    "assets/commonassets/physics/physicsmaterials.bundle",
+    "cubemaps",
+    "shaders"
+]
+
+def generate_manifest(graph: BundleGraph, asset_paths: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Строит записи manifest для bundles.json по транзитивному замыканию зависимостей
+    каждого бандла. Возвращает (manifest, report).
+    """
+    manifest = []
+    report = {
+        "unknown_bundles": [],
+        "unresolved_cabs": {}
+    }
+
+    for path in asset_paths:
+        node = graph.bundle_id(path)
+        if node is None or not graph.analysed[node]:
+            # Бандла нет в dependencies_analysis.json - используем старый набор зависимостей
+            report["unknown_bundles"].append(path)
+            dependency_keys = list(DEFAULT_DEPENDENCY_KEYS)
+        else:
+            closure = graph.closure(node)
+            dependency_keys = [graph.names[dep] for dep in closure]
+            unresolved = closure_unresolved_cabs(graph, node, closure)
+            if unresolved:
+                report["unresolved_cabs"][path] = unresolved
+
+        manifest.append({
+            "key": path,
+            "dependencyKeys": dependency_keys
+        })
+
+    return manifest, report
+
+def save_bundles_json(manifest: List[Dict[str, Any]], output_file: str = "bundles.json") -> bool:
+    """
+    Сохраняет manifest в формате bundles.json.
+    """
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump({"manifest": manifest}, f, indent=2, ensure_ascii=False)
+        print(f"✓ Результат сохранен в: {output_file}")
+        print(f"  Создано записей: {len(manifest)}")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка при сохранении {output_file}: {e}")
+        return False
+
+def print_report(report: Dict[str, Any]):
+    """
+    Выводит предупреждения о бандлах, которые не удалось разрешить полностью.
+    """
+    if report["unknown_bundles"]:
+        print(f"\n⚠ Бандлов нет в графе зависимостей: {len(report['unknown_bundles'])} (использован набор по умолчанию)")
+        for path in report["unknown_bundles"]:
+            print(f"  {path}")
+
+    if report["unresolved_cabs"]:
+        print(f"\n⚠ Бандлов с CAB без известного владельца: {len(report['unresolved_cabs'])}")
+        for path, cabs in report["unresolved_cabs"].items():
+            print(f"  {path}: {', '.join(cabs)}")
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Генерация bundles.json по реальным транзитивным зависимостям бандлов'
+    )
+    parser.add_argument(
+        '-a', '--assets',
+        default='assets_paths.json',
+        help='Список путей бандлов (по умолчанию assets_paths.json)'
+    )
+    parser.add_argument(
+        '-d', '--dependencies',
+        default='dependencies_analysis.json',
+        help='Файл анализа зависимостей (по умолчанию dependencies_analysis.json)'
+    )
+    parser.add_argument(
+        '-c', '--cab-files',
+        default='cab_files.json',
+        help='Соответствие CAB -> путь бандла (по умолчанию cab_files.json)'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        default='bundles.json',
+        help='Имя выходного файла (по умолчанию bundles.json)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        asset_paths = load_json(args.assets)
+        graph = load_graph(args.dependencies, args.cab_files)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении входных файлов: {e}")
+        return
+
+    print(f"Загружено путей из {args.assets}: {len(asset_paths)}")
+    print(f"Бандлов в графе: {len(graph)}, CAB: {len(graph.cab_names)}, связей: {len(graph.targets)}")
+
+    manifest, report = generate_manifest(graph, asset_paths)
+    print_report(report)
+    save_bundles_json(manifest, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
 import os
 import json
+import time
 from pathlib import Path
+import queue
+import threading
 
-def find_cab_files_recursive(base_dir="."):
+from binary_index import export_index
+from instrumentation import Metrics, ProgressBar, run_profiled
+from sharding import ShardWriter, KIND_CAB_FILES, parse_shard, in_shard, default_shard_output
+
+# Глубина каталогов, по которой дерево ассетов делится на шарды: поддерево с корнем
+# на этой глубине целиком обходит один шард, каталоги выше просматривают все шарды
+SHARD_DEPTH = 3
+
+def find_cab_files_recursive(base_dir=".", all_files=False):
     """
     Рекурсивно находит файлы с именем, начинающимся на 'cab' во всех подкаталогах
     и возвращает словарь {имя_файла: относительный_путь_к_каталогу}
+    При all_files=False берется только первый (по имени) файл в каталоге.
     """
     result = {}
     
@@ -21,7 +33,7 @@ def find_cab_files_recursive(base_dir="."):
         current_dir = Path(root)
         
         # Ищем файлы, начинающиеся на 'cab' в текущей директории
-        for filename in files:
+        for filename in sorted(files):
             if filename.startswith('cab'):
                 # Получаем относительный путь от базовой директории
                 try:
@@ -39,13 +51,168 @@ def find_cab_files_recursive(base_dir="."):
                 
                 # Добавляем в результат
                 result[filename] = path_str
-                break  # Предполагаем один файл на каталог
+                if not all_files:
+                    break  # Предполагаем один файл на каталог
     
     return result
 
-def find_cab_files_with_patterns(base_dir=".", output_file="result.json"):
+def default_workers():
+    """
+    Количество потоков обхода по умолчанию. На локальном диске (каталоги в кэше ОС)
+    обход упирается в GIL, и потоки его только замедляют, поэтому по умолчанию обход
+    последовательный; -w N (8-32) имеет смысл для сетевых и "холодных" дисков,
+    где каждый os.scandir ждет ввода-вывода.
+    """
+    return 1
+
+def scan_directory(path, relative_path):
+    """
+    Сканирует один каталог через os.scandir.
+    Возвращает (относительный_путь, файлы_cab, есть_ли_файлы, подкаталоги)
+    или None, если каталог не удалось прочитать (как os.walk, такие каталоги пропускаются).
+    """
+    cab_files = []
+    subdirs = []
+    has_files = False
+    
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                
+                if is_dir:
+                    # Как os.walk(followlinks=False): в символические ссылки не заходим
+                    if not entry.is_symlink():
+                        subdirs.append(entry.name)
+                else:
+                    has_files = True
+                    if entry.name.startswith("cab"):
+                        cab_files.append(entry.name)
+    except OSError:
+        return None
+    
+    return relative_path, cab_files, has_files, subdirs
+
+def path_depth(relative_path):
+    return relative_path.count("/") + 1 if relative_path else 0
+
+def _walk_parallel(base_dir, workers, children):
+    """
+    Параллельный обход: каждый поток обходит свое поддерево в глубину по локальному стеку
+    и отдает часть стека в общую очередь, только когда есть простаивающие потоки.
+    Счетчик pending - число поддеревьев в очереди и в работе; обход завершен, когда он равен нулю.
+    """
+    records = []
+    tasks = queue.Queue()
+    tasks.put((base_dir, ""))
+    lock = threading.Lock()
+    counters = {"pending": 1, "idle": 0}
+    errors = []
+    
+    def worker():
+        while True:
+            with lock:
+                counters["idle"] += 1
+            task = tasks.get()
+            with lock:
+                counters["idle"] -= 1
+            if task is None:
+                return
+            stack = [task]
+            try:
+                while stack:
+                    path, relative_path = stack.pop()
+                    record = scan_directory(path, relative_path)
+                    if record is None:
+                        continue
+                    records.append(record)
+                    stack.extend(children(path, record))
+                    if counters["idle"] and len(stack) > 1:
+                        # Отдаем нижнюю половину стека (более крупные поддеревья) простаивающим потокам
+                        shared, stack = stack[:len(stack) // 2], stack[len(stack) // 2:]
+                        with lock:
+                            counters["pending"] += len(shared)
+                        for item in shared:
+                            tasks.put(item)
+            except Exception as e:
+                # Без уменьшения pending остальные потоки ждали бы вечно
+                errors.append(e)
+            with lock:
+                counters["pending"] -= 1
+                finished = counters["pending"] == 0
+            if finished:
+                for _ in range(workers):
+                    tasks.put(None)
+    
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return records
+
+def walk_cab_directories(base_dir=".", workers=None, shard=None, shard_depth=SHARD_DEPTH):
+    """
+    Обходит дерево каталогов, распределяя сканирование подкаталогов по пулу потоков.
+    Относительные пути строятся склейкой строк (с прямыми слешами), без Path.relative_to.
+    Возвращает список результатов scan_directory, отсортированный по относительному пути.
+    shard - (i, N): обходить только поддеревья глубины shard_depth, попавшие в шард i
+    по хэшу относительного пути; каталоги выше этой глубины возвращаются, только если
+    в шард попал их собственный путь.
+    """
+    if workers is None:
+        workers = default_workers()
+    
+    def child(path, relative_path, name):
+        return (
+            os.path.join(path, name),
+            f"{relative_path}/{name}" if relative_path else name
+        )
+    
+    def children(path, record):
+        for name in record[3]:
+            child_path, child_relative = child(path, record[0], name)
+            if shard is None or path_depth(child_relative) != shard_depth or in_shard(child_relative, shard):
+                yield child_path, child_relative
+    
+    records = []
+    
+    if workers <= 1:
+        stack = [(base_dir, "")]
+        while stack:
+            path, relative_path = stack.pop()
+            record = scan_directory(path, relative_path)
+            if record is None:
+                continue
+            records.append(record)
+            stack.extend(children(path, record))
+    else:
+        records = _walk_parallel(base_dir, workers, children)
+    
+    if shard is not None:
+        records = [record for record in records if path_depth(record[0]) >= shard_depth or in_shard(record[0], shard)]
+    
+    # Порядок завершения потоков недетерминирован - сортируем по пути (обход в глубину)
+    records.sort(key=lambda record: record[0].split("/") if record[0] else [])
+    return records
+
+def find_cab_files_with_patterns(base_dir=".", output_file="result.json", workers=None, all_files=False,
+                                 progress=False, shard=None, shard_depth=SHARD_DEPTH):
     """
-    Улучшенная версия с поддержкой детальной информации
+    Улучшенная версия с поддержкой детальной информации.
+    Каталоги сканируются через os.scandir в workers потоков.
+    При all_files=False из каждого каталога берется первый по имени файл 'cab*'.
+    При all_files=True индексируются все файлы 'cab*', а каталоги с несколькими
+    такими файлами и имена, встречающиеся в нескольких каталогах, попадают
+    в stats["collisions"] и stats["duplicate_names"].
+    progress - показывать в stderr счетчик просмотренных каталогов.
+    shard - (i, N): обойти только свою часть дерева (см. walk_cab_directories); все найденные
+    пары (имя, каталог), включая перекрытые повторами, попадают в stats["occurrences"].
     """
     result = {}
     stats = {
@@ -53,47 +220,47 @@ def find_cab_files_with_patterns(base_dir=".", output_file="result.json"):
         "files_found": 0,
         "directories_without_cab": 0
     }
+    if all_files:
+        stats["cab_files_total"] = 0
+        stats["collisions"] = {}
+        stats["duplicate_names"] = {}
+    if shard is not None:
+        stats["occurrences"] = []
     
-    base_path = Path(base_dir)
-    
-    if not base_path.exists():
+    if not os.path.exists(base_dir):
         print(f"Ошибка: Директория '{base_dir}' не существует")
         return result, stats
     
     print(f"Начинаю поиск файлов 'cab*' в '{base_dir}' и всех подкаталогах...")
     
-    for root, dirs, files in os.walk(base_dir):
-        current_dir = Path(root)
+    progress_bar = ProgressBar(label="Каталогов", enabled=progress)
+    for relative_path, cab_files, has_files, _ in walk_cab_directories(base_dir, workers, shard, shard_depth):
         stats["directories_scanned"] += 1
+        progress_bar.update()
         
-        # Ищем файлы, начинающиеся на 'cab'
-        matching_files = [f for f in files if f.startswith("cab")]
-        
-        if matching_files:
+        if cab_files:
             stats["files_found"] += 1
             
-            # Берем первый найденный файл
-            first_file = matching_files[0]
-            
-            # Получаем относительный путь
-            try:
-                relative_path = current_dir.relative_to(base_path)
-            except ValueError:
-                relative_path = Path(".")
-            
-            # Преобразуем путь: заменяем обратные слеши
-            path_str = str(relative_path).replace('\\', '/')
-            
-            # Если путь - текущая директория, используем пустую строку
-            if path_str == ".":
-                path_str = ""
-            
-            # Добавляем в результат
-            result[first_file] = path_str
-        else:
-            if files:  # Если в каталоге есть файлы, но не начинающиеся на 'cab'
-                stats["directories_without_cab"] += 1
+            if all_files:
+                cab_files.sort()
+                stats["cab_files_total"] += len(cab_files)
+                if len(cab_files) > 1:
+                    stats["collisions"][relative_path] = cab_files
+                for cab_file in cab_files:
+                    if cab_file in result:
+                        stats["duplicate_names"].setdefault(cab_file, [result[cab_file]]).append(relative_path)
+                    result[cab_file] = relative_path
+                    if shard is not None:
+                        stats["occurrences"].append((cab_file, relative_path))
+            else:
+                # Берем первый по имени файл (порядок os.scandir не гарантирован)
+                result[min(cab_files)] = relative_path
+                if shard is not None:
+                    stats["occurrences"].append((min(cab_files), relative_path))
+        elif has_files:  # Если в каталоге есть файлы, но не начинающиеся на 'cab'
+            stats["directories_without_cab"] += 1
     
+    progress_bar.close()
     return result, stats
 
 def normalize_paths_in_json(input_file, output_file=None):
@@ -144,12 +311,17 @@ def normalize_paths_in_json(input_file, output_file=None):
         print(f"✗ Ошибка: {e}")
         return {}
 
-def save_to_json(data, output_file="result.json"):
-    """Сохраняет данные в JSON файл"""
+def save_to_json(data, output_file="result.json", binary_output=None):
+    """
+    Сохраняет данные в JSON файл.
+    binary_output - путь для дополнительного компактного бинарного индекса (см. binary_index.py).
+    """
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=4, sort_keys=True)
         print(f"✓ Результат сохранен в файл: {output_file}")
+        if binary_output:
+            export_index(binary_output, cab_files=data)
         return True
     except Exception as e:
         print(f"✗ Ошибка при сохранении файла: {e}")
@@ -192,9 +364,118 @@ def print_results_table(data, title="НАЙДЕННЫЕ ФАЙЛЫ"):
     print("=" * 70)
 
 def main():
+    import argparse
+    
     # Настройки
-    base_directory = "."  # Текущая директория
-    output_json = "cab_files.json"
+    parser = argparse.ArgumentParser(
+        description="Рекурсивный поиск файлов, начинающихся на 'cab'"
+    )
+    parser.add_argument(
+        'folder',
+        nargs='?',
+        default='.',
+        help='Базовая директория поиска (по умолчанию текущая)'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        default='cab_files.json',
+        help='Имя выходного JSON файла (по умолчанию cab_files.json)'
+    )
+    parser.add_argument(
+        '--binary-index',
+        default=None,
+        help='Дополнительно сохранить компактный бинарный индекс в указанный файл'
+    )
+    parser.add_argument(
+        '-a', '--all',
+        action='store_true',
+        help="Индексировать все файлы 'cab*' в каждом каталоге и сообщать о коллизиях"
+    )
+    parser.add_argument(
+        '--collisions-output',
+        default='cab_collisions.json',
+        help='Файл отчета о коллизиях для режима --all (по умолчанию cab_collisions.json)'
+    )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=default_workers(),
+        help='Количество потоков обхода каталогов (по умолчанию 1; 8-32 для сетевых дисков)'
+    )
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Не выводить таблицу результатов и примеры путей'
+    )
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help='Показывать счетчик просмотренных каталогов в stderr'
+    )
+    parser.add_argument(
+        '--metrics-out',
+        default=None,
+        help='Сохранить замеры по стадиям в JSON файл'
+    )
+    parser.add_argument(
+        '--shard',
+        default=None,
+        help='Обойти только часть i/N дерева (по хэшу путей каталогов) и записать частичный результат '
+             '(по умолчанию <output>.shard-i-of-N.ndjson); части собираются командой sharding.py merge'
+    )
+    parser.add_argument(
+        '--shard-depth',
+        type=int,
+        default=SHARD_DEPTH,
+        help=f'Глубина каталогов, по которой дерево делится на шарды (по умолчанию {SHARD_DEPTH})'
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='generate_cab_names.pstats',
+        default=None,
+        help='Профилировать запуск через cProfile и сохранить статистику pstats (по умолчанию generate_cab_names.pstats)'
+    )
+    
+    args = parser.parse_args()
+    if args.shard:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.shard_depth < 1:
+            parser.error('--shard-depth должна быть не меньше 1')
+        if not args.output.endswith(".ndjson"):
+            args.output = default_shard_output(args.output, args.shard)
+    run_profiled(run, args.profile, args)
+
+def save_shard(stats, args):
+    """
+    Записывает частичный результат шарда: пары (имя, каталог), отсортированные по имени
+    и порядку обхода, и итоги поиска в строке metadata.
+    """
+    occurrences = sorted(stats.pop("occurrences"), key=lambda item: (item[0], item[1].split("/") if item[1] else []))
+    try:
+        with ShardWriter(args.output, KIND_CAB_FILES, args.shard) as writer:
+            for cab_file, relative_path in occurrences:
+                writer.write({"cab": cab_file, "path": relative_path,
+                              "order": relative_path.split("/") if relative_path else []})
+            stats.pop("duplicate_names", None)
+            writer.close(all_files=args.all, **stats)
+        print(f"✓ Частичный результат шарда {args.shard[0]}/{args.shard[1]} сохранен в: {args.output} "
+              f"({len(occurrences)} записей)")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка при сохранении шарда: {e}")
+        return False
+
+def run(args):
+    """
+    Выполняет поиск с разобранными аргументами командной строки.
+    """
+    metrics = Metrics() if args.metrics_out else None
+    base_directory = args.folder
+    output_json = args.output
     
     print("=" * 60)
     print("РЕКУРСИВНЫЙ ПОИСК ФАЙЛОВ, НАЧИНАЮЩИХСЯ НА 'cab'")
@@ -202,7 +483,13 @@ def main():
     print("=" * 60)
     
     # Используем улучшенную версию с детальной статистикой
-    result, stats = find_cab_files_with_patterns(base_directory)
+    discover_started = time.perf_counter()
+    result, stats = find_cab_files_with_patterns(base_directory, workers=args.workers, all_files=args.all,
+                                                 progress=args.progress, shard=args.shard, shard_depth=args.shard_depth)
+    if metrics is not None:
+        metrics.add_stage("discover", time.perf_counter() - discover_started)
+        metrics.count("directories_scanned", stats["directories_scanned"])
+        metrics.count("files_found", stats["files_found"])
     
     # Выводим статистику
     print("\n" + "=" * 60)
@@ -210,28 +497,52 @@ def main():
     print(f"  Просмотрено каталогов: {stats['directories_scanned']}")
     print(f"  Найдено файлов 'cab*': {stats['files_found']}")
     print(f"  Каталогов без файлов 'cab': {stats['directories_without_cab']}")
+    if args.all:
+        print(f"  Всего файлов 'cab*': {stats['cab_files_total']}")
+        print(f"  Каталогов с несколькими файлами 'cab*': {len(stats['collisions'])}")
+        print(f"  Имен 'cab*' в нескольких каталогах: {len(stats['duplicate_names'])}")
     print("=" * 60)
     
+    if args.shard:
+        # Коллизии и совпадающие имена по всему дереву считает sharding.py merge
+        save_shard(stats, args)
+        if metrics is not None:
+            metrics.print_summary()
+            metrics.save(args.metrics_out)
+        return
+    
+    if args.all and (stats["collisions"] or stats["duplicate_names"]):
+        for directory, cab_files in list(stats["collisions"].items())[:10]:
+            print(f"⚠ Коллизия в '{directory or '.'}': {', '.join(cab_files)}")
+        save_to_json(
+            {"collisions": stats["collisions"], "duplicate_names": stats["duplicate_names"]},
+            args.collisions_output
+        )
+    
     # Сохраняем результаты
     if result:
         # Сохраняем в JSON
-        save_to_json(result, output_json)
+        serialize_started = time.perf_counter()
+        save_to_json(result, output_json, args.binary_index)
+        if metrics is not None:
+            metrics.add_stage("serialize", time.perf_counter() - serialize_started)
 
-        # Выводим результаты в виде таблицы
-        print_results_table(result)
-        
-        # Выводим несколько примеров для проверки формата
-        print("\n" + "=" * 60)
-        print("ПРИМЕРЫ ФОРМАТИРОВАННЫХ ПУТЕЙ:")
-        print("-" * 60)
-        
-        # Выбираем несколько примеров для демонстрации
-        examples = list(result.items())[:min(5, len(result))]  # Первые 5 или меньше
-        for filename, directory in examples:
-            display_dir = directory if directory else "(текущая директория)"
-            print(f"  Файл: {filename}")
-            print(f"    Путь: {display_dir}")
-            print()
+        if not args.quiet:
+            # Выводим результаты в виде таблицы
+            print_results_table(result)
+            
+            # Выводим несколько примеров для проверки формата
+            print("\n" + "=" * 60)
+            print("ПРИМЕРЫ ФОРМАТИРОВАННЫХ ПУТЕЙ:")
+            print("-" * 60)
+            
+            # Выбираем несколько примеров для демонстрации
+            examples = list(result.items())[:min(5, len(result))]  # Первые 5 или меньше
+            for filename, directory in examples:
+                display_dir = directory if directory else "(текущая директория)"
+                print(f"  Файл: {filename}")
+                print(f"    Путь: {display_dir}")
+                print()
         
         # Проверяем наличие обратных слешей
         has_backslashes = any('\\' in path for path in result.values())
@@ -248,6 +559,10 @@ def main():
     else:
         print("\n❌ Файлы, начинающиеся на 'cab', не найдены в подкаталогах")
     
+    if metrics is not None:
+        metrics.print_summary()
+        metrics.save(args.metrics_out)
+    
     print("\n" + "=" * 60)
     print("Поиск завершен!")
 
@@ -0,0 +1,125 @@
+import time
+from typing import Dict, List, Any, Tuple
+
+from bundle_graph import BundleGraph
+
+# Транзитивные метрики всего графа без обхода от каждого бандла: граф сжимается
+# в компоненты сильной связности (DAG), множества достижимых бандлов хранятся
+# битовыми масками в int (бит = номер бандла) и объединяются по компонентам
+# в топологическом порядке. Затраты - O(E * V / 64) машинных слов.
+
+def condense(graph: BundleGraph) -> Tuple[List[int], List[List[int]], List[List[int]]]:
+    """
+    Сжимает граф в DAG компонент. Возвращает (компонента бандла, члены компонент,
+    компоненты-зависимости каждой компоненты без повторов). Компоненты идут
+    в обратном топологическом порядке: зависимости раньше зависящих.
+    """
+    component, components = graph.strongly_connected_components()
+    successors = []
+    for index, members in enumerate(components):
+        targets = set()
+        for member in members:
+            for dep in graph.dependencies(member):
+                targets.add(component[dep])
+        targets.discard(index)
+        successors.append(sorted(targets))
+    return list(component), components, successors
+
+def _member_masks(components: List[List[int]]) -> List[int]:
+    masks = []
+    for members in components:
+        mask = 0
+        for member in members:
+            mask |= 1 << member
+        masks.append(mask)
+    return masks
+
+def reachability(components: List[List[int]], successors: List[List[int]]) -> Tuple[List[int], List[int]]:
+    """
+    Маски бандлов, достижимых из каждой компоненты (fan-out), и маски бандлов,
+    из которых достижима компонента (fan-in). Для компонент-циклов в маску
+    входят и собственные члены.
+    """
+    count = len(components)
+    members = _member_masks(components)
+    cyclic = [len(nodes) > 1 for nodes in components]
+
+    reach_out = [0] * count
+    for index in range(count):
+        mask = members[index] if cyclic[index] else 0
+        for successor in successors[index]:
+            mask |= members[successor] | reach_out[successor]
+        reach_out[index] = mask
+
+    predecessors: List[List[int]] = [[] for _ in range(count)]
+    for index, targets in enumerate(successors):
+        for successor in targets:
+            predecessors[successor].append(index)
+
+    reach_in = [0] * count
+    for index in range(count - 1, -1, -1):
+        mask = members[index] if cyclic[index] else 0
+        for predecessor in predecessors[index]:
+            mask |= members[predecessor] | reach_in[predecessor]
+        reach_in[index] = mask
+
+    return reach_out, reach_in
+
+def transitive_metrics(graph: BundleGraph, top: int = 20) -> Dict[str, Any]:
+    """
+    Транзитивные fan-out/fan-in всех бандлов, компоненты-циклы и CAB-"хабы"
+    (CAB, от которых транзитивно зависит больше всего бандлов).
+    """
+    started = time.perf_counter()
+    component, components, successors = condense(graph)
+    reach_out, reach_in = reachability(components, successors)
+    graph.build_reverse()
+
+    bundles = []
+    for node, name in enumerate(graph.names):
+        index = component[node]
+        cyclic = len(components[index]) > 1
+        bundles.append({
+            "bundle": name,
+            "scc": index if cyclic else None,
+            "direct_out": len(graph.dependencies(node)),
+            "direct_in": len(graph.dependents(node)),
+            # Маска цикла содержит сам бандл; замыкание его не включает
+            "fan_out": reach_out[index].bit_count() - cyclic,
+            "fan_in": reach_in[index].bit_count() - cyclic
+        })
+
+    hubs = []
+    for cab, cab_name in enumerate(graph.cab_names):
+        direct = graph.cab_dependents(cab)
+        mask = 0
+        for dependent in direct:
+            mask |= (1 << dependent) | reach_in[component[dependent]]
+        owner = graph.cab_owner[cab]
+        if owner >= 0:
+            mask &= ~(1 << owner)
+        hubs.append({
+            "cab": cab_name,
+            "owner": graph.names[owner] if owner >= 0 else None,
+            "direct_dependents": len(direct),
+            "transitive_dependents": mask.bit_count()
+        })
+    hubs.sort(key=lambda hub: (-hub["transitive_dependents"], -hub["direct_dependents"], hub["cab"]))
+
+    cycles = [sorted(graph.names[member] for member in members) for members in components if len(members) > 1]
+    return {
+        "metadata": {
+            "bundles": len(graph),
+            "cabs": len(graph.cab_names),
+            "components": len(components),
+            "cyclic_components": len(cycles),
+            "largest_component": max((len(members) for members in components), default=0),
+            "condensed_edges": sum(len(targets) for targets in successors),
+            "seconds": round(time.perf_counter() - started, 3)
+        },
+        "top_fan_in": sorted(bundles, key=lambda item: (-item["fan_in"], item["bundle"]))[:top],
+        "top_fan_out": sorted(bundles, key=lambda item: (-item["fan_out"], item["bundle"]))[:top],
+        "hub_cabs": hubs[:top],
+        "cycles": cycles,
+        "bundles": bundles
+    }
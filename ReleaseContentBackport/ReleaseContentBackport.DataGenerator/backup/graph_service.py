@@ -0,0 +1,290 @@
+import os
+import sys
+import json
+import time
+import threading
+import http.client
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Any, Optional, Tuple
+
+from bundle_graph import BundleGraph, load_graph
+from deps import resolve_rdeps
+
+# Локальный сервис запросов к графу зависимостей: индексы загружаются один раз,
+# вызывающие скрипты получают ответы по HTTP (localhost, keep-alive) без разбора JSON.
+#
+#   POST /query  {"queries": [{"op": "closure", "bundle": "..."}, {"op": "owner", "cab": "cab-..."}, ...]}
+#             -> {"generation": N, "results": [...]}  (результаты в порядке запросов)
+#   GET  /health -> {"generation": N, "bundles": ..., "cabs": ..., "cache": {...}}
+#
+# Операции: closure (транзитивные зависимости бандла), dependencies (прямые),
+# owner (бандл-владелец CAB), rdeps (зависящие бандлы, "transitive": true/false).
+# Неизвестный бандл или CAB дает null. Замыкания кэшируются в LRU ограниченного
+# размера; кэш сбрасывается при изменении cab_files.json или dependencies_analysis.json.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 4096
+
+class GraphState:
+    """
+    Граф, кэш замыканий и отметки файлов-источников для обнаружения изменений.
+    """
+
+    def __init__(self, dependencies_file: str, cab_files_file: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.dependencies_file = dependencies_file
+        self.cab_files_file = cab_files_file
+        self.cache_size = cache_size
+        self.generation = 0
+        self.graph: Optional[BundleGraph] = None
+        self._signature: Optional[Tuple] = None
+        # BundleGraph использует общий массив меток обхода - обходы выполняются под блокировкой
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._closure = None
+        self.reload()
+
+    def _file_signature(self) -> Tuple:
+        return tuple(
+            (stat.st_mtime_ns, stat.st_size)
+            for stat in (os.stat(self.dependencies_file), os.stat(self.cab_files_file))
+        )
+
+    def reload(self):
+        """
+        Загружает граф заново и сбрасывает кэш замыканий.
+        """
+        signature = self._file_signature()
+        started = time.perf_counter()
+        graph = load_graph(self.dependencies_file, self.cab_files_file)
+        graph.build_reverse()
+
+        def closure(name: str) -> Optional[Tuple[str, ...]]:
+            node = graph.bundle_id(name)
+            if node is None:
+                return None
+            with self._lock:
+                return tuple(graph.names[dep] for dep in graph.closure(node))
+
+        with self._lock:
+            self.graph = graph
+            self._closure = lru_cache(maxsize=self.cache_size)(closure)
+            self._signature = signature
+            self.generation += 1
+        print(f"✓ Граф загружен за {(time.perf_counter() - started) * 1000:.0f} мс: "
+              f"{len(graph)} бандлов, {len(graph.cab_names)} CAB (поколение {self.generation})")
+
+    def refresh(self):
+        """
+        Перезагружает граф, если файлы-источники изменились (проверка - два вызова stat).
+        """
+        try:
+            if self._file_signature() == self._signature:
+                return
+        except OSError:
+            # Файл заменяется прямо сейчас - отвечаем по текущему графу
+            return
+        with self._reload_lock:
+            try:
+                if self._file_signature() != self._signature:
+                    self.reload()
+            except (OSError, ValueError) as e:
+                print(f"⚠ Не удалось перезагрузить граф, используется предыдущий: {e}", file=sys.stderr)
+
+    def snapshot(self) -> Tuple[BundleGraph, Any, int]:
+        """
+        Граф, кэш замыканий и номер поколения, согласованные между собой (reload
+        заменяет их под той же блокировкой).
+        """
+        with self._lock:
+            return self.graph, self._closure, self.generation
+
+    def answer(self, query: Dict[str, Any], snapshot: Optional[Tuple[BundleGraph, Any, int]] = None) -> Any:
+        """
+        Ответ на один запрос по снимку snapshot (по умолчанию - текущему).
+        """
+        graph, closure, _ = snapshot or self.snapshot()
+        op = query.get("op")
+        if op == "closure":
+            result = closure(query["bundle"])
+            return list(result) if result is not None else None
+        if op == "dependencies":
+            node = graph.bundle_id(query["bundle"])
+            return None if node is None else [graph.names[dep] for dep in graph.dependencies(node)]
+        if op == "owner":
+            cab = graph.cab_index.get(query["cab"])
+            if cab is None or graph.cab_owner[cab] < 0:
+                return None
+            return graph.names[graph.cab_owner[cab]]
+        if op == "rdeps":
+            with self._lock:
+                result = resolve_rdeps(graph, query["target"], bool(query.get("transitive")))
+            return None if result is None else result["dependents"]
+        raise ValueError(f"неизвестная операция: {op}")
+
+    def answer_batch(self, queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Ответы на пачку запросов: вся пачка отвечается по одному снимку, чтобы
+        перезагрузка посреди пачки не смешала поколения графа.
+        """
+        snapshot = self.snapshot()
+        return {"generation": snapshot[2], "results": [self.answer(query, snapshot) for query in queries]}
+
+    def status(self) -> Dict[str, Any]:
+        graph, closure, generation = self.snapshot()
+        info = closure.cache_info()
+        return {
+            "generation": generation,
+            "bundles": len(graph),
+            "cabs": len(graph.cab_names),
+            "cache": {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+        }
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP-запросов (HTTP/1.1, соединения держатся открытыми).
+    """
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят отдельными записями; без TCP_NODELAY ответ ждет
+    # отложенного ACK клиента (~40 мс на запрос)
+    disable_nagle_algorithm = True
+    state: GraphState = None
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self.state.refresh()
+        self._send_json(200, self.state.status())
+
+    def do_POST(self):
+        if self.path != "/query":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            queries = json.loads(self.rfile.read(length)).get("queries", [])
+        except (ValueError, AttributeError) as e:
+            self._send_json(400, {"error": f"некорректный запрос: {e}"})
+            return
+
+        self.state.refresh()
+        try:
+            payload = self.state.answer_batch(queries)
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            self._send_json(400, {"error": f"некорректный запрос: {e}"})
+            return
+        self._send_json(200, payload)
+
+    def log_message(self, format, *args):
+        # Журнал каждого запроса не нужен - сервис опрашивается очень часто
+        pass
+
+def serve(state: GraphState, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """
+    Запускает сервис (до Ctrl+C).
+    """
+    handler = type("BoundQueryHandler", (QueryHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"✓ Сервис запросов слушает http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nОстановлено")
+    finally:
+        server.server_close()
+
+class GraphClient:
+    """
+    Клиент сервиса: одно постоянное соединение, запросы пачками.
+
+        client = GraphClient()
+        client.closure(["assets/content/...bundle"])  # -> [[...], ...]
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 10.0):
+        self._connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            try:
+                self._connection.request(method, path, body, headers)
+                response = self._connection.getresponse()
+                data = json.loads(response.read())
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # Сервис мог закрыть простаивающее соединение - переподключаемся один раз
+                self._connection.close()
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(data.get("error", f"HTTP {response.status}"))
+        return data
+
+    def query(self, queries: List[Dict[str, Any]]) -> List[Any]:
+        return self._request("POST", "/query", {"queries": queries})["results"]
+
+    def closure(self, bundles: List[str]) -> List[Optional[List[str]]]:
+        return self.query([{"op": "closure", "bundle": bundle} for bundle in bundles])
+
+    def dependencies(self, bundles: List[str]) -> List[Optional[List[str]]]:
+        return self.query([{"op": "dependencies", "bundle": bundle} for bundle in bundles])
+
+    def owner(self, cabs: List[str]) -> List[Optional[str]]:
+        return self.query([{"op": "owner", "cab": cab} for cab in cabs])
+
+    def rdeps(self, targets: List[str], transitive: bool = False) -> List[Optional[List[str]]]:
+        return self.query([{"op": "rdeps", "target": target, "transitive": transitive} for target in targets])
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("GET", "/health")
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Локальный сервис запросов к графу зависимостей бандлов'
+    )
+    parser.add_argument('-d', '--dependencies', default='dependencies_analysis.json', help='Файл анализа зависимостей')
+    parser.add_argument('-c', '--cab-files', default='cab_files.json', help='Соответствие CAB -> путь бандла')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Адрес (по умолчанию {DEFAULT_HOST})')
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help=f'Порт (по умолчанию {DEFAULT_PORT})')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f'Размер LRU-кэша замыканий (по умолчанию {DEFAULT_CACHE_SIZE})')
+
+    args = parser.parse_args()
+
+    try:
+        state = GraphState(args.dependencies, args.cab_files, args.cache_size)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении входных файлов: {e}")
+        return 2
+    serve(state, args.host, args.port)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import sys
+import json
+import time
+import heapq
+import bisect
+import cProfile
+from typing import Dict, List, Any, Optional, Callable
+
+# Замеры по стадиям, гистограммы времени разбора файлов, прогресс-бар и профилирование
+# для скриптов generate_bundle_deps.py и generate_cab_names.py.
+
+# Верхние границы интервалов гистограммы времени разбора, мс (последний интервал открыт)
+HISTOGRAM_BOUNDS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+class Metrics:
+    """
+    Накопитель замеров: время стадий, счетчики, гистограмма времени разбора файлов
+    и топ-N самых медленных и самых крупных файлов.
+    """
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.started_at = time.time()
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.files_timed = 0
+        self.parse_seconds_total = 0.0
+        self._slowest: List[tuple] = []
+        self._largest: List[tuple] = []
+
+    def add_stage(self, name: str, seconds: float):
+        """
+        Добавляет время стадии; повторные замеры одной стадии суммируются.
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_file(self, name: str, seconds: Optional[float], size: Optional[int] = None):
+        """
+        Учитывает один разобранный файл. seconds - время чтения и разбора (None - взят из кэша).
+        """
+        if seconds is not None:
+            self.files_timed += 1
+            self.parse_seconds_total += seconds
+            self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, seconds * 1000)] += 1
+            self._push(self._slowest, (seconds, name))
+        if size is not None:
+            self._push(self._largest, (size, name))
+
+    def _push(self, heap: List[tuple], item: tuple):
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def histogram_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        lower = 0
+        for number, count in enumerate(self.histogram):
+            upper = HISTOGRAM_BOUNDS_MS[number] if number < len(HISTOGRAM_BOUNDS_MS) else None
+            rows.append({"from_ms": lower, "to_ms": upper, "files": count})
+            lower = upper
+        return rows
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "stages_seconds": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "counters": self.counters,
+            "files_timed": self.files_timed,
+            "parse_seconds_total": round(self.parse_seconds_total, 6),
+            "parse_time_histogram": self.histogram_rows(),
+            "slowest_files": [
+                {"file": name, "seconds": round(seconds, 6)} for seconds, name in sorted(self._slowest, reverse=True)
+            ],
+            "largest_files": [
+                {"file": name, "bytes": size} for size, name in sorted(self._largest, reverse=True)
+            ]
+        }
+
+    def save(self, output_file: str) -> bool:
+        """
+        Сохраняет замеры в JSON файл.
+        """
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+            print(f"✓ Метрики сохранены в: {output_file}")
+            return True
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении метрик: {e}")
+            return False
+
+    def print_summary(self):
+        """
+        Краткая сводка по стадиям и самым медленным файлам.
+        """
+        print("\n" + "=" * 60)
+        print("ВРЕМЯ ПО СТАДИЯМ:")
+        for name, seconds in self.stages.items():
+            print(f"  {name:12} {seconds:9.3f} с")
+        if self.files_timed:
+            average = self.parse_seconds_total / self.files_timed * 1000
+            print(f"Разобрано файлов: {self.files_timed}, в среднем {average:.2f} мс на файл")
+            for seconds, name in sorted(self._slowest, reverse=True)[:5]:
+                print(f"  {seconds * 1000:9.2f} мс  {name}")
+        print("=" * 60)
+
+class ProgressBar:
+    """
+    Прогресс-бар в stderr, перерисовывается не чаще одного раза в min_interval секунд.
+    Если total неизвестен, выводится только счетчик и скорость.
+    """
+
+    def __init__(self, total: Optional[int] = None, label: str = "", enabled: bool = True,
+                 min_interval: float = 0.2, stream=None, width: int = 30):
+        self.total = total
+        self.label = label
+        self.enabled = enabled
+        self.min_interval = min_interval
+        self.stream = stream or sys.stderr
+        self.width = width
+        self.done = 0
+        self._started = time.perf_counter()
+        self._last_draw = 0.0
+
+    def update(self, count: int = 1):
+        self.done += count
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now - self._last_draw >= self.min_interval:
+            self._last_draw = now
+            self._draw(now)
+
+    def _draw(self, now: float):
+        elapsed = now - self._started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            filled = int(self.width * self.done / self.total)
+            bar = "#" * filled + "-" * (self.width - filled)
+            line = f"\r{self.label} [{bar}] {self.done}/{self.total} ({rate:.0f}/с)"
+        else:
+            line = f"\r{self.label} {self.done} ({rate:.0f}/с)"
+        self.stream.write(line)
+        self.stream.flush()
+
+    def close(self):
+        if self.enabled:
+            self._draw(time.perf_counter())
+            self.stream.write("\n")
+            self.stream.flush()
+
+def run_profiled(function: Callable, output_file: Optional[str], *args, **kwargs):
+    """
+    Выполняет function под cProfile (если задан output_file) и сохраняет статистику
+    в формате pstats (просмотр: python -m pstats <файл>).
+    """
+    if not output_file:
+        return function(*args, **kwargs)
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(output_file)
+        print(f"✓ Профиль сохранен в: {output_file}", file=sys.stderr)
@@ -0,0 +1,114 @@
+import os
+from typing import Dict, List, Any, Optional
+
+from bundle_graph import BundleGraph
+
+def is_virtual(path: str) -> bool:
+    """
+    Узел графа без файла бандла: каталоги встроенных ресурсов ("shaders", "cubemaps")
+    и другие пути из cab_files.json, не ведущие на .bundle. Такие узлы не проверяются на диске.
+    """
+    return not path.endswith(".bundle")
+
+def find_cycles(graph: BundleGraph) -> List[List[int]]:
+    """
+    Циклы зависимостей: компоненты сильной связности из нескольких бандлов.
+    """
+    _, components = graph.strongly_connected_components()
+    return [members for members in components if len(members) > 1]
+
+class BundleSizes:
+    """
+    Размеры файлов бандлов на диске относительно assets_root (stat один раз на бандл).
+    """
+
+    def __init__(self, assets_root: str):
+        self.assets_root = assets_root
+        self._sizes: Dict[str, Optional[int]] = {}
+
+    def get(self, path: str) -> Optional[int]:
+        if path not in self._sizes:
+            try:
+                self._sizes[path] = os.stat(os.path.join(self.assets_root, path)).st_size
+            except OSError:
+                self._sizes[path] = None
+        return self._sizes[path]
+
+def plan_bundle(graph: BundleGraph, path: str, sizes: BundleSizes,
+                cycle_of: Dict[int, int], cycles: List[List[int]]) -> Dict[str, Any]:
+    """
+    План загрузки одного бандла: порядок загрузки замыкания, суммарный объем,
+    отсутствующие на диске файлы, узлы без файла бандла (virtual) и циклы,
+    попавшие в замыкание.
+    """
+    node = graph.bundle_id(path)
+    if node is None:
+        virtual = is_virtual(path)
+        size = None if virtual else sizes.get(path)
+        return {
+            "key": path,
+            "known": False,
+            "bundles": 1,
+            "payload_bytes": size or 0,
+            "missing_files": [path] if size is None and not virtual else [],
+            "virtual": [path] if virtual else [],
+            "load_order": [path],
+            "cycles": []
+        }
+
+    order = graph.load_order(node)
+    payload = 0
+    missing = []
+    virtual = []
+    touched_cycles = []
+    for member in order:
+        name = graph.names[member]
+        if is_virtual(name):
+            virtual.append(name)
+            continue
+        size = sizes.get(name)
+        if size is None:
+            missing.append(name)
+        else:
+            payload += size
+        cycle = cycle_of.get(member)
+        if cycle is not None and cycle not in touched_cycles:
+            touched_cycles.append(cycle)
+
+    return {
+        "key": path,
+        "known": True,
+        "bundles": len(order),
+        "payload_bytes": payload,
+        "missing_files": missing,
+        "virtual": virtual,
+        "load_order": [graph.names[member] for member in order],
+        "cycles": [sorted(graph.names[member] for member in cycles[cycle]) for cycle in touched_cycles]
+    }
+
+def plan_bundles(graph: BundleGraph, asset_paths: List[str], assets_root: str) -> Dict[str, Any]:
+    """
+    Планы загрузки для всех путей из assets_paths.json и список всех циклов графа.
+    """
+    cycles = find_cycles(graph)
+    cycle_of = {member: number for number, members in enumerate(cycles) for member in members}
+    sizes = BundleSizes(assets_root)
+
+    plans = [plan_bundle(graph, path, sizes, cycle_of, cycles) for path in asset_paths]
+    return {
+        "assets_root": os.path.abspath(assets_root),
+        "total_entries": len(plans),
+        "cycles": [sorted(graph.names[member] for member in members) for members in cycles],
+        "plans": plans
+    }
+
+def format_size(size: int) -> str:
+    """
+    Человекочитаемый размер.
+    """
+    value = float(size)
+    for unit in ("Б", "КБ", "МБ"):
+        if value < 1024:
+            return f"{value:.1f} {unit}" if unit != "Б" else f"{size} {unit}"
+        value /= 1024
+    return f"{value:.1f} ГБ"
@@ -0,0 +1,166 @@
+import os
+import sys
+import json
+from typing import Dict, Any, Optional, Iterable, Iterator, Tuple, TextIO
+
+# Потоковый формат результатов анализа зависимостей (NDJSON, одна запись JSON на строку):
+#
+#   {"bundle": "<m_AssetBundleName>", "dependencies": ["cab-...", ...]}
+#   ...
+#   {"metadata": {...}}     - последняя строка, как раздел metadata в dependencies_analysis.json
+#
+# Строки записываются и сбрасываются на диск по мере обработки файлов, поэтому при
+# аварийном завершении уже обработанные записи сохраняются (без строки metadata).
+
+class NdjsonWriter:
+    """
+    Запись результатов по одной строке с подсчетом итогов для строки metadata.
+    """
+
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self._file = open(output_file, 'w', encoding='utf-8', newline='\n')
+        self.total_files = 0
+        self.total_dependencies = 0
+        self.files_with_dependencies = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._file.closed:
+            self._file.close()
+
+    def write(self, key: str, value: Dict[str, Any]):
+        dependencies = value.get("dependencies", [])
+        self._file.write(json.dumps({"bundle": key, "dependencies": dependencies}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.total_files += 1
+        self.total_dependencies += len(dependencies)
+        if dependencies:
+            self.files_with_dependencies += 1
+
+    def close(self, metadata: Dict[str, Any]):
+        """
+        Записывает завершающую строку metadata и закрывает файл.
+        """
+        self._file.write(json.dumps({"metadata": metadata}, ensure_ascii=False) + "\n")
+        self._file.close()
+
+def iter_ndjson(input_file: str) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """
+    Читает NDJSON построчно. Возвращает пары (ключ, {"dependencies": [...]})
+    и (None, metadata) для строки metadata. Оборванная последняя строка пропускается.
+    """
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if not line.endswith("\n"):
+                    print(f"⚠ {input_file}: оборванная строка {number} пропущена (запись была прервана)")
+                    return
+                raise ValueError(f"{input_file}: некорректная строка {number}")
+            if "metadata" in record:
+                yield None, record["metadata"]
+            else:
+                yield record["bundle"], {"dependencies": record.get("dependencies", [])}
+
+def read_ndjson_metadata(input_file: str, tail_size: int = 64 * 1024) -> Optional[Dict[str, Any]]:
+    """
+    Возвращает metadata из последней строки файла (без чтения всего файла) или None,
+    если запись не была завершена.
+    """
+    with open(input_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - tail_size))
+        tail = f.read()
+    lines = tail.rstrip(b"\n").rsplit(b"\n", 1)
+    try:
+        record = json.loads(lines[-1].decode('utf-8'))
+    except ValueError:
+        return None
+    return record.get("metadata") if isinstance(record, dict) else None
+
+def _write_indented(f: TextIO, value: Any, indent: str):
+    # json.dumps(indent=2) с дополнительным отступом вложенных строк
+    f.write(json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n" + indent))
+
+def write_analysis_json(entries: Iterable[Tuple[str, Dict[str, Any]]], metadata: Dict[str, Any], output_file: str):
+    """
+    Потоково записывает dependencies_analysis.json. Результат побайтно совпадает с
+    json.dump({"metadata": ..., "dependencies": ...}, indent=2, ensure_ascii=False),
+    но записи не собираются в памяти.
+    """
+    temp_file = output_file + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.write('{\n  "metadata": ')
+        _write_indented(f, metadata, "  ")
+        f.write(',\n  "dependencies": {')
+        first = True
+        for key, value in entries:
+            f.write("\n    " if first else ",\n    ")
+            first = False
+            f.write(json.dumps(key, ensure_ascii=False) + ": ")
+            _write_indented(f, value, "    ")
+        f.write("}\n}" if first else "\n  }\n}")
+    os.replace(temp_file, output_file)
+
+def count_ndjson(input_file: str) -> Dict[str, Any]:
+    """
+    Итоги по записям NDJSON (для файла без строки metadata).
+    """
+    totals = {"total_files": 0, "total_dependencies": 0, "files_with_dependencies": 0}
+    for key, value in iter_ndjson(input_file):
+        if key is None:
+            continue
+        totals["total_files"] += 1
+        totals["total_dependencies"] += len(value["dependencies"])
+        if value["dependencies"]:
+            totals["files_with_dependencies"] += 1
+    totals["files_without_dependencies"] = totals["total_files"] - totals["files_with_dependencies"]
+    return totals
+
+def convert_ndjson(input_file: str, output_file: str = "dependencies_analysis.json") -> bool:
+    """
+    Преобразует NDJSON в формат dependencies_analysis.json (потоково, в два прохода
+    только если запись NDJSON была прервана и metadata нужно пересчитать).
+    """
+    try:
+        metadata = read_ndjson_metadata(input_file)
+        if metadata is None:
+            metadata = count_ndjson(input_file)
+            metadata["partial"] = True
+            print(f"⚠ В {input_file} нет строки metadata (запись не завершена), итоги пересчитаны")
+        write_analysis_json(
+            ((key, value) for key, value in iter_ndjson(input_file) if key is not None),
+            metadata,
+            output_file
+        )
+        print(f"✓ {input_file} преобразован в: {output_file} ({metadata.get('total_files', 0)} бандлов)")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка при преобразовании {input_file}: {e}")
+        return False
+
+def main():
+    """
+    Преобразование NDJSON в dependencies_analysis.json.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Преобразование потокового NDJSON результата в формат dependencies_analysis.json'
+    )
+    parser.add_argument('input', help='Файл NDJSON (generate_bundle_deps.py --ndjson)')
+    parser.add_argument('-o', '--output', default='dependencies_analysis.json',
+                        help='Выходной JSON файл (по умолчанию dependencies_analysis.json)')
+    args = parser.parse_args()
+
+    return 0 if convert_ndjson(args.input, args.output) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
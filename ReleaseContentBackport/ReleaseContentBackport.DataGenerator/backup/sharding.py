@@ -0,0 +1,286 @@
+import os
+import sys
+import json
+import heapq
+import hashlib
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from ndjson_output import read_ndjson_metadata, write_analysis_json
+
+# Распределенный запуск generate_bundle_deps.py и generate_cab_names.py на нескольких
+# машинах: --shard i/N отбирает дампы (и поддеревья каталогов ассетов) по стабильному
+# хэшу относительного пути и пишет частичный результат в NDJSON:
+#
+#   {"order": [...], "bundle": "...", "dependencies": [...]}   - generate_bundle_deps.py
+#   {"cab": "...", "path": "...", "order": [...]}              - generate_cab_names.py
+#   ...
+#   {"metadata": {"kind": ..., "shard": [i, N], ...}}          - последняя строка
+#
+# Записи шарда отсортированы (по order или по cab), поэтому "merge" собирает любой набор
+# шардов потоковым k-путевым слиянием, не загружая их целиком, и получает тот же результат,
+# что и запуск на одной машине (включая суффиксы дублирующихся ключей и итоги metadata).
+
+KIND_DEPENDENCIES = "dependencies"
+KIND_CAB_FILES = "cab_files"
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Разбирает "i/N" (1 <= i <= N) в (i, N).
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"ожидается формат i/N, получено: {value}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"номер шарда должен быть от 1 до N: {value}")
+    return index, count
+
+def shard_of(relative_path: str, count: int) -> int:
+    """
+    Номер шарда (1..count) для относительного пути. Хэш не зависит от машины,
+    версии Python и PYTHONHASHSEED; разделители пути приводятся к '/'.
+    """
+    digest = hashlib.blake2b(relative_path.replace("\\", "/").encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % count + 1
+
+def in_shard(relative_path: str, shard: Optional[Tuple[int, int]]) -> bool:
+    return shard is None or shard_of(relative_path, shard[1]) == shard[0]
+
+def default_shard_output(output_file: str, shard: Tuple[int, int]) -> str:
+    """
+    dependencies_analysis.json -> dependencies_analysis.shard-2-of-4.ndjson
+    """
+    base, _ = os.path.splitext(output_file)
+    return f"{base}.shard-{shard[0]}-of-{shard[1]}.ndjson"
+
+class ShardWriter:
+    """
+    Запись частичного результата шарда: по строке на запись и строка metadata в конце.
+    """
+
+    def __init__(self, output_file: str, kind: str, shard: Tuple[int, int]):
+        self.output_file = output_file
+        self.metadata: Dict[str, Any] = {"kind": kind, "shard": list(shard)}
+        self.records = 0
+        self._file = open(output_file, 'w', encoding='utf-8', newline='\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._file.closed:
+            self._file.close()
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.records += 1
+
+    def close(self, **metadata):
+        self.metadata.update(metadata)
+        self._file.write(json.dumps({"metadata": self.metadata}, ensure_ascii=False) + "\n")
+        self._file.close()
+
+def _iter_records(shard_file: str) -> Iterator[Dict[str, Any]]:
+    with open(shard_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if "metadata" not in record:
+                    yield record
+
+def _scan_metadata(shard_file: str) -> Optional[Dict[str, Any]]:
+    with open(shard_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('{"metadata"'):
+                return json.loads(line)["metadata"]
+    return None
+
+def read_shard_metadata(shard_files: List[str]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Читает строки metadata всех шардов и проверяет, что они одного вида.
+    Незавершенный шард (без metadata) - ошибка: его записи могут быть неполными.
+    """
+    metadata = []
+    for shard_file in shard_files:
+        shard_metadata = read_ndjson_metadata(shard_file)
+        if shard_metadata is None:
+            # Строка metadata длиннее хвоста, читаемого read_ndjson_metadata (много коллизий)
+            shard_metadata = _scan_metadata(shard_file)
+        if shard_metadata is None or "kind" not in shard_metadata:
+            raise ValueError(f"{shard_file}: нет строки metadata шарда (запись не завершена?)")
+        metadata.append(shard_metadata)
+    kinds = {shard_metadata["kind"] for shard_metadata in metadata}
+    if len(kinds) != 1:
+        raise ValueError(f"шарды разного вида: {', '.join(sorted(kinds))}")
+    return kinds.pop(), metadata
+
+def check_coverage(shard_files: List[str], metadata: List[Dict[str, Any]]) -> bool:
+    """
+    Предупреждает о повторяющихся и недостающих шардах. Возвращает True, если набор полный.
+    """
+    counts = {shard_metadata["shard"][1] for shard_metadata in metadata}
+    if len(counts) != 1:
+        print(f"⚠ Шарды из разбиений на разное число частей: {sorted(counts)}")
+        return False
+    count = counts.pop()
+    seen: Dict[int, str] = {}
+    complete = True
+    for shard_file, shard_metadata in zip(shard_files, metadata):
+        index = shard_metadata["shard"][0]
+        if index in seen:
+            raise ValueError(f"шард {index}/{count} указан дважды: {seen[index]} и {shard_file}")
+        seen[index] = shard_file
+    missing = [index for index in range(1, count + 1) if index not in seen]
+    if missing:
+        print(f"⚠ Нет шардов: {', '.join(f'{index}/{count}' for index in missing)} - результат будет частичным")
+        complete = False
+    return complete
+
+def merge_dependencies(shard_files: List[str], metadata: List[Dict[str, Any]], output_file: str) -> Dict[str, Any]:
+    """
+    Сливает шарды generate_bundle_deps.py в dependencies_analysis.json. Записи идут
+    в порядке файлов дампов, как при запуске на одной машине; суффиксы _1, _2, ...
+    дублирующимся ключам назначаются уже после слияния.
+    """
+    from generate_bundle_deps import analysis_metadata, unique_bundle_key
+
+    totals = {
+        name: sum(shard_metadata[name] for shard_metadata in metadata)
+        for name in ("total_files", "total_dependencies", "files_with_dependencies")
+    }
+    merged_metadata = analysis_metadata(totals["total_files"], totals["total_dependencies"],
+                                        totals["files_with_dependencies"])
+    seen_keys = set()
+    duplicates = 0
+
+    def entries():
+        nonlocal duplicates
+        streams = [_iter_records(shard_file) for shard_file in shard_files]
+        for record in heapq.merge(*streams, key=lambda record: record["order"]):
+            key = record["bundle"]
+            if key in seen_keys:
+                duplicates += 1
+                print(f"⚠ Внимание: дублирующийся ключ {key}")
+            yield unique_bundle_key(key, seen_keys), {"dependencies": record["dependencies"]}
+
+    write_analysis_json(entries(), merged_metadata, output_file)
+    return {"records": totals["total_files"], "duplicate_keys": duplicates}
+
+def _write_sorted_json(entries: Iterator[Tuple[str, str]], output_file: str):
+    # То же, что json.dump(..., indent=4, sort_keys=True) для уже отсортированных пар строк
+    temp_file = output_file + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        first = True
+        for key, value in entries:
+            f.write("{\n    " if first else ",\n    ")
+            first = False
+            f.write(f"{json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}")
+        f.write("{}" if first else "\n}")
+    os.replace(temp_file, output_file)
+
+def merge_cab_files(shard_files: List[str], metadata: List[Dict[str, Any]], output_file: str,
+                    collisions_output: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Сливает шарды generate_cab_names.py в cab_files.json. Если имя CAB встречается
+    в нескольких каталогах, побеждает последний каталог в порядке обхода (как в одиночном
+    запуске); в режиме --all такие имена попадают в duplicate_names.
+    """
+    all_files = any(shard_metadata.get("all_files") for shard_metadata in metadata)
+    stats: Dict[str, Any] = {
+        name: sum(shard_metadata.get(name, 0) for shard_metadata in metadata)
+        for name in ("directories_scanned", "files_found", "directories_without_cab")
+    }
+    collisions: Dict[str, List[str]] = {}
+    for shard_metadata in metadata:
+        collisions.update(shard_metadata.get("collisions", {}))
+    duplicate_names: Dict[str, List[str]] = {}
+    written = 0
+
+    def entries():
+        nonlocal written
+        streams = [_iter_records(shard_file) for shard_file in shard_files]
+        group_cab = None
+        group_paths: List[str] = []
+        for record in heapq.merge(*streams, key=lambda record: (record["cab"], record["order"])):
+            if record["cab"] != group_cab:
+                if group_cab is not None:
+                    written += 1
+                    if len(group_paths) > 1 and all_files:
+                        duplicate_names[group_cab] = group_paths
+                    yield group_cab, group_paths[-1]
+                group_cab, group_paths = record["cab"], []
+            group_paths.append(record["path"])
+        if group_cab is not None:
+            written += 1
+            if len(group_paths) > 1 and all_files:
+                duplicate_names[group_cab] = group_paths
+            yield group_cab, group_paths[-1]
+
+    _write_sorted_json(entries(), output_file)
+    stats["cab_files"] = written
+    if all_files:
+        stats["cab_files_total"] = sum(shard_metadata.get("cab_files_total", 0) for shard_metadata in metadata)
+        stats["collisions"] = len(collisions)
+        stats["duplicate_names"] = len(duplicate_names)
+        if collisions_output and (collisions or duplicate_names):
+            with open(collisions_output, 'w', encoding='utf-8') as f:
+                json.dump({"collisions": collisions, "duplicate_names": duplicate_names}, f,
+                          ensure_ascii=False, indent=4, sort_keys=True)
+            print(f"✓ Отчет о коллизиях сохранен в: {collisions_output}")
+    return stats
+
+def command_merge(args) -> int:
+    """
+    Подкоманда merge: сливает частичные результаты шардов.
+    """
+    try:
+        kind, metadata = read_shard_metadata(args.shards)
+        check_coverage(args.shards, metadata)
+        output_file = args.output or ("dependencies_analysis.json" if kind == KIND_DEPENDENCIES else "cab_files.json")
+        if kind == KIND_DEPENDENCIES:
+            stats = merge_dependencies(args.shards, metadata, output_file)
+        elif kind == KIND_CAB_FILES:
+            stats = merge_cab_files(args.shards, metadata, output_file, args.collisions_output)
+        else:
+            print(f"✗ Неизвестный вид шардов: {kind}", file=sys.stderr)
+            return 2
+    except (OSError, ValueError, KeyError) as e:
+        print(f"✗ Ошибка слияния шардов: {e}", file=sys.stderr)
+        return 2
+
+    print(f"✓ Слито шардов: {len(args.shards)} -> {output_file}")
+    for name, value in stats.items():
+        print(f"  {name}: {value}")
+    return 0
+
+def build_parser():
+    """
+    Создает парсер аргументов командной строки с подкомандами.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='sharding',
+        description='Слияние частичных результатов запусков с --shard i/N'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    merge_parser = subparsers.add_parser('merge', help='Собрать dependencies_analysis.json или cab_files.json из шардов')
+    merge_parser.add_argument('shards', nargs='+', help='Файлы шардов (*.shard-i-of-N.ndjson)')
+    merge_parser.add_argument('-o', '--output', default=None,
+                              help='Выходной файл (по умолчанию dependencies_analysis.json или cab_files.json)')
+    merge_parser.add_argument('--collisions-output', default='cab_collisions.json',
+                              help='Отчет о коллизиях для шардов generate_cab_names.py --all')
+    merge_parser.set_defaults(handler=command_merge)
+
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Основная функция скрипта.
+    """
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from bundle_graph import BundleGraph, build_graph, load_json
+
+# Сравнение двух снимков cab_files.json + dependencies_analysis.json (до и после
+# обновления игры). Все сравнения - слиянием отсортированных по ключу списков,
+# без поиска каждого ключа в другом снимке.
+#
+# Затронутые записи bundles.json:
+#   closure_changed - изменился список dependencyKeys (транзитивное замыкание)
+#   content_changed - у бандла записи или у бандла из его замыкания сменился CAB
+#                     (файл пересобран, его нужно скопировать заново)
+
+CAB_FILES_NAME = "cab_files.json"
+DEPENDENCIES_NAME = "dependencies_analysis.json"
+
+def merge_join(old: Dict[str, Any], new: Dict[str, Any]) -> Iterator[Tuple[str, Any, Any]]:
+    """
+    Слияние двух словарей по отсортированным ключам: (ключ, старое, новое),
+    None на месте отсутствующего значения.
+    """
+    old_keys = sorted(old)
+    new_keys = sorted(new)
+    i = j = 0
+    while i < len(old_keys) and j < len(new_keys):
+        old_key, new_key = old_keys[i], new_keys[j]
+        if old_key == new_key:
+            yield old_key, old[old_key], new[new_key]
+            i += 1
+            j += 1
+        elif old_key < new_key:
+            yield old_key, old[old_key], None
+            i += 1
+        else:
+            yield new_key, None, new[new_key]
+            j += 1
+    for old_key in old_keys[i:]:
+        yield old_key, old[old_key], None
+    for new_key in new_keys[j:]:
+        yield new_key, None, new[new_key]
+
+def sorted_difference(old: List[str], new: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    (добавленные, удаленные) элементы двух отсортированных списков без повторов.
+    """
+    added, removed = [], []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        if old[i] == new[j]:
+            i += 1
+            j += 1
+        elif old[i] < new[j]:
+            removed.append(old[i])
+            i += 1
+        else:
+            added.append(new[j])
+            j += 1
+    removed.extend(old[i:])
+    added.extend(new[j:])
+    return added, removed
+
+def cabs_by_bundle(cab_files: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Обращает cab_files.json: {путь бандла: отсортированные CAB}.
+    """
+    owned: Dict[str, List[str]] = {}
+    for cab in sorted(cab_files):
+        owned.setdefault(cab_files[cab], []).append(cab)
+    return owned
+
+def diff_cab_files(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Добавленные и удаленные CAB, CAB со сменой бандла-владельца и бандлы,
+    у которых сменился CAB (пересобранные).
+    """
+    added, removed, moved = [], [], []
+    for cab, old_path, new_path in merge_join(old, new):
+        if old_path is None:
+            added.append(cab)
+        elif new_path is None:
+            removed.append(cab)
+        elif old_path != new_path:
+            moved.append({"cab": cab, "old": old_path, "new": new_path})
+
+    rehashed, added_bundles, removed_bundles = [], [], []
+    for path, old_cabs, new_cabs in merge_join(cabs_by_bundle(old), cabs_by_bundle(new)):
+        if old_cabs is None:
+            added_bundles.append(path)
+        elif new_cabs is None:
+            removed_bundles.append(path)
+        elif old_cabs != new_cabs:
+            rehashed.append({"bundle": path, "old": old_cabs, "new": new_cabs})
+
+    return {
+        "added_cabs": added,
+        "removed_cabs": removed,
+        "moved_cabs": moved,
+        "rehashed_bundles": rehashed,
+        "added_bundles": added_bundles,
+        "removed_bundles": removed_bundles
+    }
+
+def diff_dependencies(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Бандлы, появившиеся и пропавшие в dependencies_analysis.json, и бандлы
+    с измененным списком зависимостей (CAB).
+    """
+    added, removed, changed = [], [], []
+    for bundle, old_entry, new_entry in merge_join(old, new):
+        if old_entry is None:
+            added.append(bundle)
+        elif new_entry is None:
+            removed.append(bundle)
+        else:
+            old_cabs = sorted(set(old_entry.get("dependencies", [])))
+            new_cabs = sorted(set(new_entry.get("dependencies", [])))
+            if old_cabs != new_cabs:
+                added_cabs, removed_cabs = sorted_difference(old_cabs, new_cabs)
+                changed.append({"bundle": bundle, "added": added_cabs, "removed": removed_cabs})
+    return {"added": added, "removed": removed, "changed": changed}
+
+def _closure(graph: BundleGraph, key: str) -> Optional[List[str]]:
+    node = graph.bundle_id(key)
+    if node is None or not graph.analysed[node]:
+        return None
+    return sorted(graph.names[member] for member in graph.closure(node))
+
+def diff_manifest(old_graph: BundleGraph, new_graph: BundleGraph, keys: List[str],
+                  rehashed: List[str]) -> Dict[str, Any]:
+    """
+    Записи bundles.json (ключи keys), у которых изменилось транзитивное замыкание
+    или пересобран бандл записи либо бандл из ее замыкания.
+    """
+    rehashed_set = set(rehashed)
+    closure_changed, content_changed, unknown = [], [], []
+    for key in keys:
+        old_closure = _closure(old_graph, key)
+        new_closure = _closure(new_graph, key)
+        if new_closure is None:
+            unknown.append(key)
+            continue
+        if old_closure != new_closure:
+            added, removed = sorted_difference(old_closure or [], new_closure)
+            closure_changed.append({"key": key, "added": added, "removed": removed})
+        rebuilt = [path for path in [key, *new_closure] if path in rehashed_set]
+        if rebuilt:
+            content_changed.append({"key": key, "rehashed": rebuilt})
+
+    affected = dict.fromkeys(item["key"] for item in closure_changed)
+    affected.update(dict.fromkeys(item["key"] for item in content_changed))
+    return {
+        "entries": len(keys),
+        "closure_changed": closure_changed,
+        "content_changed": content_changed,
+        "unknown_in_new": unknown,
+        "affected": [key for key in keys if key in affected]
+    }
+
+def load_snapshot(directory: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    Загружает cab_files.json и dependencies_analysis.json из каталога снимка.
+    """
+    cab_files = load_json(os.path.join(directory, CAB_FILES_NAME))
+    analysis = load_json(os.path.join(directory, DEPENDENCIES_NAME))
+    return cab_files, analysis.get("dependencies", {})
+
+def diff_snapshots(old_dir: str, new_dir: str, keys: List[str]) -> Dict[str, Any]:
+    """
+    Полное сравнение двух снимков и записей bundles.json с ключами keys.
+    """
+    old_cab_files, old_dependencies = load_snapshot(old_dir)
+    new_cab_files, new_dependencies = load_snapshot(new_dir)
+
+    cabs = diff_cab_files(old_cab_files, new_cab_files)
+    dependencies = diff_dependencies(old_dependencies, new_dependencies)
+    manifest = diff_manifest(
+        build_graph(old_dependencies, old_cab_files),
+        build_graph(new_dependencies, new_cab_files),
+        list(dict.fromkeys(keys)),
+        [item["bundle"] for item in cabs["rehashed_bundles"]]
+    )
+    return {"old": old_dir, "new": new_dir, "cab_files": cabs, "dependencies": dependencies, "manifest": manifest}
+
+def print_diff(report: Dict[str, Any], limit: int = 10):
+    """
+    Краткий вывод результатов сравнения.
+    """
+    cabs = report["cab_files"]
+    dependencies = report["dependencies"]
+    manifest = report["manifest"]
+
+    def show(title: str, items: List[Any], describe=str):
+        print(f"  {title}: {len(items)}")
+        for item in items[:limit]:
+            print(f"    {describe(item)}")
+        if len(items) > limit:
+            print(f"    ... и еще {len(items) - limit}")
+
+    print("\n" + "=" * 70)
+    print(f"СРАВНЕНИЕ СНИМКОВ: {report['old']} -> {report['new']}")
+    print("=" * 70)
+    print("cab_files.json:")
+    show("Добавлено CAB", cabs["added_cabs"])
+    show("Удалено CAB", cabs["removed_cabs"])
+    show("CAB сменили бандл", cabs["moved_cabs"], lambda item: f"{item['cab']}: {item['old']} -> {item['new']}")
+    show("Пересобрано бандлов (сменился CAB)", cabs["rehashed_bundles"],
+         lambda item: f"{item['bundle']}: {', '.join(item['old'])} -> {', '.join(item['new'])}")
+    print("dependencies_analysis.json:")
+    show("Новых бандлов", dependencies["added"])
+    show("Удалено бандлов", dependencies["removed"])
+    show("Изменились зависимости", dependencies["changed"],
+         lambda item: f"{item['bundle']} (+{len(item['added'])} / -{len(item['removed'])})")
+    print(f"bundles.json ({manifest['entries']} записей):")
+    show("Изменились dependencyKeys", manifest["closure_changed"],
+         lambda item: f"{item['key']} (+{len(item['added'])} / -{len(item['removed'])})")
+    show("Пересобраны бандлы замыкания", manifest["content_changed"],
+         lambda item: f"{item['key']} ({len(item['rehashed'])})")
+    if manifest["unknown_in_new"]:
+        show("⚠ Нет в новом графе", manifest["unknown_in_new"])
+    print("=" * 70)
+    print(f"Затронуто записей: {len(manifest['affected'])} из {manifest['entries']}")
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Сравнение двух снимков cab_files.json и dependencies_analysis.json '
+                    '(каталоги со старой и новой версией)'
+    )
+    parser.add_argument('old', help='Каталог старого снимка')
+    parser.add_argument('new', help='Каталог нового снимка')
+    parser.add_argument('-a', '--assets', default='assets_paths.json',
+                        help='Ключи записей bundles.json (по умолчанию assets_paths.json)')
+    parser.add_argument('-o', '--output', default='snapshot_diff.json', help='Файл отчета (по умолчанию snapshot_diff.json)')
+    parser.add_argument('--affected-out', default=None,
+                        help='Сохранить затронутые пути в формате assets_paths.json (для copy_item_assets.py -a)')
+    parser.add_argument('-n', '--limit', type=int, default=10, help='Сколько элементов каждого списка выводить')
+
+    args = parser.parse_args()
+
+    try:
+        keys = load_json(args.assets)
+        report = diff_snapshots(args.old, args.new, keys)
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении входных файлов: {e}")
+        return 2
+
+    print_diff(report, args.limit)
+
+    try:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✓ Отчет сохранен в: {args.output}")
+        if args.affected_out:
+            with open(args.affected_out, 'w', encoding='utf-8') as f:
+                json.dump(report["manifest"]["affected"], f, indent=4, ensure_ascii=False)
+            print(f"✓ Затронутые пути сохранены в: {args.affected_out}")
+    except Exception as e:
+        print(f"✗ Ошибка при сохранении: {e}")
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
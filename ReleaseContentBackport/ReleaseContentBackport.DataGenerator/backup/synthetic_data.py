@@ -0,0 +1,210 @@
+import os
+import lzma
+import random
+import struct
+from typing import List, Dict
+
+# Генераторы синтетических данных для бенчмарков и проверок скриптов:
+# дерево распакованных ассетов с файлами cab*, текстовые дампы *.bundle.txt
+# и минимальные бандлы UnityFS с объектом AssetBundle.
+
+def random_cab(rng: random.Random) -> str:
+    """
+    Случайное имя вида cab-<32 hex>.
+    """
+    return f"cab-{rng.getrandbits(128):032x}"
+
+def generate_asset_tree(root: str, directories: int = 1000, depth: int = 3, fanout: int = 10,
+                        cabs_per_directory: int = 1, other_files: int = 1, seed: int = 0) -> Dict[str, str]:
+    """
+    Создает дерево каталогов-бандлов вида assets/d0/d1/.../bundle_N.bundle.
+    В каждом листовом каталоге cabs_per_directory файлов cab-... и other_files прочих файлов.
+    Возвращает {cab: относительный_путь} для первого CAB каждого каталога.
+    """
+    rng = random.Random(seed)
+    expected = {}
+    for number in range(directories):
+        parts = ["assets"]
+        value = number
+        for _ in range(depth):
+            parts.append(f"d{value % fanout}")
+            value //= fanout
+        parts.append(f"bundle_{number}.bundle")
+        relative_path = "/".join(parts)
+        directory = os.path.join(root, *parts)
+        os.makedirs(directory, exist_ok=True)
+
+        cabs = sorted(random_cab(rng) for _ in range(cabs_per_directory))
+        for cab in cabs:
+            with open(os.path.join(directory, cab), 'wb') as f:
+                f.write(b"\x00" * 16)
+        for other in range(other_files):
+            with open(os.path.join(directory, f"resource_{other}.resS"), 'wb') as f:
+                f.write(b"\x00" * 16)
+        if cabs:
+            expected[cabs[0]] = relative_path
+    return expected
+
+def dump_text(bundle_name: str, dependencies: List[str], filler_bytes: int = 0) -> str:
+    """
+    Текст дампа объекта AssetBundle в формате, который разбирает generate_bundle_deps.
+    filler_bytes - объем данных-заполнителя после зависимостей (имитация крупных дампов).
+    """
+    lines = [
+        "0 AssetBundle Base",
+        f' 1 string m_Name = "{bundle_name}"',
+        " 0 vector m_PreloadTable",
+        "  1 Array Array (0 items)",
+        "   0 int size = 0",
+        f' 1 string m_AssetBundleName = "{bundle_name}"',
+        " 0 vector m_Dependencies",
+        f"  1 Array Array ({len(dependencies)} items)",
+        f"   0 int size = {len(dependencies)}",
+    ]
+    for number, dependency in enumerate(dependencies):
+        lines.append(f"   [{number}]")
+        lines.append(f'    1 string data = "{dependency}"')
+    lines.append(" 0 bool m_IsStreamedSceneAssetBundle = false")
+    if filler_bytes:
+        line = " 0 TypelessData data = " + "ab" * 512
+        lines.extend([line] * max(1, filler_bytes // len(line)))
+    return "\n".join(lines) + "\n"
+
+def generate_dumps(folder: str, count: int = 1000, dependencies_per_dump: int = 3, filler_bytes: int = 0,
+                   shared_cabs: int = 200, duplicate_every: int = 0, seed: int = 0) -> int:
+    """
+    Создает count текстовых дампов *.bundle.txt. Зависимости выбираются из общего
+    пула shared_cabs CAB. duplicate_every > 0 - каждый N-й дамп повторяет имя бандла
+    (для проверки суффиксов _1, _2, ...). Возвращает суммарный объем в байтах.
+    """
+    rng = random.Random(seed)
+    pool = [random_cab(rng) for _ in range(max(1, shared_cabs))]
+    os.makedirs(folder, exist_ok=True)
+    total = 0
+    for number in range(count):
+        name_number = number - 1 if duplicate_every and number and number % duplicate_every == 0 else number
+        bundle_name = f"assets/content/items/item_{name_number}.bundle"
+        dependencies = rng.sample(pool, min(dependencies_per_dump, len(pool)))
+        data = dump_text(bundle_name, dependencies, filler_bytes).encode('utf-8')
+        with open(os.path.join(folder, f"item_{number:07d}.bundle.txt"), 'wb') as f:
+            f.write(data)
+        total += len(data)
+    return total
+
+def _cstring(value: str) -> bytes:
+    return value.encode('utf-8') + b"\x00"
+
+def _pad(data: bytearray, alignment: int) -> bytearray:
+    data += b"\x00" * ((-len(data)) % alignment)
+    return data
+
+def _aligned_string(value: str) -> bytearray:
+    encoded = value.encode('utf-8')
+    return _pad(bytearray(struct.pack("<i", len(encoded)) + encoded), 4)
+
+def _lzma_block(data: bytes) -> bytes:
+    dict_size = 1 << 16
+    raw = lzma.compress(data, format=lzma.FORMAT_RAW, filters=[
+        {"id": lzma.FILTER_LZMA1, "dict_size": dict_size, "lc": 3, "lp": 0, "pb": 2}
+    ])
+    return bytes([(2 * 5 + 0) * 9 + 3]) + struct.pack("<I", dict_size) + raw
+
+def _lz4_literal_block(data: bytes) -> bytes:
+    # Корректный блок LZ4 из одной последовательности литералов (без сжатия)
+    header = bytearray()
+    if len(data) >= 15:
+        header.append(0xF0)
+        rest = len(data) - 15
+        while rest >= 255:
+            header.append(255)
+            rest -= 255
+        header.append(rest)
+    else:
+        header.append(len(data) << 4)
+    return bytes(header) + data
+
+def synthetic_bundle(bundle_name: str, dependencies: List[str], compression: int = 1,
+                     block_size: int = 128 * 1024, padding_bytes: int = 0) -> bytes:
+    """
+    Минимальный бандл UnityFS (SerializedFile версии 22, без дерева типов) с объектом
+    AssetBundle. compression: 0 - без сжатия, 1 - LZMA, 2 - LZ4 (только литералы).
+    padding_bytes - размер дополнительного объекта перед AssetBundle.
+    """
+    asset_bundle = _aligned_string(bundle_name)  # m_Name
+    asset_bundle += struct.pack("<i", 0)  # m_PreloadTable
+    asset_bundle += struct.pack("<i", 0)  # m_Container
+    asset_bundle += struct.pack("<iiiq", 0, 0, 0, 0)  # m_MainAsset
+    asset_bundle += struct.pack("<I", 1)  # m_RuntimeCompatibility
+    asset_bundle += _aligned_string(bundle_name)  # m_AssetBundleName
+    asset_bundle += struct.pack("<i", len(dependencies))
+    for dependency in dependencies:
+        asset_bundle += _aligned_string(dependency)
+    asset_bundle += b"\x00" * 4  # m_IsStreamedSceneAssetBundle
+
+    header_size = 48
+    metadata = bytearray(_cstring("2019.4.39f1")) + struct.pack("<i", 5) + b"\x00"
+    metadata += struct.pack("<i", 2)
+    for class_id in (1, 142):
+        metadata += struct.pack("<i", class_id) + b"\x00" + struct.pack("<h", -1) + b"\x00" * 16
+    padding_start = 0
+    bundle_start = (padding_bytes + 7) // 8 * 8
+    objects = [(1, padding_start, padding_bytes, 0), (2, bundle_start, len(asset_bundle), 1)]
+    metadata += struct.pack("<i", len(objects))
+    for path_id, byte_start, byte_size, type_id in objects:
+        metadata += b"\x00" * ((-(header_size + len(metadata))) % 4)
+        metadata += struct.pack("<qqIi", path_id, byte_start, byte_size, type_id)
+    metadata += struct.pack("<i", 0)  # скрипты
+    metadata += struct.pack("<i", 0)  # externals
+    metadata += struct.pack("<i", 0)  # ref types
+
+    data_offset = (header_size + len(metadata) + 15) // 16 * 16
+    body = _pad(bytearray(b"\x11" * padding_bytes), 8) + asset_bundle
+    file_size = data_offset + len(body)
+    serialized = bytearray(struct.pack(">IIII", 0, 0, 22, 0) + b"\x00" * 4)
+    serialized += struct.pack(">Iqqq", len(metadata), file_size, data_offset, 0)
+    serialized += metadata
+    serialized += b"\x00" * (data_offset - len(serialized))
+    serialized += body
+
+    encode = {0: bytes, 1: _lzma_block, 2: _lz4_literal_block}[compression]
+    blocks = []
+    payload = bytearray()
+    for start in range(0, len(serialized), block_size):
+        chunk = bytes(serialized[start:start + block_size])
+        compressed = encode(chunk)
+        blocks.append((len(chunk), len(compressed), compression))
+        payload += compressed
+
+    node_path = "CAB-" + bundle_name.encode('utf-8').hex()[:32].ljust(32, "0")
+    info = bytearray(b"\x00" * 16) + struct.pack(">i", len(blocks))
+    for block in blocks:
+        info += struct.pack(">IIH", *block)
+    info += struct.pack(">i", 1) + struct.pack(">qqI", 0, len(serialized), 0x4) + _cstring(node_path)
+
+    archive = bytearray(_cstring("UnityFS") + struct.pack(">I", 8) + _cstring("5.x.x") + _cstring("2019.4.39f1"))
+    archive += struct.pack(">qIII", 0, len(info), len(info), 0x40 | 0x200)
+    _pad(archive, 16)
+    archive += info
+    _pad(archive, 16)
+    archive += payload
+    return bytes(archive)
+
+def generate_bundles(root: str, count: int = 100, dependencies_per_bundle: int = 3, compression: int = 1,
+                     shared_cabs: int = 200, seed: int = 0) -> int:
+    """
+    Создает count синтетических бандлов UnityFS в дереве assets/content/items/.
+    Возвращает суммарный объем в байтах.
+    """
+    rng = random.Random(seed)
+    pool = [random_cab(rng) for _ in range(max(1, shared_cabs))]
+    total = 0
+    for number in range(count):
+        relative_path = f"assets/content/items/g{number % 16}/item_{number}.bundle"
+        dependencies = rng.sample(pool, min(dependencies_per_bundle, len(pool)))
+        data = synthetic_bundle(relative_path, dependencies, compression)
+        path = os.path.join(root, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        total += len(data)
+    return total
@@ -0,0 +1,508 @@
+import re
+import mmap
+import lzma
+import struct
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+# Чтение зависимостей напрямую из файлов .bundle (формат UnityFS) без текстовых дампов.
+# Читается только заголовок архива, таблица блоков и те блоки, в которых лежат
+# заголовок SerializedFile и объект AssetBundle - обычно несколько КБ на бандл.
+
+ARCHIVE_COMPRESSION_MASK = 0x3F
+ARCHIVE_BLOCKS_INFO_AT_END = 0x80
+ARCHIVE_BLOCK_INFO_NEED_PADDING = 0x200
+
+COMPRESSION_NONE = 0
+COMPRESSION_LZMA = 1
+COMPRESSION_LZ4 = 2
+COMPRESSION_LZ4HC = 3
+
+NODE_FLAG_SERIALIZED_FILE = 0x4
+ASSET_BUNDLE_CLASS_ID = 142
+MONO_BEHAVIOUR_CLASS_ID = 114
+
+# Разумный предел количества элементов в таблицах - защита от мусорных данных
+MAX_TABLE_COUNT = 10_000_000
+# Сколько распакованных блоков держать в памяти одновременно
+BLOCK_CACHE_SIZE = 4
+
+EXTERNAL_CAB_RE = re.compile(r'cab-[0-9a-f]{32}', re.IGNORECASE)
+
+class UnityFSError(ValueError):
+    """
+    Файл не является поддерживаемым бандлом UnityFS.
+    """
+
+def lz4_block_decompress(source: bytes, uncompressed_size: int) -> bytes:
+    """
+    Распаковка одного блока LZ4 (block format, без заголовка кадра).
+    """
+    output = bytearray()
+    position = 0
+    end = len(source)
+
+    while position < end:
+        token = source[position]
+        position += 1
+
+        literal_length = token >> 4
+        if literal_length == 15:
+            while True:
+                extra = source[position]
+                position += 1
+                literal_length += extra
+                if extra != 255:
+                    break
+        output += source[position:position + literal_length]
+        position += literal_length
+        if position >= end:
+            break
+
+        offset = source[position] | (source[position + 1] << 8)
+        position += 2
+        if offset == 0 or offset > len(output):
+            raise UnityFSError("Некорректное смещение в блоке LZ4")
+
+        match_length = token & 0x0F
+        if match_length == 15:
+            while True:
+                extra = source[position]
+                position += 1
+                match_length += extra
+                if extra != 255:
+                    break
+        match_length += 4
+
+        start = len(output) - offset
+        if match_length <= offset:
+            output += output[start:start + match_length]
+        else:
+            # Перекрывающееся копирование повторяет последние offset байт
+            pattern = bytes(output[start:])
+            repeats, remainder = divmod(match_length, offset)
+            output += pattern * repeats + pattern[:remainder]
+
+    if len(output) != uncompressed_size:
+        raise UnityFSError(f"Размер распакованного блока LZ4 {len(output)} != {uncompressed_size}")
+    return bytes(output)
+
+def lzma_unity_decompress(source: bytes, uncompressed_size: int) -> bytes:
+    """
+    Распаковка блока LZMA в формате Unity: 5 байт свойств и сырой поток LZMA1.
+    """
+    if len(source) < 5:
+        raise UnityFSError("Слишком короткий блок LZMA")
+    properties = source[0]
+    dict_size = struct.unpack_from("<I", source, 1)[0]
+    lc = properties % 9
+    properties //= 9
+    lp = properties % 5
+    pb = properties // 5
+    decompressor = lzma.LZMADecompressor(
+        format=lzma.FORMAT_RAW,
+        filters=[{"id": lzma.FILTER_LZMA1, "dict_size": dict_size, "lc": lc, "lp": lp, "pb": pb}]
+    )
+    data = decompressor.decompress(source[5:], uncompressed_size)
+    if len(data) != uncompressed_size:
+        raise UnityFSError(f"Размер распакованного блока LZMA {len(data)} != {uncompressed_size}")
+    return data
+
+def decompress_block(data: bytes, flags: int, uncompressed_size: int) -> bytes:
+    """
+    Распаковывает блок согласно типу сжатия во флагах.
+    """
+    compression = flags & ARCHIVE_COMPRESSION_MASK
+    if compression == COMPRESSION_NONE:
+        return bytes(data)
+    if compression == COMPRESSION_LZMA:
+        return lzma_unity_decompress(data, uncompressed_size)
+    if compression in (COMPRESSION_LZ4, COMPRESSION_LZ4HC):
+        return lz4_block_decompress(data, uncompressed_size)
+    raise UnityFSError(f"Неподдерживаемый тип сжатия: {compression}")
+
+class BlockStream:
+    """
+    Распакованное адресное пространство архива UnityFS поверх mmap.
+    Блоки распаковываются лениво и кэшируются (не больше BLOCK_CACHE_SIZE штук).
+    """
+
+    def __init__(self, buffer, data_offset: int, blocks: List[Tuple[int, int, int]]):
+        self.buffer = buffer
+        self.starts = []
+        self.blocks = []
+        uncompressed_offset = 0
+        compressed_offset = data_offset
+        for uncompressed_size, compressed_size, flags in blocks:
+            self.starts.append(uncompressed_offset)
+            self.blocks.append((uncompressed_size, compressed_offset, compressed_size, flags))
+            uncompressed_offset += uncompressed_size
+            compressed_offset += compressed_size
+        self.size = uncompressed_offset
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self.blocks_decompressed = 0
+
+    def _block(self, number: int) -> bytes:
+        data = self._cache.get(number)
+        if data is not None:
+            self._cache.move_to_end(number)
+            return data
+
+        uncompressed_size, compressed_offset, compressed_size, flags = self.blocks[number]
+        if compressed_offset + compressed_size > len(self.buffer):
+            raise UnityFSError("Блок выходит за пределы файла")
+        data = decompress_block(
+            self.buffer[compressed_offset:compressed_offset + compressed_size], flags, uncompressed_size
+        )
+        self.blocks_decompressed += 1
+        self._cache[number] = data
+        if len(self._cache) > BLOCK_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return data
+
+    def read(self, offset: int, size: int) -> bytes:
+        """
+        Читает size байт начиная с offset в распакованном адресном пространстве.
+        """
+        if offset < 0 or offset + size > self.size:
+            raise UnityFSError("Чтение за пределами данных архива")
+        parts = []
+        while size > 0:
+            number = bisect_right(self.starts, offset) - 1
+            block = self._block(number)
+            inner = offset - self.starts[number]
+            chunk = block[inner:inner + size]
+            parts.append(chunk)
+            offset += len(chunk)
+            size -= len(chunk)
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+class Cursor:
+    """
+    Последовательное чтение из BlockStream начиная с base.
+    Выравнивание считается относительно base.
+    """
+
+    def __init__(self, stream: BlockStream, base: int, little_endian: bool = False):
+        self.stream = stream
+        self.base = base
+        self.position = 0
+        self.prefix = "<" if little_endian else ">"
+
+    def read(self, size: int) -> bytes:
+        data = self.stream.read(self.base + self.position, size)
+        self.position += size
+        return data
+
+    def unpack(self, fmt: str):
+        size = struct.calcsize(self.prefix + fmt)
+        return struct.unpack(self.prefix + fmt, self.read(size))
+
+    def u8(self) -> int:
+        return self.read(1)[0]
+
+    def i16(self) -> int:
+        return self.unpack("h")[0]
+
+    def u16(self) -> int:
+        return self.unpack("H")[0]
+
+    def i32(self) -> int:
+        return self.unpack("i")[0]
+
+    def u32(self) -> int:
+        return self.unpack("I")[0]
+
+    def i64(self) -> int:
+        return self.unpack("q")[0]
+
+    def count(self) -> int:
+        value = self.i32()
+        if value < 0 or value > MAX_TABLE_COUNT:
+            raise UnityFSError(f"Некорректное количество элементов: {value}")
+        return value
+
+    def align(self, alignment: int = 4):
+        self.position += (-self.position) % alignment
+
+    def cstring(self) -> str:
+        parts = []
+        while True:
+            available = min(64, self.stream.size - self.base - self.position)
+            if available <= 0:
+                raise UnityFSError("Строка не завершена нулевым байтом")
+            chunk = self.stream.read(self.base + self.position, available)
+            terminator = chunk.find(b"\x00")
+            if terminator != -1:
+                parts.append(chunk[:terminator])
+                self.position += terminator + 1
+                break
+            parts.append(chunk)
+            self.position += len(chunk)
+        return b"".join(parts).decode('utf-8')
+
+    def aligned_string(self) -> str:
+        length = self.count()
+        value = self.read(length).decode('utf-8')
+        self.align(4)
+        return value
+
+def _read_cstring(buffer, position: int) -> Tuple[str, int]:
+    end = buffer.find(b"\x00", position)
+    if end == -1:
+        raise UnityFSError("Строка заголовка не завершена нулевым байтом")
+    return bytes(buffer[position:end]).decode('utf-8'), end + 1
+
+def open_archive(buffer) -> Tuple[BlockStream, List[Dict[str, Any]]]:
+    """
+    Разбирает заголовок UnityFS и таблицу блоков/узлов.
+    Возвращает (поток распакованных данных, список узлов).
+    """
+    signature, position = _read_cstring(buffer, 0)
+    if signature != "UnityFS":
+        raise UnityFSError(f"Неподдерживаемая сигнатура: {signature!r}")
+
+    version = struct.unpack_from(">I", buffer, position)[0]
+    position += 4
+    _, position = _read_cstring(buffer, position)  # версия Unity
+    _, position = _read_cstring(buffer, position)  # ревизия Unity
+    _, compressed_info_size, uncompressed_info_size, flags = struct.unpack_from(">qIII", buffer, position)
+    position += 20
+
+    if version >= 7:
+        position += (-position) % 16
+
+    if flags & ARCHIVE_BLOCKS_INFO_AT_END:
+        info_offset = len(buffer) - compressed_info_size
+        data_offset = position
+    else:
+        info_offset = position
+        data_offset = position + compressed_info_size
+    if flags & ARCHIVE_BLOCK_INFO_NEED_PADDING:
+        data_offset += (-data_offset) % 16
+
+    if info_offset < 0 or info_offset + compressed_info_size > len(buffer):
+        raise UnityFSError("Таблица блоков выходит за пределы файла")
+    info = decompress_block(
+        buffer[info_offset:info_offset + compressed_info_size], flags, uncompressed_info_size
+    )
+
+    position = 16  # хэш несжатых данных
+    block_count = struct.unpack_from(">i", info, position)[0]
+    position += 4
+    if block_count < 0 or block_count > MAX_TABLE_COUNT:
+        raise UnityFSError(f"Некорректное количество блоков: {block_count}")
+    blocks = []
+    for _ in range(block_count):
+        blocks.append(struct.unpack_from(">IIH", info, position))
+        position += 10
+
+    node_count = struct.unpack_from(">i", info, position)[0]
+    position += 4
+    if node_count < 0 or node_count > MAX_TABLE_COUNT:
+        raise UnityFSError(f"Некорректное количество узлов: {node_count}")
+    nodes = []
+    for _ in range(node_count):
+        offset, size, node_flags = struct.unpack_from(">qqI", info, position)
+        position += 20
+        path, position = _read_cstring(info, position)
+        nodes.append({"offset": offset, "size": size, "flags": node_flags, "path": path})
+
+    return BlockStream(buffer, data_offset, blocks), nodes
+
+def _skip_serialized_type(cursor: Cursor, version: int, enable_type_tree: bool) -> int:
+    """
+    Пропускает описание типа в метаданных SerializedFile и возвращает его classID.
+    """
+    class_id = cursor.i32()
+    if version >= 16:
+        cursor.u8()  # IsStrippedType
+    if version >= 17:
+        cursor.i16()  # ScriptTypeIndex
+    if version >= 13:
+        if (version < 16 and class_id < 0) or (version >= 16 and class_id == MONO_BEHAVIOUR_CLASS_ID):
+            cursor.read(16)  # ScriptID
+        cursor.read(16)  # OldTypeHash
+
+    if enable_type_tree:
+        if version < 12 and version != 10:
+            raise UnityFSError(f"Дерево типов старого формата не поддерживается (версия {version})")
+        node_count = cursor.count()
+        string_buffer_size = cursor.count()
+        node_size = 32 if version >= 19 else 24
+        cursor.position += node_count * node_size + string_buffer_size
+        if version >= 21:
+            dependency_count = cursor.count()  # TypeDependencies
+            cursor.position += 4 * dependency_count
+
+    return class_id
+
+def read_serialized_file(stream: BlockStream, base: int) -> Dict[str, Any]:
+    """
+    Читает заголовок и метаданные SerializedFile: версию, таблицу объектов и externals.
+    """
+    cursor = Cursor(stream, base)
+    metadata_size, file_size, version, data_offset = cursor.unpack("IIII")
+    if version < 9:
+        raise UnityFSError(f"Версия SerializedFile {version} не поддерживается")
+    endianness = cursor.u8()
+    cursor.read(3)
+    if version >= 22:
+        metadata_size, file_size, data_offset, _ = cursor.unpack("Iqqq")
+
+    cursor.prefix = "<" if endianness == 0 else ">"
+
+    unity_version = cursor.cstring() if version >= 7 else ""
+    if version >= 8:
+        cursor.i32()  # TargetPlatform
+    enable_type_tree = bool(cursor.u8()) if version >= 13 else True
+
+    types = [_skip_serialized_type(cursor, version, enable_type_tree) for _ in range(cursor.count())]
+
+    big_id_enabled = cursor.i32() if 7 <= version < 14 else 0
+
+    objects = []
+    for _ in range(cursor.count()):
+        if big_id_enabled:
+            path_id = cursor.i64()
+        elif version < 14:
+            path_id = cursor.i32()
+        else:
+            cursor.align(4)
+            path_id = cursor.i64()
+        byte_start = cursor.i64() if version >= 22 else cursor.u32()
+        byte_size = cursor.u32()
+        type_id = cursor.i32()
+        if version < 16:
+            class_id = cursor.u16()
+        else:
+            if type_id < 0 or type_id >= len(types):
+                raise UnityFSError(f"Некорректный индекс типа объекта: {type_id}")
+            class_id = types[type_id]
+        if version < 11:
+            cursor.u16()  # IsDestroyed
+        if 11 <= version < 17:
+            cursor.i16()  # ScriptTypeIndex
+        if version in (15, 16):
+            cursor.u8()  # Stripped
+        objects.append({
+            "path_id": path_id,
+            "offset": data_offset + byte_start,
+            "size": byte_size,
+            "class_id": class_id
+        })
+
+    if version >= 11:
+        for _ in range(cursor.count()):
+            cursor.i32()  # LocalSerializedFileIndex
+            if version < 14:
+                cursor.i32()
+            else:
+                cursor.align(4)
+                cursor.i64()
+
+    externals = []
+    for _ in range(cursor.count()):
+        if version >= 6:
+            cursor.cstring()
+        if version >= 5:
+            cursor.read(16)  # GUID
+            cursor.i32()  # Type
+        externals.append(cursor.cstring())
+
+    return {
+        "version": version,
+        "unity_version": unity_version,
+        "little_endian": endianness == 0,
+        "objects": objects,
+        "externals": externals
+    }
+
+def read_asset_bundle_object(stream: BlockStream, base: int, serialized: Dict[str, Any],
+                             asset_bundle: Dict[str, Any]) -> Tuple[str, List[str]]:
+    """
+    Читает m_AssetBundleName и m_Dependencies из объекта AssetBundle (classID 142).
+    """
+    version = serialized["version"]
+    cursor = Cursor(stream, base + asset_bundle["offset"], serialized["little_endian"])
+
+    def skip_pptr():
+        cursor.i32()  # m_FileID
+        if version >= 14:
+            cursor.i64()
+        else:
+            cursor.i32()
+
+    def skip_asset_info():
+        cursor.i32()  # preloadIndex
+        cursor.i32()  # preloadSize
+        skip_pptr()
+
+    cursor.aligned_string()  # m_Name
+    for _ in range(cursor.count()):  # m_PreloadTable
+        skip_pptr()
+    for _ in range(cursor.count()):  # m_Container
+        cursor.aligned_string()
+        skip_asset_info()
+    skip_asset_info()  # m_MainAsset
+    cursor.u32()  # m_RuntimeCompatibility
+    name = cursor.aligned_string()
+    dependencies = [cursor.aligned_string() for _ in range(cursor.count())]
+
+    if cursor.position > asset_bundle["size"]:
+        raise UnityFSError("Объект AssetBundle прочитан за пределами своего размера")
+    return name, dependencies
+
+def external_cab_names(externals: List[str]) -> List[str]:
+    """
+    Имена cab-... из путей externals вида archive:/CAB-xxxx/CAB-xxxx.
+    """
+    names = []
+    for path in externals:
+        match = EXTERNAL_CAB_RE.search(path)
+        if match:
+            name = match.group(0).lower()
+            if name not in names:
+                names.append(name)
+    return names
+
+def read_bundle_buffer(buffer) -> Dict[str, Any]:
+    """
+    Извлекает m_AssetBundleName и зависимости из содержимого файла .bundle
+    (bytes, bytearray или mmap). Выбрасывает UnityFSError для неподдерживаемых файлов.
+    """
+    stream, nodes = open_archive(buffer)
+
+    serialized_nodes = [node for node in nodes if node["flags"] & NODE_FLAG_SERIALIZED_FILE]
+    if not serialized_nodes:
+        # Старые сборки не выставляют флаг - берем узлы без расширения ресурсов
+        serialized_nodes = [node for node in nodes if not node["path"].endswith((".resS", ".resource"))]
+
+    for node in serialized_nodes:
+        serialized = read_serialized_file(stream, node["offset"])
+        for obj in serialized["objects"]:
+            if obj["class_id"] != ASSET_BUNDLE_CLASS_ID:
+                continue
+            name, dependencies = read_asset_bundle_object(stream, node["offset"], serialized, obj)
+            cab_dependencies = [dep for dep in dependencies if dep.startswith('cab-')]
+            if not cab_dependencies:
+                cab_dependencies = external_cab_names(serialized["externals"])
+            return {
+                "asset_bundle_name": name or None,
+                "dependencies": cab_dependencies,
+                "node": node["path"],
+                "blocks_decompressed": stream.blocks_decompressed,
+                "blocks_total": len(stream.blocks)
+            }
+
+    raise UnityFSError("Объект AssetBundle не найден")
+
+def read_bundle_file(file_path: Path) -> Dict[str, Any]:
+    """
+    Извлекает зависимости из файла .bundle, отображая его в память через mmap.
+    """
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return read_bundle_buffer(buffer)
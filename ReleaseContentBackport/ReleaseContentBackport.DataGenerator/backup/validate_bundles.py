@@ -0,0 +1,186 @@
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set
+
+from bundle_graph import BundleGraph, load_graph, load_json, closure_unresolved_cabs
+
+# Проверка bundles.json по графу зависимостей перед сборкой пакета.
+#
+# Ошибки (error):
+#   duplicate_key        - запись с таким key уже есть в manifest
+#   key_not_shipped      - key нет в assets_paths.json (бандл не попадет в пакет)
+#   missing_entry        - бандл из assets_paths.json без записи в manifest
+#   missing_dependency   - бандл из транзитивного замыкания key отсутствует в dependencyKeys
+#   unknown_dependency   - dependencyKeys ссылается на бандл, которого нет ни в пакете, ни в игре
+# Предупреждения (warning):
+#   unknown_bundle       - key нет в dependencies_analysis.json, замыкание проверить нельзя
+#   extra_dependency     - бандл в dependencyKeys не входит в замыкание key
+#   unresolved_cabs      - в замыкании есть CAB без известного бандла-владельца
+
+DEFAULT_BUNDLES = Path(__file__).resolve().parents[2] / "ReleaseContentBackport" / "bundles.json"
+
+def load_base_game(path: str) -> Set[str]:
+    """
+    Список бандлов базовой игры: JSON-массив путей или текстовый файл (один путь на строку).
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return set(json.loads(content))
+    return {line.strip() for line in content.splitlines() if line.strip() and not line.startswith("#")}
+
+def validate_manifest(graph: BundleGraph, manifest: List[Dict[str, Any]], shipped: Set[str],
+                      base_game: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Проверяет записи manifest. shipped - пути из assets_paths.json, base_game - бандлы
+    базовой игры (по умолчанию все бандлы, известные графу). Возвращает список проблем.
+    """
+    issues = []
+
+    def issue(severity: str, code: str, key: str, **details):
+        issues.append(dict({"severity": severity, "code": code, "key": key}, **details))
+
+    seen: Set[str] = set()
+    for entry in manifest:
+        key = entry.get("key", "")
+        dependency_keys = entry.get("dependencyKeys") or []
+        if key in seen:
+            issue("error", "duplicate_key", key)
+            continue
+        seen.add(key)
+
+        if key not in shipped:
+            issue("error", "key_not_shipped", key)
+
+        listed = set(dependency_keys)
+        for dependency in dependency_keys:
+            known = dependency in shipped or (dependency in base_game if base_game is not None
+                                              else graph.bundle_id(dependency) is not None)
+            if not known:
+                issue("error", "unknown_dependency", key, dependency=dependency)
+
+        node = graph.bundle_id(key)
+        if node is None or not graph.analysed[node]:
+            issue("warning", "unknown_bundle", key)
+            continue
+
+        closure = graph.closure(node)
+        required = [graph.names[member] for member in closure]
+        missing = [dependency for dependency in required if dependency not in listed]
+        if missing:
+            issue("error", "missing_dependency", key, dependencies=missing)
+        required_set = set(required)
+        extra = [dependency for dependency in dependency_keys if dependency not in required_set]
+        if extra:
+            issue("warning", "extra_dependency", key, dependencies=extra)
+        unresolved = closure_unresolved_cabs(graph, node, closure)
+        if unresolved:
+            issue("warning", "unresolved_cabs", key, cabs=unresolved)
+
+    for path in sorted(shipped - seen):
+        issue("error", "missing_entry", path)
+
+    return issues
+
+def validate_file(graph: BundleGraph, bundles_file: str, shipped: Set[str],
+                  base_game: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """
+    Проверяет один файл bundles.json; ошибки чтения тоже попадают в отчет.
+    """
+    try:
+        manifest = load_json(bundles_file).get("manifest", [])
+    except (OSError, ValueError, AttributeError) as e:
+        return {
+            "file": bundles_file,
+            "entries": 0,
+            "issues": [{"severity": "error", "code": "unreadable", "key": "", "error": str(e)}]
+        }
+    return {
+        "file": bundles_file,
+        "entries": len(manifest),
+        "issues": validate_manifest(graph, manifest, shipped, base_game)
+    }
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = {"errors": 0, "warnings": 0, "by_code": {}}
+    for result in results:
+        for item in result["issues"]:
+            summary["errors" if item["severity"] == "error" else "warnings"] += 1
+            summary["by_code"][item["code"]] = summary["by_code"].get(item["code"], 0) + 1
+    return summary
+
+def print_results(results: List[Dict[str, Any]], limit: int = 20):
+    """
+    Человекочитаемый вывод (не более limit проблем на файл).
+    """
+    for result in results:
+        errors = [item for item in result["issues"] if item["severity"] == "error"]
+        warnings = [item for item in result["issues"] if item["severity"] == "warning"]
+        mark = "✗" if errors else ("⚠" if warnings else "✓")
+        print(f"{mark} {result['file']}: записей {result['entries']}, ошибок {len(errors)}, предупреждений {len(warnings)}")
+        for item in (errors + warnings)[:limit]:
+            details = item.get("dependency") or ", ".join(item.get("dependencies", item.get("cabs", []))) or item.get("error", "")
+            prefix = "✗" if item["severity"] == "error" else "⚠"
+            print(f"  {prefix} {item['code']}: {item['key']}" + (f" -> {details}" if details else ""))
+        if len(result["issues"]) > limit:
+            print(f"  ... и еще {len(result['issues']) - limit}")
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Проверка bundles.json по графу зависимостей (код возврата 1 при ошибках)'
+    )
+    parser.add_argument('bundles', nargs='*', default=[str(DEFAULT_BUNDLES)],
+                        help='Файлы bundles.json (по умолчанию bundles.json мода)')
+    parser.add_argument('-a', '--assets', default='assets_paths.json', help='Список поставляемых бандлов')
+    parser.add_argument('-d', '--dependencies', default='dependencies_analysis.json', help='Файл анализа зависимостей')
+    parser.add_argument('-c', '--cab-files', default='cab_files.json', help='Соответствие CAB -> путь бандла')
+    parser.add_argument('-b', '--base-game', default=None,
+                        help='Список бандлов базовой игры (JSON-массив или по одному на строку); '
+                             'по умолчанию - все бандлы, известные графу')
+    parser.add_argument('-o', '--output', default=None, help='Сохранить отчет в JSON файл')
+    parser.add_argument('--json', action='store_true', help='Вывести отчет в формате JSON в stdout')
+    parser.add_argument('--strict', action='store_true', help='Считать предупреждения ошибками')
+    parser.add_argument('-n', '--limit', type=int, default=20, help='Сколько проблем на файл выводить в консоль')
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        graph = load_graph(args.dependencies, args.cab_files)
+        shipped = set(load_json(args.assets))
+        base_game = load_base_game(args.base_game) if args.base_game else None
+    except (OSError, ValueError) as e:
+        print(f"✗ Ошибка при чтении входных файлов: {e}", file=sys.stderr)
+        return 2
+
+    results = [validate_file(graph, bundles_file, shipped, base_game) for bundles_file in args.bundles]
+    summary = summarize(results)
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    report = {"summary": summary, "results": results}
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_results(results, args.limit)
+        print(f"Ошибок: {summary['errors']}, предупреждений: {summary['warnings']} ({summary['seconds'] * 1000:.0f} мс)")
+
+    if args.output:
+        try:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"✗ Ошибка при сохранении отчета: {e}", file=sys.stderr)
+            return 2
+
+    failed = summary["errors"] or (args.strict and summary["warnings"])
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,510 @@
+import os
+import sys
+import json
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from generate_cab_names import scan_directory, walk_cab_directories
+from generate_bundle_deps import (
+    process_file, iter_file_results, default_jobs, unique_bundle_key, analysis_metadata
+)
+from ndjson_output import write_analysis_json
+
+# Режим наблюдения: cab_files.json и dependencies_analysis.json строятся один раз,
+# затем обновляются только затронутые каталоги и дампы. Изменения отслеживаются
+# через inotify (Linux, через ctypes) или опросом mtime каталогов и файлов.
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ATTRIB)
+EVENT_HEADER = struct.Struct("iIII")
+
+def write_json_atomic(data: Any, output_file: str, **dump_options):
+    """
+    Записывает JSON во временный файл рядом с целевым и заменяет его через os.replace,
+    чтобы читатели никогда не видели частично записанный файл.
+    """
+    temp_file = output_file + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **dump_options)
+    os.replace(temp_file, output_file)
+
+class CabIndexState:
+    """
+    Состояние индекса CAB: результаты scan_directory по каждому каталогу дерева ассетов.
+    """
+
+    def __init__(self, base_dir: str, workers: Optional[int] = None):
+        self.base_dir = base_dir
+        self.workers = workers
+        self.records: Dict[str, Tuple[List[str], bool, List[str]]] = {}
+
+    def load(self):
+        self.records = {
+            relative_path: (cab_files, has_files, subdirs)
+            for relative_path, cab_files, has_files, subdirs in walk_cab_directories(self.base_dir, self.workers)
+        }
+
+    def path(self, relative_path: str) -> str:
+        return os.path.join(self.base_dir, *relative_path.split("/")) if relative_path else self.base_dir
+
+    def relative(self, path: str) -> Optional[str]:
+        relative_path = os.path.relpath(path, self.base_dir)
+        if relative_path.startswith(".."):
+            return None
+        return "" if relative_path == "." else relative_path.replace(os.sep, "/")
+
+    def _remove_tree(self, relative_path: str):
+        prefix = relative_path + "/" if relative_path else ""
+        for key in [key for key in self.records if key == relative_path or key.startswith(prefix)]:
+            del self.records[key]
+
+    def rescan(self, relative_path: str) -> bool:
+        """
+        Повторно сканирует каталог; новые подкаталоги сканируются рекурсивно,
+        исчезнувшие удаляются вместе с потомками. Возвращает True, если что-то изменилось.
+        """
+        previous = self.records.get(relative_path)
+        record = scan_directory(self.path(relative_path), relative_path)
+        if record is None:
+            if previous is None:
+                return False
+            self._remove_tree(relative_path)
+            return True
+
+        _, cab_files, has_files, subdirs = record
+        self.records[relative_path] = (cab_files, has_files, subdirs)
+        changed = previous is None or sorted(previous[0]) != sorted(cab_files) or previous[1] != has_files
+
+        old_subdirs = set(previous[2]) if previous else set()
+        for name in old_subdirs - set(subdirs):
+            self._remove_tree(f"{relative_path}/{name}" if relative_path else name)
+            changed = True
+        for name in set(subdirs) - old_subdirs:
+            child = f"{relative_path}/{name}" if relative_path else name
+            if child not in self.records:
+                changed = self.rescan(child) or changed
+        return changed
+
+    def mapping(self) -> Dict[str, str]:
+        """
+        Соответствие {cab: путь} как у find_cab_files_with_patterns (первый по имени файл каталога).
+        """
+        result = {}
+        for relative_path in sorted(self.records, key=lambda key: key.split("/") if key else []):
+            cab_files = self.records[relative_path][0]
+            if cab_files:
+                result[min(cab_files)] = relative_path
+        return result
+
+    def directories(self) -> List[str]:
+        return [self.path(relative_path) for relative_path in self.records]
+
+class DumpIndexState:
+    """
+    Состояние анализа зависимостей: результат process_file по каждому файлу дампа.
+    """
+
+    def __init__(self, folder: str, extension: str = ".bundle.txt", jobs: int = 1):
+        self.folder = folder
+        self.extension = extension
+        self.jobs = jobs
+        self.results: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def matches(self, name: str) -> bool:
+        return name.endswith(self.extension)
+
+    def load(self):
+        names = sorted(entry.name for entry in os.scandir(self.folder) if entry.is_file() and self.matches(entry.name))
+        files = [Path(self.folder) / name for name in names]
+        self.results = dict(zip(names, iter_file_results(files, self.jobs, self.extension)))
+
+    def update(self, name: str) -> bool:
+        """
+        Повторно разбирает один файл (или удаляет его результат). Возвращает True при изменении.
+        """
+        file_path = Path(self.folder) / name
+        if not file_path.is_file():
+            if name not in self.results:
+                return False
+            return self.results.pop(name) is not None
+        result = process_file(file_path)
+        previous = self.results.get(name)
+        self.results[name] = result
+        if previous is None or result is None:
+            return previous is not result
+        return (previous.get("asset_bundle_name"), previous.get("dependencies")) != \
+            (result.get("asset_bundle_name"), result.get("dependencies"))
+
+    def merged(self) -> Dict[str, Any]:
+        """
+        Результат в формате раздела dependencies (файлы в порядке имен, дубликаты с суффиксами).
+        """
+        results = {}
+        seen_keys = set()
+        for name in sorted(self.results):
+            file_result = self.results[name]
+            if file_result is None:
+                continue
+            key = unique_bundle_key(file_result.get("asset_bundle_name") or Path(name).stem, seen_keys)
+            results[key] = {"dependencies": file_result.get("dependencies", [])}
+        return results
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if self.matches(entry.name):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    state[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return state
+
+class InotifyWatcher:
+    """
+    Наблюдение за каталогами через inotify (Linux) без внешних зависимостей.
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify недоступен")
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.paths: Dict[int, str] = {}
+        self.watches: Dict[str, int] = {}
+        self.limit_reported = False
+
+    def add(self, path: str) -> bool:
+        if path in self.watches:
+            return False
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            if ctypes.get_errno() == errno.ENOSPC and not self.limit_reported:
+                self.limit_reported = True
+                print("⚠ Достигнут лимит inotify (fs.inotify.max_user_watches) - "
+                      "часть каталогов не отслеживается, используйте --poll или увеличьте лимит")
+            # Каталог мог успеть исчезнуть - его изменения придут от родителя
+            return False
+        self.paths[wd] = path
+        self.watches[path] = wd
+        return True
+
+    def remove(self, wd: int):
+        """
+        Снимает наблюдение. Для уже снятого ядром наблюдения (IN_DELETE_SELF)
+        inotify_rm_watch вернет EINVAL - это не ошибка.
+        """
+        path = self.paths.pop(wd, None)
+        if path is not None and self.watches.get(path) == wd:
+            del self.watches[path]
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def sync(self, directories: List[str]) -> List[str]:
+        """
+        Ставит наблюдение на новые каталоги и возвращает их; наблюдения каталогов,
+        которых больше нет в дереве, снимаются.
+        """
+        current = set(directories)
+        for path in [path for path in self.watches if path not in current]:
+            self.remove(self.watches[path])
+        return [path for path in directories if self.add(path)]
+
+    def read(self, timeout: float) -> Optional[List[Tuple[str, str, int]]]:
+        """
+        Возвращает список событий (каталог, имя, маска) или None при переполнении очереди.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            position = 0
+            while position < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, position)
+                position += EVENT_HEADER.size
+                name = os.fsdecode(data[position:position + length].rstrip(b"\x00"))
+                position += length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                path = self.paths.get(wd)
+                if mask & IN_IGNORED:
+                    self.paths.pop(wd, None)
+                    if path is not None and self.watches.get(path) == wd:
+                        del self.watches[path]
+                    continue
+                if path is not None:
+                    events.append((path, name, mask))
+                if mask & (IN_MOVE_SELF | IN_DELETE_SELF):
+                    # Перемещенный каталог остается под тем же wd, но уже не по этому пути
+                    # (IN_IGNORED при перемещении не приходит): снимаем наблюдение, чтобы
+                    # sync() поставил новое на каталог, созданный на его месте
+                    self.remove(wd)
+        return None if overflow else events
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """
+    Запасной вариант без inotify: сравнение mtime каталогов дерева ассетов
+    (имена файлов cab* меняют mtime каталога) и снимков размера/mtime файлов дампов.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.directory_mtimes: Dict[str, int] = {}
+        self.dump_snapshot: Dict[str, Tuple[int, int]] = {}
+
+    def sync(self, directories: List[str]) -> List[str]:
+        self.directory_mtimes = {path: self.directory_mtimes.get(path, self._mtime(path)) for path in directories}
+        return []
+
+    @staticmethod
+    def _mtime(path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return -1
+
+    def poll(self, dumps: Optional[DumpIndexState]) -> Tuple[Set[str], Set[str]]:
+        time.sleep(self.interval)
+        changed_directories = set()
+        for path, mtime in self.directory_mtimes.items():
+            current = self._mtime(path)
+            if current != mtime:
+                self.directory_mtimes[path] = current
+                changed_directories.add(path)
+
+        changed_dumps = set()
+        if dumps is not None:
+            snapshot = dumps.snapshot()
+            for name in snapshot.keys() | self.dump_snapshot.keys():
+                if snapshot.get(name) != self.dump_snapshot.get(name):
+                    changed_dumps.add(name)
+            self.dump_snapshot = snapshot
+        return changed_directories, changed_dumps
+
+class IndexWatcher:
+    """
+    Держит оба индекса в памяти, применяет изменения пачками (с задержкой debounce)
+    и атомарно перезаписывает выходные файлы.
+    """
+
+    def __init__(self, cab_state: Optional[CabIndexState], dump_state: Optional[DumpIndexState],
+                 cab_output: str, deps_output: str, debounce: float = 0.3, max_delay: float = 2.0):
+        self.cab_state = cab_state
+        self.dump_state = dump_state
+        self.cab_output = cab_output
+        self.deps_output = deps_output
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.dirty_directories: Set[str] = set()
+        self.dirty_dumps: Set[str] = set()
+        self.full_reload = False
+
+    def load(self):
+        started = time.perf_counter()
+        if self.cab_state is not None:
+            self.cab_state.load()
+            self.write_cab_files()
+            print(f"✓ Индекс CAB: {len(self.cab_state.records)} каталогов")
+        if self.dump_state is not None:
+            self.dump_state.load()
+            self.write_dependencies()
+            print(f"✓ Анализ зависимостей: {len(self.dump_state.results)} файлов")
+        print(f"Начальная загрузка за {time.perf_counter() - started:.2f} с")
+
+    def write_cab_files(self):
+        write_json_atomic(self.cab_state.mapping(), self.cab_output, indent=4, sort_keys=True)
+
+    def write_dependencies(self):
+        results = self.dump_state.merged()
+        total_dependencies = sum(len(value["dependencies"]) for value in results.values())
+        files_with_dependencies = sum(1 for value in results.values() if value["dependencies"])
+        metadata = analysis_metadata(len(results), total_dependencies, files_with_dependencies)
+        write_analysis_json(results.items(), metadata, self.deps_output)
+
+    def directory_event(self, path: str):
+        relative_path = self.cab_state.relative(path)
+        if relative_path is not None:
+            self.dirty_directories.add(relative_path)
+
+    def route_events(self, events: List[Tuple[str, str, int]]):
+        dump_folder = os.path.abspath(self.dump_state.folder) if self.dump_state else None
+        for path, name, mask in events:
+            if dump_folder is not None and os.path.abspath(path) == dump_folder and name:
+                if self.dump_state.matches(name) and not mask & IN_ISDIR:
+                    self.dirty_dumps.add(name)
+                continue
+            if self.cab_state is not None:
+                # Событие в каталоге дерева - каталог пересканируется целиком (один scandir)
+                self.directory_event(path)
+
+    def apply(self):
+        """
+        Применяет накопленные изменения и перезаписывает измененные индексы.
+        """
+        started = time.perf_counter()
+        if self.full_reload:
+            print("⚠ Очередь событий переполнена - полная перезагрузка индексов")
+            self.full_reload = False
+            self.dirty_directories.clear()
+            self.dirty_dumps.clear()
+            self.load()
+            return
+
+        cab_changed = False
+        if self.cab_state is not None:
+            # Родительские каталоги раньше дочерних: новые поддеревья сканируются один раз
+            for relative_path in sorted(self.dirty_directories, key=lambda key: key.count("/") if key else -1):
+                cab_changed = self.cab_state.rescan(relative_path) or cab_changed
+        deps_changed = False
+        if self.dump_state is not None:
+            for name in sorted(self.dirty_dumps):
+                deps_changed = self.dump_state.update(name) or deps_changed
+
+        if cab_changed:
+            self.write_cab_files()
+        if deps_changed:
+            self.write_dependencies()
+        if cab_changed or deps_changed:
+            print(f"✓ Обновлено за {(time.perf_counter() - started) * 1000:.0f} мс: "
+                  f"каталогов {len(self.dirty_directories)}, дампов {len(self.dirty_dumps)}"
+                  + (f" -> {self.cab_output}" if cab_changed else "")
+                  + (f" -> {self.deps_output}" if deps_changed else ""))
+        self.dirty_directories.clear()
+        self.dirty_dumps.clear()
+
+    def directories(self) -> List[str]:
+        directories = self.cab_state.directories() if self.cab_state is not None else []
+        if self.dump_state is not None:
+            directories.append(self.dump_state.folder)
+        return directories
+
+    def run(self, force_polling: bool = False, poll_interval: float = 1.0):
+        """
+        Основной цикл наблюдения (до Ctrl+C).
+        """
+        watcher = None
+        if not force_polling:
+            try:
+                watcher = InotifyWatcher()
+                print("Наблюдение через inotify")
+            except (OSError, AttributeError) as e:
+                print(f"⚠ inotify недоступен ({e}), используется опрос каждые {poll_interval} с")
+        poller = PollingWatcher(poll_interval) if watcher is None else None
+        if poller is not None:
+            print(f"Наблюдение опросом каждые {poll_interval} с")
+            if self.dump_state is not None:
+                poller.dump_snapshot = self.dump_state.snapshot()
+
+        (watcher or poller).sync(self.directories())
+        first_event = last_event = None
+        try:
+            while True:
+                if watcher is not None:
+                    timeout = self.debounce if first_event is not None else None
+                    events = watcher.read(timeout)
+                    if events is None:
+                        self.full_reload = True
+                    else:
+                        self.route_events(events)
+                    has_events = events is None or bool(events)
+                else:
+                    changed_directories, changed_dumps = poller.poll(self.dump_state)
+                    for path in changed_directories:
+                        self.directory_event(path)
+                    self.dirty_dumps |= changed_dumps
+                    has_events = bool(changed_directories or changed_dumps)
+
+                now = time.monotonic()
+                if has_events:
+                    last_event = now
+                    first_event = first_event or now
+                if first_event is not None and (now - last_event >= self.debounce or now - first_event >= self.max_delay):
+                    self.apply()
+                    first_event = last_event = None
+                    # Файлы, созданные в новом каталоге до установки наблюдения,
+                    # подхватываются повторным сканированием этого каталога
+                    for path in (watcher or poller).sync(self.directories()):
+                        self.directory_event(path)
+                        first_event = last_event = first_event or now
+        except KeyboardInterrupt:
+            print("\nНаблюдение остановлено")
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+def main():
+    """
+    Основная функция скрипта.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Наблюдение за деревом ассетов и дампами с обновлением cab_files.json и dependencies_analysis.json'
+    )
+    parser.add_argument('-a', '--assets-root', default=None, help='Дерево ассетов для cab_files.json')
+    parser.add_argument('-D', '--dumps', default=None, help='Папка с дампами для dependencies_analysis.json')
+    parser.add_argument('-e', '--extension', default='.bundle.txt', help='Расширение файлов дампов (по умолчанию .bundle.txt)')
+    parser.add_argument('-c', '--cab-output', default='cab_files.json', help='Выходной файл индекса CAB')
+    parser.add_argument('-o', '--output', default='dependencies_analysis.json', help='Выходной файл анализа зависимостей')
+    parser.add_argument('-j', '--jobs', type=int, default=default_jobs(), help='Процессов для начального разбора дампов')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Потоков для начального обхода дерева ассетов')
+    parser.add_argument('--debounce', type=float, default=0.3, help='Пауза без событий перед обновлением, с (по умолчанию 0.3)')
+    parser.add_argument('--max-delay', type=float, default=2.0, help='Максимальная задержка обновления при непрерывных событиях, с')
+    parser.add_argument('--poll', action='store_true', help='Использовать опрос вместо inotify')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='Интервал опроса, с (по умолчанию 1)')
+    parser.add_argument('--once', action='store_true', help='Только построить индексы и выйти')
+
+    args = parser.parse_args()
+    if not args.assets_root and not args.dumps:
+        parser.error('нужно указать --assets-root и/или --dumps')
+    for folder in (args.assets_root, args.dumps):
+        if folder and not os.path.isdir(folder):
+            print(f"✗ Каталог {folder} не существует")
+            return 2
+
+    watcher = IndexWatcher(
+        CabIndexState(args.assets_root, args.workers) if args.assets_root else None,
+        DumpIndexState(args.dumps, args.extension, args.jobs) if args.dumps else None,
+        args.cab_output, args.output, args.debounce, args.max_delay
+    )
+    watcher.load()
+    if not args.once:
+        watcher.run(args.poll, args.poll_interval)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())